@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import io
+import json
+import resource
+import sys
+import time
+
+import main
+from src.classes.async_qualys_api import AsyncQualysApi
+from src.classes.qualys_api import QualysApi
+from src.classes.request_event import RequestEvent
+
+# Every case runs in its own process so the peak RSS belongs to that case
+# alone, the stub server only speaks plain HTTP
+QualysApi.SCHEME = 'http://'
+LATENCIES = []
+_init = QualysApi.__init__
+
+
+def init(self, *args, **kwargs) -> None:
+    # main.py builds its own client, so every client is hooked here
+    _init(self, *args, **kwargs)
+    self.add_hook(record_latency)
+
+
+def record_latency(event: RequestEvent) -> None:
+    if event.phase == RequestEvent.SEND:
+        LATENCIES.append(event.elapsed)
+
+
+QualysApi.__init__ = init
+
+
+def rows(users: int) -> list:
+    return [{'email': f'user{i}@test.com', 'send_email': 1}
+            for i in range(users)]
+
+
+def logins(users: int) -> list:
+    return [f'quays{i:06d}' for i in range(1, users + 1)]
+
+
+def api_create(args: argparse.Namespace) -> int | None:
+    pool_size = max(args.workers, QualysApi.POOL_SIZE)
+    with QualysApi(args.credentials, pool_size=pool_size) as qa:
+        for _ in qa.add_users(rows(args.users), args.workers):
+            pass
+    return len(qa.failed_user)
+
+
+def api_reset(args: argparse.Namespace) -> int | None:
+    with QualysApi(args.credentials) as qa:
+        qa.reset_passwords(logins(args.users), 0)
+    return len(qa.failed_user)
+
+
+def async_create(args: argparse.Namespace) -> int | None:
+    async def create() -> int:
+        qa = AsyncQualysApi(args.credentials, concurrency=args.workers)
+        async with qa:
+            async for _ in qa.add_users(rows(args.users)):
+                pass
+        return len(qa.failed_user)
+    return asyncio.run(create())
+
+
+def main_run(argv: list) -> None:
+    sys.argv = ['main.py', *argv]
+    sys.stdin = io.StringIO('y\n')
+    try:
+        main.main()
+    except SystemExit:
+        pass
+
+
+def main_create(args: argparse.Namespace) -> int | None:
+    main_run(['--create', args.roster, '--credentials', args.credentials,
+              '--workers', str(args.workers)])
+    return None
+
+
+def main_reset(args: argparse.Namespace) -> int | None:
+    main_run(['--reset-password', *logins(args.users),
+              '--credentials', args.credentials])
+    return None
+
+
+CASES = {
+    'api-create': api_create,
+    'api-reset': api_reset,
+    'async-create': async_create,
+    'main-create': main_create,
+    'main-reset': main_reset
+}
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(
+        description='Run one benchmark case against the Qualys API stub')
+    parser.add_argument('case', choices=CASES)
+    parser.add_argument('--credentials', required=True)
+    parser.add_argument('--roster', required=True)
+    parser.add_argument('--result', required=True)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    failed = CASES[args.case](args)
+    seconds = time.perf_counter() - start
+    result = {
+        'case': args.case,
+        'users': args.users,
+        'failed': failed,
+        'seconds': seconds,
+        'latencies': LATENCIES,
+        'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+    with open(args.result, 'w') as file:
+        json.dump(result, file)
+
+
+if __name__ == '__main__':
+    run()
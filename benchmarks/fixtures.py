@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+LIST_USERS_USER = """
+    <USER>
+      <USER_LOGIN>quays{0}</USER_LOGIN>
+      <USER_ID>{0}</USER_ID>
+      <CONTACT_INFO>
+        <FIRSTNAME><![CDATA[FirstName]]></FIRSTNAME>
+        <LASTNAME><![CDATA[LastName]]></LASTNAME>
+        <TITLE><![CDATA[Title]]></TITLE>
+        <PHONE><![CDATA[000000]]></PHONE>
+        <FAX><![CDATA[]]></FAX>
+        <EMAIL><![CDATA[user{0}@test.com]]></EMAIL>
+        <COMPANY><![CDATA[Company]]></COMPANY>
+        <ADDRESS1><![CDATA[Foster City, CA 94404]]></ADDRESS1>
+        <ADDRESS2><![CDATA[]]></ADDRESS2>
+        <CITY><![CDATA[Foster City]]></CITY>
+        <COUNTRY>United States of America</COUNTRY>
+        <STATE>California</STATE>
+        <ZIP_CODE><![CDATA[94065]]></ZIP_CODE>
+        <TIME_ZONE_CODE><![CDATA[Auto]]></TIME_ZONE_CODE>
+      </CONTACT_INFO>
+      <USER_STATUS>Active</USER_STATUS>
+      <CREATION_DATE>2023-08-25T06:58:49Z</CREATION_DATE>
+      <LAST_LOGIN_DATE>2024-05-23T10:53:55Z</LAST_LOGIN_DATE>
+      <USER_ROLE>Reader</USER_ROLE>
+      <BUSINESS_UNIT><![CDATA[Unassigned]]></BUSINESS_UNIT>
+      <UNIT_MANAGER_POC>0</UNIT_MANAGER_POC>
+      <MANAGER_POC>0</MANAGER_POC>
+      <UI_INTERFACE_STYLE>standard_blue</UI_INTERFACE_STYLE>
+      <PERMISSIONS>
+        <CREATE_OPTION_PROFILES>0</CREATE_OPTION_PROFILES>
+        <PURGE_INFO>0</PURGE_INFO>
+        <ADD_ASSETS>0</ADD_ASSETS>
+        <EDIT_REMEDIATION_POLICY>0</EDIT_REMEDIATION_POLICY>
+        <EDIT_AUTH_RECORDS>0</EDIT_AUTH_RECORDS>
+      </PERMISSIONS>
+      <NOTIFICATIONS>
+        <LATEST_VULN>none</LATEST_VULN>
+        <MAP>none</MAP>
+        <SCAN>none</SCAN>
+        <DAILY_TICKETS>0</DAILY_TICKETS>
+      </NOTIFICATIONS>
+    </USER>"""
+
+PASSWORD_CHANGE_USER = """
+                <USER>
+                    <USER_LOGIN>{0}</USER_LOGIN>
+                    <PASSWORD><![CDATA[{1}]]></PASSWORD>
+                </USER>"""
+
+USER_OUTPUT = """<?xml version="1.0" encoding="UTF-8" ?>
+<USER_OUTPUT>
+  <RETURN status="SUCCESS">
+    <MESSAGE>{0} user has been successfully created.</MESSAGE>
+  </RETURN>
+  <USER>
+    <USER_LOGIN>{0}</USER_LOGIN>
+    <PASSWORD>{1}</PASSWORD>
+  </USER>
+</USER_OUTPUT>
+"""
+
+
+def list_users_response(count: int) -> str:
+    users = ''.join(LIST_USERS_USER.format(i) for i in range(count))
+    data = '<?xml version="1.0" encoding="UTF-8" ?>\n'
+    data += '<USER_LIST_OUTPUT>\n  <USER_LIST>'
+    data += users
+    data += '\n  </USER_LIST>\n</USER_LIST_OUTPUT>\n'
+    return data
+
+
+def add_user_response() -> str:
+    with open('tests/data/xml_response.xml', 'r') as file:
+        return file.read()
+
+
+def user_output(login: str, password: str) -> str:
+    return USER_OUTPUT.format(login, password)
+
+
+def roster_csv(csv_file: str, count: int) -> None:
+    with open(csv_file, 'w') as file:
+        file.write('email,first_name,last_name,title,user_role,'
+                   'business_unit,address1,city,state,country,phone\n')
+        for i in range(count):
+            file.write(f'user{i}@test.com,First,Last,Trainee,reader,'
+                       'Unassigned,Address,City,California,'
+                       'United States of America,0000000000\n')
+
+
+def password_change_response(count: int) -> str:
+    logins = [f'quays{i}' for i in range(count)]
+    return password_change_output(logins)
+
+
+def password_change_output(logins: list) -> str:
+    count = len(logins)
+    users = ''.join(
+        PASSWORD_CHANGE_USER.format(login, f'{login}-password!')
+        for login in logins)
+    data = '<?xml version="1.0" encoding="UTF-8" ?>\n'
+    data += '<PASSWORD_CHANGE_OUTPUT>\n'
+    data += '    <RETURN status="SUCCESS">\n'
+    data += '        <MESSAGE>The operation was successfully completed'
+    data += '</MESSAGE>\n'
+    data += f'        <CHANGES count="{count}">\n            <USER_LIST>'
+    data += users
+    data += '\n            </USER_LIST>\n        </CHANGES>\n'
+    data += '    </RETURN>\n</PASSWORD_CHANGE_OUTPUT>\n'
+    return data
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+
+from benchmarks import fixtures
+from src.classes.csv_parser import CsvParser
+from src.classes.file_checker import FileChecker
+from src.classes.qualys_api import QualysApi
+from src.classes.xml_parser import XML_PARSERS
+
+CREDENTIALS_FILE = 'tests/data/credentials.yaml'
+ROWS = [1000, 100000, 1000000]
+# FileChecker.is_text removes every split line from the front of a list,
+# which is quadratic, so it is only timed on the smaller rosters
+TEXT_MAX_ROWS = 100000
+USER = {
+    'user_role': 'reader',
+    'business_unit': 'Unassigned',
+    'first_name': 'First',
+    'last_name': 'Last',
+    'title': 'Title',
+    'phone': '0000000000',
+    'email': 'user@test.com',
+    'address1': 'Address',
+    'city': 'City',
+    'country': 'United States of America',
+    'state': 'California',
+    'zip_code': '00000',
+    'send_email': 1
+}
+
+
+def bench(func, repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number
+
+
+def cases(workdir: str, rows: list, users: int) -> list:
+    # Every case is (name, callable, items handled per call)
+    result = []
+    for count in rows:
+        csv_file = os.path.join(workdir, f'roster-{count}.csv')
+        fixtures.roster_csv(csv_file, count)
+        result.append((
+            f'CsvParser.read_csv ({count} rows)',
+            CsvParser(csv_file).read_csv, count))
+        if count <= TEXT_MAX_ROWS:
+            result.append((
+                f'FileChecker.is_text ({count} rows)',
+                FileChecker(csv_file).is_text, count))
+
+    header = 'email;first_name;last_name;title;phone;country;state'
+    parser = CsvParser('')
+    result.append((
+        'CsvParser._get_delimiter',
+        lambda: parser._get_delimiter(header), 1))
+
+    qa = QualysApi(CREDENTIALS_FILE)
+    result.append((
+        'QualysApi._validate_payload_values',
+        lambda: qa._validate_payload_values(USER), 1))
+    result.append((
+        'QualysApi._is_valid_country_and_state',
+        lambda: qa._is_valid_country_and_state(
+            USER['country'], USER['state']), 1))
+
+    # list_users streams the body through iterparse, the tree parsers are
+    # what every other response is decoded with
+    data = fixtures.list_users_response(users)
+    body = data.encode()
+    for backend in XML_PARSERS.values():
+        xml_parser = backend()
+        result.append((
+            f'list_users {backend.NAME} ({users} users)',
+            lambda p=xml_parser: p.parse(200, data, 'USER_LIST_OUTPUT'),
+            users))
+    result.append((
+        f'list_users iterparse ({users} users)',
+        lambda: list(qa._parse_user_list(io.BytesIO(body))), users))
+    return result
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    slower = []
+    for name, seconds in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f'  {name}: no baseline')
+            continue
+
+        change = seconds / before - 1
+        flag = ' SLOWER' if change > threshold else ''
+        print(f'  {name}: {change:+.1%}{flag}')
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Time the CSV, validation and XML hot paths of this tool')
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=ROWS,
+        help='The roster sizes read by the CSV cases')
+    parser.add_argument(
+        '-u', '--users', type=int, default=10000,
+        help='The number of users in the list_users response')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=5,
+        help='The number of timing runs, the best one is reported')
+    parser.add_argument(
+        '--save', metavar='BASELINE',
+        help='Write the results to this JSON file')
+    parser.add_argument(
+        '--compare', metavar='BASELINE',
+        help='Compare the results with this JSON file')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='The slowdown flagged by --compare, 0.2 is 20%% slower')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, func, items in cases(workdir, args.rows, args.users):
+            seconds = bench(func, args.repeat)
+            results[name] = seconds
+            print(
+                f'{name:<48} {seconds * 1000:12.4f} ms/call',
+                f'{items / seconds:16,.0f} items/s')
+
+    if args.save:
+        baseline = {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results
+        }
+        with open(args.save, 'w') as file:
+            json.dump(baseline, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        print(f'Compared with {args.compare}, threshold {args.threshold:.0%}')
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
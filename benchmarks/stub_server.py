@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+import argparse
+import math
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks import fixtures
+from src.constants import constants
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the pooled session in QualysApi is measured as it is
+    # used against Qualys
+    protocol_version = 'HTTP/1.1'
+    # The headers and the body are written separately, Nagle would hold
+    # the body back for a delayed ACK and add 40 ms to every call
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def _handle(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        form = parse_qs(self.rfile.read(length).decode())
+        path = urlsplit(self.path).path
+        status, headers = self.server.admit()
+        if status is not None:
+            self._send(status, '', headers)
+            return
+
+        try:
+            time.sleep(self.server.delay())
+            if self.server.fail():
+                status, text = 503, 'Service Unavailable'
+            else:
+                status, text = self.server.route(path, form)
+        finally:
+            self.server.finish()
+        self._send(status, text, headers)
+
+    def _send(self, status: int, text: str, headers: dict) -> None:
+        body = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubQualys(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+    REMAINING = constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER
+    TO_WAIT = constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER
+    CONCURRENCY = constants.QUALYS_API_CONCURRENCY_LIMIT_HEADER
+
+    def __init__(
+            self,
+            address: tuple = ('127.0.0.1', 0),
+            latency: float = 0.0,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            rate_limit: int = 0,
+            window: int = 1,
+            concurrency: int = 0,
+            users: int = 0,
+            seed: int | None = None) -> None:
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.window = window
+        self.concurrency = concurrency
+        self.random = random.Random(seed)
+        self.list_users_body = fixtures.list_users_response(users)
+        self.created = 0
+        self.running = 0
+        self.window_start = time.monotonic()
+        self.window_calls = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def __enter__(self) -> 'StubQualys':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def host(self) -> str:
+        host, port = self.server_address[:2]
+        return f'{host}:{port}'
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def admit(self) -> tuple:
+        # Mirrors the Qualys limits: a call over the quota or over the
+        # concurrency limit is turned away with a 409 before any work
+        with self._lock:
+            headers = {}
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self.window_start >= self.window:
+                    self.window_start = now
+                    self.window_calls = 0
+
+                remaining = self.rate_limit - self.window_calls
+                if remaining <= 0:
+                    wait = self.window - (now - self.window_start)
+                    headers[self.REMAINING] = '0'
+                    headers[self.TO_WAIT] = str(max(math.ceil(wait), 1))
+                    return 409, headers
+
+                self.window_calls += 1
+                headers[self.REMAINING] = str(remaining - 1)
+                headers[self.TO_WAIT] = '0'
+
+            if self.concurrency:
+                headers[self.CONCURRENCY] = str(self.concurrency)
+                if self.running >= self.concurrency:
+                    return 409, headers
+
+            self.running += 1
+            return None, headers
+
+    def finish(self) -> None:
+        with self._lock:
+            self.running -= 1
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + self.random.uniform(0, self.jitter)
+
+    def fail(self) -> bool:
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+    def route(self, path: str, form: dict) -> tuple:
+        if path == '/api/2.0/fo/report/':
+            return 200, '<REPORT_LIST_OUTPUT />'
+
+        if path == '/msp/user_list.php':
+            return 200, self.list_users_body
+
+        if path == '/msp/user.php':
+            with self._lock:
+                self.created += 1
+                login = f'quays{self.created:06d}'
+            return 200, fixtures.user_output(login, secrets.token_urlsafe(8))
+
+        if path == '/msp/password_change.php':
+            logins = form.get('user_logins', [''])[0].split(',')
+            return 200, fixtures.password_change_output(logins)
+        return 404, 'Not Found'
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Serve a local stand-in for the Qualys API')
+    parser.add_argument('-p', '--port', type=int, default=8080)
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='Milliseconds added to every response')
+    parser.add_argument(
+        '--jitter', type=float, default=0.0,
+        help='Up to this many random milliseconds added on top')
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0,
+        help='The share of calls answered with a 503')
+    parser.add_argument(
+        '--rate-limit', type=int, default=0,
+        help='Calls allowed per window, 0 for no limit')
+    parser.add_argument(
+        '--window', type=int, default=1,
+        help='The rate limit window in seconds')
+    parser.add_argument(
+        '--concurrency', type=int, default=0,
+        help='Calls allowed at once, 0 for no limit')
+    parser.add_argument(
+        '--users', type=int, default=0,
+        help='The number of users returned by user_list.php')
+    args = parser.parse_args()
+
+    server = StubQualys(
+        ('127.0.0.1', args.port),
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        window=args.window,
+        concurrency=args.concurrency,
+        users=args.users)
+    print(f'Serving the Qualys API stub on http://{server.host}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
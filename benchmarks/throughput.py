@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import fixtures
+from benchmarks.client import CASES
+from benchmarks.stub_server import StubQualys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list, percent: int) -> float | None:
+    if len(values) < 2:
+        return values[0] if values else None
+    return statistics.quantiles(values, n=100)[percent - 1]
+
+
+def run_case(case: str, args: argparse.Namespace, workdir: str) -> dict:
+    result_file = os.path.join(workdir, f'{case}.json')
+    command = [
+        sys.executable, '-m', 'benchmarks.client', case,
+        '--credentials', os.path.join(workdir, 'credentials.yaml'),
+        '--roster', os.path.join(workdir, 'roster.csv'),
+        '--result', result_file,
+        '--users', str(args.users),
+        '--workers', str(args.workers)]
+
+    # main.py keeps its journal under ./logs, so every case runs from the
+    # scratch directory instead of the repository
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    subprocess.run(
+        command, cwd=workdir, env=env, check=True,
+        stdout=subprocess.DEVNULL)
+    with open(result_file, 'r') as file:
+        return json.load(file)
+
+
+def milliseconds(seconds: float | None) -> str:
+    if seconds is None:
+        return '-'
+    return f'{seconds * 1000:.1f}'
+
+
+def report(result: dict) -> None:
+    # Per request latency is the time to the response headers, as reported
+    # by the QualysApi send hooks
+    latencies = result['latencies']
+    p50 = milliseconds(percentile(latencies, 50))
+    p99 = milliseconds(percentile(latencies, 99))
+    failed = '-' if result['failed'] is None else result['failed']
+    print(
+        f'{result["case"]:<14}',
+        f'{result["users"] / result["seconds"]:10,.1f} users/s',
+        f'{p50:>9} ms p50',
+        f'{p99:>9} ms p99',
+        f'{result["rss_kb"] / 1024:8.1f} MiB RSS',
+        f'{failed:>6} failed')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Measure provisioning throughput against a local '
+                    'stand-in for the Qualys API')
+    parser.add_argument(
+        '-u', '--users', type=int, default=1000,
+        help='The number of users to create or reset in each case')
+    parser.add_argument(
+        '-w', '--workers', type=int, default=8,
+        help='The number of users provisioned at once')
+    parser.add_argument(
+        '--latency', type=float, default=50.0,
+        help='Milliseconds the stub adds to every response')
+    parser.add_argument(
+        '--jitter', type=float, default=0.0,
+        help='Up to this many random milliseconds added on top')
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0,
+        help='The share of calls the stub answers with a 503')
+    parser.add_argument(
+        '--rate-limit', type=int, default=0,
+        help='Calls the stub allows per window, 0 for no limit')
+    parser.add_argument(
+        '--window', type=int, default=1,
+        help='The rate limit window in seconds')
+    parser.add_argument(
+        '--concurrency', type=int, default=0,
+        help='Calls the stub allows at once, 0 for no limit')
+    parser.add_argument(
+        '--existing', type=int, default=0,
+        help='The number of users already in the stub subscription')
+    parser.add_argument(
+        '--seed', type=int, default=None,
+        help='Seed for the stub latency jitter and errors')
+    parser.add_argument(
+        '-c', '--cases', nargs='+', choices=CASES, default=list(CASES),
+        help='The cases to run')
+    args = parser.parse_args()
+
+    stub = StubQualys(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        window=args.window,
+        concurrency=args.concurrency,
+        users=args.existing,
+        seed=args.seed)
+
+    with stub, tempfile.TemporaryDirectory() as workdir:
+        os.mkdir(os.path.join(workdir, 'logs'))
+        with open(os.path.join(workdir, 'credentials.yaml'), 'w') as file:
+            file.write('credentials:\n')
+            file.write('  username: benchmark\n')
+            file.write('  password: benchmark\n')
+            file.write(f'  host: {stub.host}\n')
+        fixtures.roster_csv(os.path.join(workdir, 'roster.csv'), args.users)
+
+        print(f'{args.users} users, {args.workers} workers,',
+              f'{args.latency:g} ms latency, {args.error_rate:g} error rate')
+        for case in args.cases:
+            report(run_case(case, args, workdir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import argparse
+import timeit
+
+from benchmarks import fixtures
+from src.classes.xml_parser import XML_PARSERS
+
+
+def bench(parser, data: str, root: str, repeat: int) -> float:
+    timer = timeit.Timer(lambda: parser.parse(200, data, root))
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compare the XML parser backends used by QualysApi')
+    parser.add_argument(
+        '-u', '--users', type=int, default=10000,
+        help='The number of users in the list_users response')
+    parser.add_argument(
+        '-b', '--batch', type=int, default=100,
+        help='The number of users in the password_change response')
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=5,
+        help='The number of timing runs, the best one is reported')
+    args = parser.parse_args()
+
+    cases = [
+        (f'list_users ({args.users} users)', 'USER_LIST_OUTPUT',
+         fixtures.list_users_response(args.users), args.users),
+        ('add_user', 'USER_OUTPUT', fixtures.add_user_response(), 1),
+        (f'password_change ({args.batch} users)', 'PASSWORD_CHANGE_OUTPUT',
+         fixtures.password_change_response(args.batch), args.batch)
+    ]
+    for name, root, data, users in cases:
+        print(name)
+        for backend in XML_PARSERS.values():
+            seconds = bench(backend(), data, root, args.repeat)
+            print(
+                f'  {backend.NAME:<10} {seconds * 1000:10.3f} ms/response',
+                f'{users / seconds:14,.0f} users/s')
+
+
+if __name__ == '__main__':
+    main()
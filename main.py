@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 import os
 import sys
+from collections import Counter
+from typing import Iterator, Mapping
 
 from src.classes.csv_parser import CsvParser
+from src.classes.deadline import Deadline
+from src.classes.journal import Journal
 from src.classes.mailmerge import MailMerge
+from src.classes.metrics_exporter import MetricsExporter
 from src.classes.parseargs import ParseArgs
 from src.classes.qualys_api import QualysApi
+from src.classes.run_journal import RunJournal
+from src.classes.run_log import RunLog
+from src.constants import constants
 
 
 def send_email() -> int:
@@ -18,6 +26,161 @@ def send_email() -> int:
     return 0
 
 
+def mailmerge_user(email: str, result: str | tuple, host: str) -> dict:
+    if isinstance(result, tuple):
+        return {
+            'email': email,
+            'username': result[0],
+            'password': result[1],
+            'url': f'https://{host}'}
+    return {
+        'email': email,
+        'username': result,
+        'url': f'https://{host}'}
+
+
+def processes(csvparser: CsvParser) -> int:
+    # A roster with a quoted field spanning lines cannot be cut into
+    # chunks, it is read in one pass whatever its size
+    size = os.path.getsize(csvparser.csv_file)
+    if size < constants.QUALYS_API_PREFLIGHT_PROCESS_BYTES:
+        return 1
+    if not csvparser.is_splittable():
+        return 1
+    return os.cpu_count() or 1
+
+
+def roster(csvparser: CsvParser, send: int) -> Iterator[Mapping]:
+    # Large rosters are memory mapped and parsed in parallel chunks
+    workers = processes(csvparser)
+    if workers > 1:
+        rows = csvparser.iter_csv_mmap(workers)
+    else:
+        rows = csvparser.iter_csv()
+
+    for row in rows:
+        if send == 1:
+            row = row.replace(send_email=1)
+        yield row
+
+
+def qualys_api(
+        parser: ParseArgs,
+        pool_size: int = QualysApi.POOL_SIZE,
+        run_log: RunLog | None = None) -> QualysApi:
+    return QualysApi(
+        parser.credentials,  # type: ignore
+        pool_size=pool_size,
+        timeout=(parser.connect_timeout, parser.read_timeout),
+        deadline=Deadline(parser.deadline),
+        run_log=run_log)
+
+
+def open_run_log(parser: ParseArgs) -> RunLog:
+    run_log = RunLog(constants.RUN_LOG_FILE, action=parser.action)
+    run_log.event(
+        'run_start',
+        workers=parser.workers,
+        resume=parser.resume,
+        deadline=parser.deadline)
+    return run_log
+
+
+def report_results(
+        qa: QualysApi,
+        run_log: RunLog,
+        succeeded: str,
+        failed: str) -> None:
+    # Logins and passwords stay out of the terminal, every user is in the
+    # run log and the MailMerge database instead
+    if len(qa.user) > 0:
+        print(f'{len(qa.user)} {succeeded}')
+
+    if len(qa.failed_user) > 0:
+        print(f'{len(qa.failed_user)} {failed}')
+        reasons = Counter(
+            QualysApi.failure_reason(error) for error in qa.failed_user)
+        for reason, count in reasons.most_common():
+            print(f'  {count} x {reason}')
+
+    run_log.event(
+        'run_end',
+        succeeded=len(qa.user),
+        failed=len(qa.failed_user),
+        deadline_expired=qa.deadline.expired())
+    print(f'Every user is listed in {run_log.log_file}')
+
+
+def report_latency(qa: QualysApi) -> None:
+    # Time spent in local validation, on the wire and in XML parsing, by
+    # endpoint
+    timings = qa.stats.summary()
+    if len(timings) > 0:
+        print('Request timings:')
+        for line in timings:
+            print(line)
+
+    if len(qa.slow_requests) > 0:
+        print(f'{len(qa.slow_requests)} requests took longer than',
+              f'{qa.LATENCY_BUDGET} seconds!')
+        for method, url, status, elapsed in qa.slow_requests:
+            print(f'{method} {url} - {status} in {elapsed:.2f}s')
+
+    if qa.deadline.expired():
+        print('The run deadline was reached before every user was handled,',
+              'run the same command again with --resume to finish')
+
+
+def report_skipped(journal: RunJournal) -> None:
+    if journal.skipped:
+        print(f'Skipped {journal.skipped} users created by the previous run')
+
+    if journal.existing:
+        print(f'{journal.existing} users already exist in your subscription!')
+
+
+def journal_file(action: str, source: str = '') -> str:
+    name = f'{os.path.basename(source)}.{action}' if source else action
+    return os.path.join(constants.JOURNAL_DIRECTORY, f'{name}.journal')
+
+
+def metrics_exporter(
+        parser: ParseArgs,
+        qa: QualysApi,
+        action: str) -> MetricsExporter | None:
+    if not parser.metrics:
+        return None
+
+    # One file per action, a new run replaces the last one so the
+    # collector never sees the same series twice
+    name = f'{MetricsExporter.PREFIX}_{action}.prom'
+    metrics_file = os.path.join(constants.METRICS_EXPORTER_DIRECTORY, name)
+    exporter = MetricsExporter(metrics_file, qa, action)
+    exporter.start()
+    return exporter
+
+
+def preflight(csvparser: CsvParser, send: int) -> bool:
+    print('Validating users...')
+    workers = processes(csvparser)
+    if workers > 1:
+        overrides = {'send_email': 1} if send == 1 else None
+        errors = QualysApi.validate_csv(csvparser, workers, overrides)
+    else:
+        errors = QualysApi.validate_users(roster(csvparser, send))
+
+    if len(errors) == 0:
+        print('All users are valid!')
+        return True
+
+    # Row numbers match the file, the header is on line 1
+    print(f'{len(errors)} users are invalid!')
+    for i, row, msg in errors:
+        email = row.get('email') or ''
+        print(f'Line {i + 2}: {email} - {msg}')
+    return False
+
+
 def main():
     args = sys.argv[1:]
     parser = ParseArgs(args)
@@ -31,8 +194,8 @@ def main():
             print('Invalid credentials file!')
             exit(1)
 
-        qa = QualysApi(parser.credentials)  # type: ignore
-        result = qa.test()
+        with qualys_api(parser) as qa:
+            result = qa.test()
         if not result:
             print('Invalid username/password or other error!')
             exit(1)
@@ -43,17 +206,21 @@ def main():
     elif parser.action == 'create':
         print('Starting new user creation process...')
         csvparser = CsvParser(parser.users)  # type: ignore
-        rows = csvparser.read_csv()
-        send = send_email()
-        qa = QualysApi(parser.credentials)  # type: ignore
-
-        if len(rows) == 0:
+        if next(csvparser.iter_csv(), None) is None:
             print('No Users to add!')
             exit(0)
 
+        if parser.validate_only:
+            if not preflight(csvparser, 0):
+                exit(1)
+            exit(0)
+
+        send = send_email()
+
+        merge = None
         if send == 0:
             try:
-                MailMerge(
+                merge = MailMerge(
                     mailmerge_config,
                     mailmerge_template,
                     mailmerge_database)
@@ -68,44 +235,59 @@ def main():
                     f'{os.path.realpath("./src/constants/constants.py")}')
                 exit(1)
 
-        i = 0
-        users = []
-        for row in rows:
-            email = row['email']
-            print(f'Creating user {email}...')
-            if send == 1:
-                row['send_email'] = 1
-
-            result = qa.add_user(**row)
-            if result:
-                if send == 1:
-                    user = {
-                        'email': email,
-                        'username': qa.user[i],
-                        'url': f'https://{qa.headers["Host"]}'}
-                else:
-                    user = {
-                        'email': email,
-                        'username': qa.user[i][0],
-                        'password': qa.user[i][1],
-                        'url': f'https://{qa.headers["Host"]}'}
-                users.append(user)
-                i += 1
-
-        if len(qa.user) > 0:
-            print(f'{len(qa.user)} users created successfully!')
-            print(qa.user)
-
-        if len(qa.failed_user) > 0:
-            print(f'{len(qa.failed_user)} users were not created!')
-            print(qa.failed_user)
+        if not preflight(csvparser, send):
+            print('No users were created, fix the file and try again.')
+            exit(1)
 
-        if send == 0:
-            merge = MailMerge(
-                mailmerge_config,
-                mailmerge_template,
-                mailmerge_database)
-            merge.build_database(users)
+        run_log = open_run_log(parser)
+        qa = qualys_api(
+            parser, max(parser.workers, QualysApi.POOL_SIZE), run_log)
+        print('Getting a list of all Users in your Qualys subscription...')
+        if not qa.list_users():
+            print('Unable to list the existing users, no users were created!')
+            qa.close()
+            run_log.close()
+            exit(1)
+
+        journal = RunJournal(Journal(
+            journal_file('create', csvparser.csv_file), parser.resume),
+            run_log)
+        database = merge.open_database(parser.resume) if merge else None
+        exporter = metrics_exporter(parser, qa, 'create')
+        rows = journal.rows(roster(csvparser, send), qa.directory)
+        print('Creating users...')
+        try:
+            results = qa.add_users(rows, parser.workers)
+            for i, (row, result) in enumerate(results, 1):
+                if i % constants.RUN_LOG_PROGRESS_INTERVAL == 0:
+                    print(f'{i} users handled...')
+
+                email = row.get('email', '')
+                if result and database:
+                    database.write(
+                        mailmerge_user(email, result, qa.headers['Host']))
+                journal.record_row(result)
+
+            # Counted as the rows are read, so the totals are right even
+            # when the deadline stopped the run before the last row
+            report_skipped(journal)
+            report_results(
+                qa, run_log, 'users created successfully!',
+                'users were not created!')
+            report_latency(qa)
+        finally:
+            # Events still queued for the run log are written even when
+            # the run crashes, they are the rows needed to debug it
+            journal.close()
+            if database:
+                database.close()
+            if exporter:
+                exporter.stop()
+            qa.close()
+            run_log.close()
+
+        if merge and database:
+            merge.close_database(database)
 
         else:
             print(
@@ -124,9 +306,10 @@ def main():
         print('Starting reset password process...')
         send = send_email()
 
+        merge = None
         if send == 0:
             try:
-                MailMerge(
+                merge = MailMerge(
                     mailmerge_config,
                     mailmerge_template,
                     mailmerge_database)
@@ -141,49 +324,54 @@ def main():
                     f'{os.path.realpath("./src/constants/constants.py")}')
                 exit(1)
 
-        qa = QualysApi(parser.credentials)  # type: ignore
+        run_log = open_run_log(parser)
+        qa = qualys_api(parser, run_log=run_log)
         print('Getting a list of all Users in your Qualys subscription...')
-        qa.list_users()
-        usernames = parser.users
-        i = 0
-        users = []
-        email = 'bademail@nodomain.com'
-        for username in usernames:  # type: ignore
-            print(f'Resetting password for {username}...')
-            for user_details in qa.users:
-                if username == user_details[0]:
+        if not qa.list_users():
+            print('Unable to list the existing users, no passwords were',
+                  'reset!')
+            qa.close()
+            run_log.close()
+            exit(1)
+
+        journal = RunJournal(
+            Journal(journal_file('reset'), parser.resume), run_log)
+        usernames = journal.logins(parser.users)
+        if journal.skipped:
+            print(f'Skipped {journal.skipped} users reset by the previous',
+                  'run')
+
+        print(f'Resetting passwords for {len(usernames)} users...')
+        database = merge.open_database(parser.resume) if merge else None
+        exporter = metrics_exporter(parser, qa, 'reset')
+        try:
+            results = qa.reset_passwords(usernames, send)  # type: ignore
+            for username, result in results.items():
+                email = 'bademail@nodomain.com'
+                user_details = qa.directory.get_by_login(username)
+                if user_details:
                     email = user_details[2]
 
-            result = qa.reset_password(username, send)
-            if result:
-                if send == 1:
-                    user = {
-                        'email': email,
-                        'username': qa.user[i],
-                        'url': f'https://{qa.headers["Host"]}'}
-                else:
-                    user = {
-                        'email': email,
-                        'username': qa.user[i][0],
-                        'password': qa.user[i][1],
-                        'url': f'https://{qa.headers["Host"]}'}
-                users.append(user)
-                i += 1
-
-        if len(qa.user) > 0:
-            print(f'{len(qa.user)} user\'s password reset successfully!')
-            print(qa.user)
-
-        if len(qa.failed_user) > 0:
-            print(f'{len(qa.failed_user)} user\'s password were not reset!')
-            print(qa.failed_user)
+                if result and database:
+                    database.write(
+                        mailmerge_user(email, result, qa.headers['Host']))
+                journal.record_login(username, result)
 
-        if send == 0:
-            merge = MailMerge(
-                mailmerge_config,
-                mailmerge_template,
-                mailmerge_database)
-            merge.build_database(users)
+            report_results(
+                qa, run_log, 'user\'s password reset successfully!',
+                'user\'s password were not reset!')
+            report_latency(qa)
+        finally:
+            journal.close()
+            if database:
+                database.close()
+            if exporter:
+                exporter.stop()
+            qa.close()
+            run_log.close()
+
+        if merge and database:
+            merge.close_database(database)
 
         else:
             print(
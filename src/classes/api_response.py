@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+
+class ApiResponse:
+    def __init__(
+            self,
+            status_code: int,
+            status: str = '',
+            number: int = 0,
+            message: str = '',
+            data: dict | None = None,
+            users: list | None = None,
+            text: str = '') -> None:
+        self.status_code = status_code
+        self.status = status
+        self.number = number
+        self.message = message
+        self.data = data if data is not None else {}
+        self.users = users if users is not None else []
+        self.text = text
+
+    def __repr__(self) -> str:
+        return (
+            f'ApiResponse(status_code={self.status_code}, '
+            f'status={self.status!r}, number={self.number}, '
+            f'message={self.message!r})')
+
+    @property
+    def ok(self) -> bool:
+        if self.status_code != 200:
+            return False
+
+        if self.status == 'FAILED':
+            return False
+        return True
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+import asyncio
+import time
+from base64 import b64encode
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Mapping
+from urllib.parse import urlencode, urlsplit
+from xml.etree import ElementTree
+
+import aiohttp
+
+from src.classes.deadline import Deadline, DeadlineExceeded
+from src.classes.qualys_api import QualysApi
+from src.classes.request_event import RequestEvent
+from src.classes.retry_policy import RetryPolicy
+from src.classes.run_log import RunLog
+from src.constants import constants
+
+
+class AsyncQualysApi(QualysApi):
+    CONCURRENCY = constants.QUALYS_API_ASYNC_CONCURRENCY
+    CHUNK_SIZE = constants.QUALYS_API_ASYNC_CHUNK_SIZE
+    REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError,
+                      DeadlineExceeded)
+
+    def __init__(
+            self,
+            credentials_file: str,
+            concurrency: int = CONCURRENCY,
+            xml_parser: str = QualysApi.XML_PARSER,
+            retry: RetryPolicy | None = None,
+            timeout: tuple = QualysApi.TIMEOUT,
+            deadline: Deadline | None = None,
+            run_log: RunLog | None = None) -> None:
+        if concurrency < 1:
+            raise ValueError('Concurrency must be at least 1')
+
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.condition = asyncio.Condition()
+        super().__init__(
+            credentials_file,
+            xml_parser=xml_parser,
+            retry=retry,
+            timeout=timeout,
+            deadline=deadline,
+            run_log=run_log)
+
+    def __enter__(self) -> 'AsyncQualysApi':
+        # close() is a coroutine here, only async with can await it
+        raise TypeError('Use "async with" with AsyncQualysApi')
+
+    def __exit__(self, *args) -> None:
+        raise TypeError('Use "async with" with AsyncQualysApi')
+
+    async def __aenter__(self) -> 'AsyncQualysApi':
+        self._client()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def _create_session(self, pool_size: int) -> None:
+        # An aiohttp session has to be created inside the running event
+        # loop, so it is only opened on first use
+        return None
+
+    def _client(self) -> aiohttp.ClientSession:
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            username = self.credentials['username']
+            password = self.credentials['password']
+            token = b64encode(f'{username}:{password}'.encode()).decode()
+            headers = {**self.headers, 'Authorization': f'Basic {token}'}
+            self.session = aiohttp.ClientSession(
+                headers=headers, connector=connector)
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _client_timeout(self) -> aiohttp.ClientTimeout:
+        connect, read = self.timeout
+        return aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+
+    def _should_retry_error(self, error: Exception, idempotent: bool) -> bool:
+        # A failed connect means the request never left this machine
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return True
+
+        if isinstance(error, DeadlineExceeded):
+            return False
+        return idempotent
+
+    @asynccontextmanager
+    async def _open(
+            self,
+            method: str,
+            url: str,
+            idempotent: bool = True,
+            **kwargs) -> AsyncIterator[aiohttp.ClientResponse]:
+        session = self._client()
+        endpoint = urlsplit(url).path
+        size = len(kwargs.get('data') or '')
+        attempts = []
+        attempt = 0
+        while True:
+            if self.deadline.expired():
+                raise DeadlineExceeded('Run deadline exceeded')
+
+            attempt += 1
+            await self.semaphore.acquire()
+            wait = time.monotonic()
+            try:
+                await self._acquire()
+            except BaseException:
+                # A cancelled wait must not keep the slot
+                self.semaphore.release()
+                raise
+
+            start = time.monotonic()
+            self._emit(RequestEvent.WAIT, endpoint, wait, end=start)
+            r = None
+            try:
+                r = await session.request(
+                    method, url, timeout=self._client_timeout(), **kwargs)
+                await self._update(r.headers)
+            except self.REQUEST_ERRORS as e:
+                await self._release()
+                self._add_attempt(attempts, method, url, type(e).__name__,
+                                  time.monotonic() - start)
+                self._emit(RequestEvent.SEND, endpoint, start,
+                           type(e).__name__, size)
+                retry = self._should_retry_error(e, idempotent)
+                if not retry or attempt >= self.retry.attempts:
+                    raise
+                await self._backoff(attempt, endpoint, type(e).__name__)
+                continue
+            except BaseException:
+                # Cancellation is routine when embedded in async code, the
+                # slots are freed or the client would stall for good
+                if r is not None:
+                    r.release()
+                await self._release()
+                raise
+
+            self._add_attempt(attempts, method, url, r.status,
+                              time.monotonic() - start)
+            # aiohttp hands the response back once the headers are in
+            self._emit(RequestEvent.SEND, endpoint, start, r.status, size)
+            retry = self.retry.should_retry_status(r.status, idempotent)
+            if retry and attempt < self.retry.attempts:
+                r.release()
+                await self._release()
+                await self._backoff(attempt, endpoint, r.status)
+                continue
+
+            # The slot is held until the body has been read
+            try:
+                r.attempts = attempts
+                yield r
+            finally:
+                r.release()
+                await self._release()
+            return
+
+    async def _acquire(self) -> None:
+        # Every coroutine waits out the Qualys quota window and concurrency
+        # limit on the event loop instead of blocking it in the limiter,
+        # and checks again whenever a response changes them
+        async with self.condition:
+            while True:
+                wait = self.limiter.try_acquire()
+                if wait == 0:
+                    return
+                try:
+                    await asyncio.wait_for(self.condition.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _notify(self) -> None:
+        async with self.condition:
+            self.condition.notify_all()
+
+    async def _update(self, headers: Mapping) -> None:
+        self.limiter.update(headers)
+        await asyncio.shield(self._notify())
+
+    async def _release(self) -> None:
+        # The slots are freed at once and the waiters are woken even when
+        # this task is being cancelled
+        self.limiter.release()
+        self.semaphore.release()
+        await asyncio.shield(self._notify())
+
+    async def _backoff(
+            self,
+            attempt: int,
+            endpoint: str,
+            status: int | str) -> None:
+        start = time.monotonic()
+        if self.limiter.delay() == 0:
+            delay = self.retry.backoff(attempt)
+            remaining = self.deadline.remaining()
+            if remaining is not None:
+                delay = min(delay, remaining)
+            await asyncio.sleep(delay)
+        self._emit(RequestEvent.RETRY, endpoint, start, status)
+
+    async def _request(
+            self,
+            method: str,
+            url: str,
+            idempotent: bool = True,
+            **kwargs) -> tuple:
+        async with self._open(method, url, idempotent, **kwargs) as r:
+            start = time.monotonic()
+            body = await r.read()
+            self._emit(RequestEvent.RECEIVE, urlsplit(url).path, start,
+                       r.status, len(body))
+            return r.status, body.decode(r.get_encoding())
+
+    async def test(self) -> bool:
+        endpoint = '/api/2.0/fo/report/?action=list'
+        url = self.SCHEME + self.headers['Host'] + endpoint
+        try:
+            status_code, text = await self._request('GET', url)
+        except self.REQUEST_ERRORS as e:
+            print(e)
+            return False
+
+        if status_code != 200:
+            print(status_code, text)
+            return False
+        return True
+
+    async def iter_users(self) -> AsyncIterator[tuple]:
+        endpoint = '/msp/user_list.php'
+        url = self.SCHEME + self.headers['Host'] + endpoint
+        try:
+            async with self._open('GET', url) as r:
+                if r.status != 200:
+                    text = await r.text()
+                    msg = self._error_message(text, f'HTTP {r.status}')
+                    error = ('', r.status, msg)
+                    self._add_failure(error)
+                    print(r.status, text)
+                    raise ValueError('Unable to list users')
+
+                # The body is fed to the parser as it arrives so only one
+                # USER is ever held in memory, receiving and parsing are
+                # timed together
+                parser = ElementTree.XMLPullParser(events=('start', 'end'))
+                path = []
+                start = time.monotonic()
+                size = 0
+                async for chunk in r.content.iter_chunked(self.CHUNK_SIZE):
+                    size += len(chunk)
+                    parser.feed(chunk)
+                    events = parser.read_events()
+                    for user in self._read_user_list(events, path):
+                        yield user
+
+                parser.close()
+                for user in self._read_user_list(parser.read_events(), path):
+                    yield user
+                self._emit(RequestEvent.PARSE, endpoint, start, r.status,
+                           size)
+        except (ElementTree.ParseError, *self.REQUEST_ERRORS) as e:
+            error = ('', 0, type(e).__name__)
+            self._add_failure(error)
+            print(e)
+            raise ValueError('Unable to list users')
+
+    async def list_users(self) -> bool:
+        try:
+            async for user_details in self.iter_users():
+                self.users.append(user_details)
+                self.directory.add(user_details)
+        except ValueError:
+            self._clear_users()
+            return False
+        return True
+
+    async def add_user(self, **kwargs) -> bool:
+        return await self._add_user(kwargs) is not None
+
+    async def add_users(
+            self,
+            rows: Iterable[Mapping]) -> AsyncIterator[tuple]:
+        # Only a bounded window of users is scheduled at once and results
+        # come back in roster order, the same as QualysApi.add_users
+        pending = deque()
+        for row in self._scheduled(rows):
+            task = asyncio.ensure_future(self._add_user(row))
+            pending.append((row, task))
+            if len(pending) >= self.concurrency * 2:
+                row, task = pending.popleft()
+                yield row, await task
+
+        while pending:
+            row, task = pending.popleft()
+            yield row, await task
+
+    async def _add_user(self, kwargs: Mapping) -> str | tuple | None:
+        self._started.set(time.monotonic())
+        payload = self._user_payload(kwargs)
+        if payload is None:
+            return None
+
+        endpoint = '/msp/user.php'
+        url = self.SCHEME + self.headers['Host'] + endpoint
+        try:
+            status_code, text = await self._request(
+                'POST', url, idempotent=False, data=payload.encode())
+        except self.REQUEST_ERRORS as e:
+            error = (payload, 0, type(e).__name__)
+            self._add_failure(error)
+            return None
+
+        response = self._decode_text(
+            status_code, text, 'USER_OUTPUT', endpoint)
+        return self._user_result(payload, response)
+
+    async def reset_password(self, username: str, email: int) -> bool:
+        if not self._is_valid_reset(username, email):
+            return False
+
+        results = {username: None}
+        users = await self._reset_passwords([username], email)
+        self._add_reset_results(results, [username], users)
+        return results[username] is not None
+
+    async def reset_passwords(
+            self,
+            usernames: Iterable[str],
+            email: int,
+            batch_size: int = QualysApi.BATCH_SIZE) -> dict:
+        results, logins = self._reset_logins(usernames, email, batch_size)
+        batches = [
+            logins[i:i + batch_size]
+            for i in range(0, len(logins), batch_size)]
+        users = await asyncio.gather(
+            *(self._reset_passwords(batch, email) for batch in batches))
+        for batch, batch_users in zip(batches, users):
+            self._add_reset_results(results, batch, batch_users)
+        return results
+
+    async def _reset_passwords(
+            self,
+            logins: list,
+            email: int) -> list | None:
+        self._started.set(time.monotonic())
+        payload = self._reset_payload(logins, email)
+        endpoint = '/msp/password_change.php'
+        url = self.SCHEME + self.headers['Host'] + endpoint
+        try:
+            status_code, text = await self._request(
+                'POST', url, data=urlencode(payload))
+        except self.REQUEST_ERRORS as e:
+            self._add_batch_failure(logins, 0, type(e).__name__)
+            return None
+
+        response = self._decode_text(
+            status_code, text, 'PASSWORD_CHANGE_OUTPUT', endpoint)
+        return self._reset_result(logins, response, email)
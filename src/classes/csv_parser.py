@@ -1,8 +1,22 @@
 #!/usr/bin/env python3
 import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
+
+from src.classes.csv_record import CsvHeader, CsvRecord
+from src.classes.ordered_pool import OrderedPool
+from src.constants import constants
 
 
 class CsvParser:
+    SAMPLE_SIZE = constants.CSV_PARSER_SAMPLE_SIZE
+    DELIMITERS = constants.CSV_PARSER_DELIMITERS
+    CHUNK_SIZE = constants.CSV_PARSER_CHUNK_SIZE
+    _dialects = {}
+    _splittable = {}
 
     def __init__(self, csv_file: str) -> None:
         self.csv_file = csv_file
@@ -13,65 +27,168 @@ class CsvParser:
             return ','
 
         values = value.split(';')
-        print(values)
         if len(values) > 1:
             return ';'
 
         values = value.split('|')
-        print(values)
         if len(values) > 1:
             return '|'
 
         return ''
 
-    def _get_row_data(self, header: list, values: list) -> dict:
-        row = {}
+    def _get_row_data(
+            self,
+            header: CsvHeader | list,
+            values: list) -> CsvRecord:
+        if not isinstance(header, CsvHeader):
+            header = CsvHeader(header)
+
+        # Rows share their header, each one only holds a tuple of values.
+        # The fields a short row or a blank line lacks are None, so the row
+        # is reported by the validation instead of looking empty
         total = len(header)
-        i = 0
-        while i < total:
-            try:
-                key = header[i]
-                value = values[i]
-                row[key] = value
-            except KeyError:
-                print('Missing key')
-                return {}
-            except IndexError:
-                print('Missing index')
-                return {}
-            i += 1
-        return row
+        if len(values) < total:
+            values = values + [None] * (total - len(values))
+        return header.record(values[:total])
+
+    def _cache_key(self, file) -> tuple:
+        stat = os.fstat(file.fileno())
+        path = os.path.realpath(self.csv_file)
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def _sniff_dialect(self, file) -> type[csv.Dialect] | None:
+        key = self._cache_key(file)
+        if key in self._dialects:
+            return self._dialects[key]
+
+        # Only a bounded sample is inspected, cut back to the last full line
+        # so a row split by the sample size cannot confuse the sniffer
+        sample = file.read(self.SAMPLE_SIZE)
+        file.seek(0)
+        if len(sample) == self.SAMPLE_SIZE and '\n' in sample:
+            sample = sample[:sample.rindex('\n') + 1]
 
-    def read_csv(self) -> list:
-        rows = []
         try:
-            with open(self.csv_file, 'r') as file:
-                first_line = file.readlines()[0].strip()
-                delimiter = self._get_delimiter(first_line)
-                if delimiter == '':
-                    return []
-
-            with open(self.csv_file, 'r') as file:
-                data = csv.reader(
-                    file, delimiter=delimiter, quotechar='|')
-                csv_data = []
-                for x in data:
-                    csv_data.append(x)
-
-            total = len(csv_data)
-            if total > 0:
-                header = csv_data[0]
-
-                i = 1
-                while i < total:
-                    row = csv_data[i]
-                    row_data = self._get_row_data(header, row)
-                    rows.append(row_data)
-                    i += 1
-
-            return rows
+            dialect = csv.Sniffer().sniff(sample, delimiters=self.DELIMITERS)
+        except csv.Error:
+            delimiter = self._get_delimiter(sample.split('\n')[0].strip())
+            if delimiter == '':
+                dialect = None
+            else:
+                dialect = type('dialect', (csv.excel,), {
+                    'delimiter': delimiter})
+
+        self._dialects[key] = dialect
+        return dialect
+
+    def iter_csv(self) -> Iterator[CsvRecord]:
+        try:
+            file = open(self.csv_file, 'r', newline='')
+        except FileNotFoundError:
+            return
+
+        with file:
+            dialect = self._sniff_dialect(file)
+            if dialect is None:
+                return
+
+            data = csv.reader(file, dialect)
+            header = next(data, None)
+            if header is None:
+                return
+
+            header = CsvHeader(header)
+
+            for row in data:
+                yield self._get_row_data(header, row)
+
+    def iter_chunks(self, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+        if chunk_size < 1:
+            raise ValueError('Chunk size must be at least 1')
+
+        try:
+            file = open(self.csv_file, 'rb')
+        except FileNotFoundError:
+            return
+
+        with file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return
+
+            # The map is only scanned for newlines, no chunk is copied here
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = mm.find(b'\n') + 1
+                if start == 0:
+                    return
+
+                while start < size:
+                    end = mm.find(b'\n', min(start + chunk_size, size) - 1)
+                    end = size if end == -1 else end + 1
+                    yield (start, end)
+                    start = end
+
+    def read_chunk(self, chunk: tuple) -> list[CsvRecord]:
+        start, end = chunk
+        with open(self.csv_file, 'r', newline='') as file:
+            dialect = self._sniff_dialect(file)
+            if dialect is None:
+                return []
+
+            header = next(csv.reader(file, dialect), None)
+            if header is None:
+                return []
+
+            header = CsvHeader(header)
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = mm[start:end].decode(file.encoding)
+
+        data = csv.reader(io.StringIO(text, newline=''), dialect)
+        return [self._get_row_data(header, row) for row in data]
+
+    def is_splittable(self) -> bool:
+        # Chunks are cut at newlines, which is only safe when no quoted
+        # field spans more than one line
+        try:
+            file = open(self.csv_file, 'r', newline='')
         except FileNotFoundError:
-            return []
+            return True
+
+        with file:
+            key = self._cache_key(file)
+            if key in self._splittable:
+                return self._splittable[key]
+
+            dialect = self._sniff_dialect(file)
+            quotechar = getattr(dialect, 'quotechar', None) or '"'
+            quote = quotechar.encode(file.encoding)
+            result = True
+            if os.fstat(file.fileno()).st_size > 0:
+                with mmap.mmap(
+                        file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Such a field leaves an odd number of quotes on the
+                    # line it starts on, escaped quotes come in pairs
+                    if mm.find(quote) != -1:
+                        lines = iter(mm.readline, b'')
+                        result = not any(
+                            line.count(quote) % 2 for line in lines)
+
+        self._splittable[key] = result
+        return result
+
+    def iter_csv_mmap(
+            self,
+            processes: int = 1,
+            chunk_size: int = CHUNK_SIZE) -> Iterator[CsvRecord]:
+        # Chunks are split on newlines, so a quoted field that spans more
+        # than one line must be read with iter_csv instead, see
+        # is_splittable
+        pool = OrderedPool(processes, ProcessPoolExecutor)
+        for _, rows in pool.map(self.read_chunk, self.iter_chunks(chunk_size)):
+            yield from rows
+
+    def read_csv(self) -> list:
+        return list(self.iter_csv())
 
     def write_csv(self, keys: list, values: list) -> bool:
         try:
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+from collections.abc import Mapping
+from typing import Iterable, Iterator
+
+
+class CsvHeader:
+    def __init__(self, fields: Iterable[str]) -> None:
+        self.fields = tuple(fields)
+        self.index = {field: i for i, field in enumerate(self.fields)}
+        self._extended = {}
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def extend(self, fields: tuple) -> 'CsvHeader':
+        # Every row that gains the same new fields shares one header
+        if fields not in self._extended:
+            self._extended[fields] = CsvHeader(self.fields + fields)
+        return self._extended[fields]
+
+    def record(self, values: Iterable) -> 'CsvRecord':
+        return CsvRecord(self, tuple(values))
+
+
+class CsvRecord(Mapping):
+    __slots__ = ('_header', '_values')
+
+    def __init__(self, header: CsvHeader, values: tuple) -> None:
+        self._header = header
+        self._values = values
+
+    def __getitem__(self, key: str):
+        return self._values[self._header.index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._header.index)
+
+    def __len__(self) -> int:
+        return len(self._header.index)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def __reduce__(self) -> tuple:
+        return (CsvRecord, (self._header, self._values))
+
+    def replace(self, **values) -> 'CsvRecord':
+        header = self._header
+        fields = tuple(key for key in values if key not in header.index)
+        if fields:
+            header = header.extend(fields)
+
+        row = list(self._values) + [None] * len(fields)
+        for key, value in values.items():
+            row[header.index[key]] = value
+        return CsvRecord(header, tuple(row))
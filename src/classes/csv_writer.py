@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import csv
+import os
+from typing import Mapping
+
+from src.constants import constants
+
+
+class CsvWriter:
+    BATCH_SIZE = constants.CSV_WRITER_BATCH_SIZE
+
+    def __init__(
+            self,
+            csv_file: str,
+            keys: list,
+            batch_size: int = BATCH_SIZE,
+            append: bool = False) -> None:
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+
+        self.csv_file = csv_file
+        self.keys = keys
+        self.batch_size = batch_size
+        self.pending = 0
+        self.file = open(csv_file, 'a' if append else 'w', newline='')
+        self.writer = csv.writer(self.file, delimiter=',')
+        if self.file.tell() == 0:
+            self.writer.writerow(keys)
+            self.flush()
+
+    def __enter__(self) -> 'CsvWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, values: Mapping) -> None:
+        self.writer.writerow([values.get(key, '') for key in self.keys])
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        # Rows are synced to disk per batch so a crash mid-run only loses
+        # the rows written since the last flush
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+
+        self.flush()
+        self.file.close()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+import time
+
+import requests
+
+
+class DeadlineExceeded(requests.RequestException):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: float | None = None) -> None:
+        if seconds is not None and seconds <= 0:
+            raise ValueError('Deadline must be greater than 0')
+
+        self.seconds = seconds
+        self.expires = None
+        if seconds is not None:
+            self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float | None:
+        if self.expires is None:
+            return None
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() == 0
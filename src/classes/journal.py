@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+import json
+import os
+
+from src.constants import constants
+
+
+class Journal:
+    PENDING = constants.JOURNAL_STATUS_PENDING
+    DONE = constants.JOURNAL_STATUS_DONE
+    FAILED = constants.JOURNAL_STATUS_FAILED
+
+    def __init__(self, journal_file: str, resume: bool = False) -> None:
+        self.journal_file = journal_file
+        self.entries = {}
+        if resume:
+            self._load()
+        self.file = open(journal_file, 'a' if resume else 'w')
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _load(self) -> None:
+        if not os.path.isfile(self.journal_file):
+            return
+
+        with open(self.journal_file, 'r+') as file:
+            offset = 0
+            for line in iter(file.readline, ''):
+                # A crash can leave the last entry half written, it is cut
+                # off so new entries are not appended onto it
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    entry = None
+
+                if entry is None or not line.endswith('\n'):
+                    file.truncate(offset)
+                    break
+                self.entries[entry['key']] = entry
+                offset = file.tell()
+
+    def _write(self, entry: dict) -> None:
+        self.entries[entry['key']] = entry
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def status(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry['status']
+
+    def reason(self, key: str) -> str | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry.get('reason')
+
+    def logins(self) -> list:
+        return [entry['login'] for entry in self.entries.values()
+                if entry['status'] == self.DONE and entry.get('login')]
+
+    def begin(self, key: str) -> None:
+        self._write({'key': key, 'status': self.PENDING})
+
+    def record(
+            self,
+            key: str,
+            success: bool,
+            login: str = '',
+            reason: str = '') -> None:
+        entry = {'key': key, 'status': self.DONE if success else self.FAILED}
+        if login:
+            entry['login'] = login
+        if reason:
+            entry['reason'] = reason
+        self._write(entry)
+
+    def close(self) -> None:
+        if not self.file.closed:
+            self.file.close()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
-from src.classes.csv_parser import CsvParser
+from typing import Iterable
+
+from src.classes.csv_writer import CsvWriter
 from src.classes.file_checker import FileChecker
 from src.constants import constants
 
@@ -155,10 +157,23 @@ class MailMerge:
             f'--template {self.template_file} ',
             f'--database {self.database_file}')
 
-    def build_database(self, values: list) -> bool:
-        parser = CsvParser(self.database_file)
-        result = parser.write_csv(self.KEYS, values)
-        if not result:
+    def open_database(self, append: bool = False) -> CsvWriter:
+        return CsvWriter(self.database_file, self.KEYS, append=append)
+
+    def close_database(self, database: CsvWriter) -> bool:
+        try:
+            database.close()
+        except OSError:
             return False
         self._print_help_message()
         return True
+
+    def build_database(self, values: Iterable) -> bool:
+        try:
+            database = self.open_database()
+            with database:
+                for value in values:
+                    database.write(value)
+        except OSError:
+            return False
+        return self.close_database(database)
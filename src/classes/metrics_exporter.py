@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+
+from src.classes.qualys_api import QualysApi
+from src.classes.request_event import RequestEvent
+from src.constants import constants
+
+
+class MetricsExporter:
+    INTERVAL = constants.METRICS_EXPORTER_INTERVAL
+    PREFIX = constants.METRICS_EXPORTER_PREFIX
+    SUCCESS_METRICS = constants.METRICS_EXPORTER_SUCCESS_METRICS
+    DURATION_PHASES = (
+        RequestEvent.VALIDATE, RequestEvent.SEND, RequestEvent.RECEIVE,
+        RequestEvent.PARSE)
+
+    def __init__(
+            self,
+            metrics_file: str,
+            qa: QualysApi,
+            action: str,
+            interval: float = INTERVAL) -> None:
+        if action not in self.SUCCESS_METRICS:
+            raise ValueError(f'Unknown action: {action}')
+
+        if interval <= 0:
+            raise ValueError('Interval must be greater than 0')
+
+        self.metrics_file = metrics_file
+        self.qa = qa
+        self.action = action
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> 'MetricsExporter':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.write()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.write(running=False)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f'Unable to write {self.metrics_file}: {e}')
+
+    def write(self, running: bool = True) -> None:
+        # The collector may read the file at any moment, so it is swapped
+        # in whole rather than rewritten in place
+        text = self.render(running)
+        tmp_file = f'{self.metrics_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w') as file:
+            file.write(text)
+        os.replace(tmp_file, self.metrics_file)
+
+    def _escape(self, value) -> str:
+        value = str(value).replace('\\', '\\\\')
+        return value.replace('\n', '\\n').replace('"', '\\"')
+
+    def _labels(self, **labels) -> str:
+        pairs = ','.join(
+            f'{key}="{self._escape(value)}"'
+            for key, value in {'action': self.action, **labels}.items())
+        return '{' + pairs + '}'
+
+    def _family(
+            self,
+            lines: list,
+            name: str,
+            kind: str,
+            description: str) -> str:
+        name = f'{self.PREFIX}_{name}'
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        return name
+
+    def render(self, running: bool = True) -> str:
+        lines = []
+        # Both lists only ever grow, a copy is safe to take mid run
+        succeeded = len(self.qa.user)
+        failures = {}
+        for error in list(self.qa.failed_user):
+            key = (str(error[1]), QualysApi.failure_reason(error))
+            failures[key] = failures.get(key, 0) + 1
+        histograms, statuses = self.qa.stats.snapshot()
+
+        success = self.SUCCESS_METRICS[self.action]
+        name = self._family(
+            lines, f'{success}_total', 'counter',
+            f'Users handled successfully by --{self.action}')
+        lines.append(f'{name}{self._labels()} {succeeded}')
+
+        name = self._family(
+            lines, 'user_failures_total', 'counter',
+            'Failures recorded for users, by status code and reason')
+        for (code, reason), count in sorted(failures.items()):
+            labels = self._labels(code=code, reason=reason)
+            lines.append(f'{name}{labels} {count}')
+
+        name = self._family(
+            lines, 'responses_total', 'counter',
+            'Qualys API responses, by endpoint and status')
+        for endpoint, counts in sorted(statuses.items()):
+            for status, count in sorted(
+                    counts.items(), key=lambda item: str(item[0])):
+                labels = self._labels(endpoint=endpoint, status=status)
+                lines.append(f'{name}{labels} {count}')
+
+        name = self._family(
+            lines, 'request_duration_seconds', 'histogram',
+            'Time spent validating, sending, receiving and parsing')
+        for (endpoint, phase), histogram in sorted(histograms.items()):
+            if phase not in self.DURATION_PHASES:
+                continue
+
+            cumulative = 0
+            for bucket, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                labels = self._labels(
+                    endpoint=endpoint, phase=phase, le=bucket)
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            labels = self._labels(endpoint=endpoint, phase=phase, le='+Inf')
+            lines.append(f'{name}_bucket{labels} {histogram.count}')
+            labels = self._labels(endpoint=endpoint, phase=phase)
+            lines.append(f'{name}_sum{labels} {histogram.sum}')
+            lines.append(f'{name}_count{labels} {histogram.count}')
+
+        name = self._family(
+            lines, 'request_retries_total', 'counter',
+            'Requests sent again after a retryable failure')
+        for (endpoint, phase), histogram in sorted(histograms.items()):
+            if phase == RequestEvent.RETRY:
+                labels = self._labels(endpoint=endpoint)
+                lines.append(f'{name}{labels} {histogram.count}')
+
+        name = self._family(
+            lines, 'rate_limit_wait_seconds_total', 'counter',
+            'Time requests were held back by the Qualys rate and '
+            'concurrency limits')
+        for (endpoint, phase), histogram in sorted(histograms.items()):
+            if phase == RequestEvent.WAIT:
+                labels = self._labels(endpoint=endpoint)
+                lines.append(f'{name}{labels} {histogram.sum}')
+
+        name = self._family(
+            lines, 'run_in_progress', 'gauge',
+            'Whether the run was still going when the file was written')
+        lines.append(f'{name}{self._labels()} {int(running)}')
+
+        name = self._family(
+            lines, 'last_update_timestamp_seconds', 'gauge',
+            'When the file was last written')
+        lines.append(f'{name}{self._labels()} {time.time()}')
+        return '\n'.join(lines) + '\n'
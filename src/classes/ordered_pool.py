@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+
+class OrderedPool:
+    def __init__(
+            self,
+            workers: int,
+            executor_class: type = ThreadPoolExecutor) -> None:
+        if workers < 1:
+            raise ValueError('Workers must be at least 1')
+
+        self.workers = workers
+        self.executor_class = executor_class
+
+    def map(self, func: Callable, items: Iterable) -> Iterator[tuple]:
+        if self.workers == 1:
+            for item in items:
+                yield item, func(item)
+            return
+
+        # Only a bounded window of work is in flight at once and results
+        # are handed back in submission order, so the caller can pair each
+        # result with its input no matter which one finished first
+        with self.executor_class(max_workers=self.workers) as executor:
+            pending = deque()
+            for item in items:
+                pending.append((item, executor.submit(func, item)))
+                if len(pending) >= self.workers * 2:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result()
@@ -11,12 +11,22 @@ class ParseArgs:
     VER = constants.ARGPARSE_PROGRAM_VERSION
     AUTH = constants.ARGPARSE_PROGRAM_AUTHOR
     REPO = constants.ARGPARSE_PROGRAM_REPO
+    WORKERS = constants.QUALYS_API_DEFAULT_WORKERS
+    CONNECT_TIMEOUT = constants.QUALYS_API_CONNECT_TIMEOUT
+    READ_TIMEOUT = constants.QUALYS_API_READ_TIMEOUT
 
     def __init__(self, args: list) -> None:
         self.args = args
         self.action = ''
         self.credentials = ''
         self.users = ''
+        self.workers = self.WORKERS
+        self.validate_only = False
+        self.resume = False
+        self.metrics = False
+        self.connect_timeout = self.CONNECT_TIMEOUT
+        self.read_timeout = self.READ_TIMEOUT
+        self.deadline = None
         self.parser = argparse.ArgumentParser(
             prog=self.NAME, description=self.DESC)
 
@@ -68,6 +78,59 @@ class ParseArgs:
             help=msg
         )
 
+        self.parser.add_argument(
+            '-w',
+            '--workers',
+            type=int,
+            default=self.WORKERS,
+            required=False,
+            help='The number of users to provision concurrently'
+        )
+
+        self.parser.add_argument(
+            '--validate-only',
+            action='store_true',
+            required=False,
+            help='Only validate the users in the file given to --create'
+        )
+
+        self.parser.add_argument(
+            '--resume',
+            action='store_true',
+            required=False,
+            help='Skip the users already handled by a previous run'
+        )
+
+        self.parser.add_argument(
+            '--metrics',
+            action='store_true',
+            required=False,
+            help='Keep a Prometheus metrics file for the run under logs/'
+        )
+
+        self.parser.add_argument(
+            '--connect-timeout',
+            type=float,
+            default=self.CONNECT_TIMEOUT,
+            required=False,
+            help='Seconds to wait for a connection to the Qualys API'
+        )
+
+        self.parser.add_argument(
+            '--read-timeout',
+            type=float,
+            default=self.READ_TIMEOUT,
+            required=False,
+            help='Seconds to wait for the Qualys API to answer a request'
+        )
+
+        self.parser.add_argument(
+            '--deadline',
+            type=float,
+            required=False,
+            help='Stop starting new requests after this many seconds'
+        )
+
         self.parse_args = self.parser.parse_args()
         if len(self.args) == 0:
             self.parser.print_help()
@@ -138,6 +201,49 @@ class ParseArgs:
             if not self.users:
                 self.parser.error('Invalid text file')
 
+        # '--validate-only' provided
+        # requires create
+        if self.parse_args.validate_only:
+            if not self.parse_args.create:
+                self.parser.error('--validate-only requires --create')
+            self.validate_only = True
+
+        # '--resume' provided
+        # requires create or reset-password
+        if self.parse_args.resume:
+            if not (self.parse_args.create or self.parse_args.reset_password):
+                self.parser.error(
+                    '--resume requires --create or --reset-password')
+            self.resume = True
+
+        # '--metrics' provided
+        # requires create or reset-password
+        if self.parse_args.metrics:
+            if not (self.parse_args.create or self.parse_args.reset_password):
+                self.parser.error(
+                    '--metrics requires --create or --reset-password')
+            self.metrics = True
+
+        # '-w'/'--workers' provided
+        if self.parse_args.workers < 1:
+            self.parser.error('--workers must be at least 1')
+        self.workers = self.parse_args.workers
+
+        # '--connect-timeout'/'--read-timeout' provided
+        if self.parse_args.connect_timeout <= 0:
+            self.parser.error('--connect-timeout must be greater than 0')
+        self.connect_timeout = self.parse_args.connect_timeout
+
+        if self.parse_args.read_timeout <= 0:
+            self.parser.error('--read-timeout must be greater than 0')
+        self.read_timeout = self.parse_args.read_timeout
+
+        # '--deadline' provided
+        if self.parse_args.deadline is not None:
+            if self.parse_args.deadline <= 0:
+                self.parser.error('--deadline must be greater than 0')
+            self.deadline = self.parse_args.deadline
+
     def _print_version(self) -> None:
         print(f'{self.NAME} v{self.VER}')
         print(
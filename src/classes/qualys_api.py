@@ -1,11 +1,33 @@
 #!/usr/bin/env python3
 import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextvars import ContextVar
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Mapping
+from urllib.parse import urlsplit
+from xml.etree import ElementTree
+from xml.parsers import expat
 
 import requests
-import xmltodict
+import urllib3
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+from src.classes.api_response import ApiResponse
+from src.classes.csv_parser import CsvParser
+from src.classes.deadline import Deadline, DeadlineExceeded
 from src.classes.file_checker import FileChecker
+from src.classes.ordered_pool import OrderedPool
+from src.classes.rate_limiter import RateLimiter
+from src.classes.request_event import RequestEvent
+from src.classes.request_stats import RequestStats
+from src.classes.retry_policy import RetryPolicy
+from src.classes.run_log import RunLog
+from src.classes.user_directory import UserDirectory
+from src.classes.user_payload import UserPayload
+from src.classes.xml_parser import get_xml_parser
 from src.constants import constants
 
 
@@ -14,17 +36,50 @@ class QualysApi:
     REQUESTED = constants.QUALYS_API_USER_AGENT
     CONTENT_TYPE = constants.QUALYS_API_CONTENT_TYPE
     SCHEME = constants.QUALYS_API_SCHEME
+    POOL_SIZE = constants.QUALYS_API_POOL_SIZE
+    WORKERS = constants.QUALYS_API_DEFAULT_WORKERS
+    TIMEOUT = (
+        constants.QUALYS_API_CONNECT_TIMEOUT,
+        constants.QUALYS_API_READ_TIMEOUT)
+    LATENCY_BUDGET = constants.QUALYS_API_LATENCY_BUDGET
+    BATCH_SIZE = constants.QUALYS_API_PASSWORD_CHANGE_BATCH_SIZE
+    FAILURE_REASON_LENGTH = constants.QUALYS_API_FAILURE_REASON_LENGTH
+    XML_PARSER = constants.QUALYS_API_XML_PARSER
+    PREFLIGHT_CHUNK_SIZE = constants.QUALYS_API_PREFLIGHT_CHUNK_SIZE
     REQUIRED_USER_FIELDS = constants.QUALYS_API_REQUIRED_USER_FIELDS
+    REQUIRED_USER_COLUMNS = constants.QUALYS_API_REQUIRED_USER_COLUMNS
     OPTIONAL_USER_FIELDS = constants.QUALYS_API_OPTIONAL_USER_FIELDS
-    USER_ROLES = constants.QUALYS_API_VALID_USER_ROLES
-    COUNTRIES = constants.QUALYS_API_VALID_COUNTRY_CODES
-    US_STATES = constants.QUALYS_API_VALID_US_STATES
-    AUS_STATES = constants.QUALYS_API_VALID_AUS_STATES
-    CAN_STATES = constants.QUALYS_API_VALID_CAN_STATES
-    IN_STATES = constants.QUALYS_API_VALID_IN_STATES
+    USER_ROLES = frozenset(constants.QUALYS_API_VALID_USER_ROLES)
+    COUNTRIES = frozenset(constants.QUALYS_API_VALID_COUNTRY_CODES)
+    STATES = {
+        country: frozenset(states)
+        for country, states in constants.QUALYS_API_VALID_STATES.items()}
     USERNAME_FORMAT = constants.QUALYS_API_USERNAME_FORMAT
-
-    def __init__(self, credentials_file: str) -> None:
+    PATTERNS = {
+        key: re.compile(pattern)
+        for key, pattern in constants.QUALYS_API_FIELD_PATTERNS.items()}
+    REQUIRED_FIELD_RULES = constants.QUALYS_API_REQUIRED_FIELD_RULES
+    OPTIONAL_FIELD_RULES = constants.QUALYS_API_OPTIONAL_FIELD_RULES
+    ASSET_GROUP_ROLES = frozenset(constants.QUALYS_API_ASSET_GROUP_ROLES)
+    USER_FIELDS = frozenset(
+        [*constants.QUALYS_API_REQUIRED_USER_FIELDS,
+         *constants.QUALYS_API_OPTIONAL_USER_FIELDS])
+    DECODE_ERRORS = (KeyError, ValueError, expat.ExpatError)
+    STREAM_ERRORS = (ElementTree.ParseError, urllib3.exceptions.HTTPError,
+                     requests.RequestException)
+    # When the user or batch being handled was started, each worker thread
+    # and each asyncio task sees its own
+    _started = ContextVar('qualys_api_started', default=None)
+
+    def __init__(
+            self,
+            credentials_file: str,
+            pool_size: int = POOL_SIZE,
+            xml_parser: str = XML_PARSER,
+            retry: RetryPolicy | None = None,
+            timeout: tuple = TIMEOUT,
+            deadline: Deadline | None = None,
+            run_log: RunLog | None = None) -> None:
         self.credentials_file = credentials_file
         self.headers = {
             'X-Requested-With': self.REQUESTED,
@@ -32,8 +87,26 @@ class QualysApi:
             'Host': self.credentials['host']
         }
         self.users = []
+        self.directory = UserDirectory()
         self.user = []
         self.failed_user = []
+        self._lock = threading.Lock()
+        self.limiter = RateLimiter()
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.timeout = timeout
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.slow_requests = []
+        self.stats = RequestStats()
+        self.hooks = [self.stats]
+        self.run_log = run_log
+        self.xml_parser = get_xml_parser(xml_parser)
+        self.session = self._create_session(pool_size)
+
+    def __enter__(self) -> 'QualysApi':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
 
     @property
     def credentials_file(self) -> str:
@@ -80,425 +153,899 @@ class QualysApi:
         password = self.credentials['password']
         return HTTPBasicAuth(username, password)
 
-    def _is_valid_user_role(self, role: str) -> bool:
-        if role not in self.USER_ROLES:
-            return False
-        return True
+    def _create_session(self, pool_size: int) -> requests.Session:
+        if pool_size < 1:
+            raise ValueError('Pool size must be at least 1')
+
+        # One keep-alive connection pool is shared by every endpoint so
+        # the TCP and TLS handshakes are only paid once per connection
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            pool_block=True)
+        session = requests.Session()
+        session.mount(self.SCHEME, adapter)
+        session.headers.update(self.headers)
+        session.auth = self._basic_auth()
+        return session
+
+    def close(self) -> None:
+        self.session.close()
+
+    def add_hook(self, hook: Callable[[RequestEvent], None]) -> None:
+        self.hooks.append(hook)
+
+    def _emit(
+            self,
+            phase: str,
+            endpoint: str,
+            start: float,
+            status: int | str | None = None,
+            size: int = 0,
+            end: float | None = None) -> None:
+        if not self.hooks:
+            return
+
+        if end is None:
+            end = time.monotonic()
+        event = RequestEvent(phase, endpoint, start, end, status, size)
+        for hook in self.hooks:
+            hook(event)
+
+    def _request(
+            self,
+            method: str,
+            url: str,
+            idempotent: bool = True,
+            **kwargs) -> requests.Response:
+        endpoint = urlsplit(url).path
+        attempts = []
+        attempt = 0
+        while True:
+            if self.deadline.expired():
+                raise DeadlineExceeded('Run deadline exceeded')
+
+            attempt += 1
+            wait = time.monotonic()
+            self.limiter.acquire()
+            start = time.monotonic()
+            self._emit(RequestEvent.WAIT, endpoint, wait, end=start)
+            try:
+                # The deadline only stops new requests, one in flight
+                # keeps the normal timeouts so its result is not lost
+                r = self.session.request(
+                    method, url, timeout=self.timeout, **kwargs)
+                self.limiter.update(r.headers)
+            except requests.RequestException as e:
+                status = type(e).__name__
+                self._add_attempt(attempts, method, url, status,
+                                  time.monotonic() - start)
+                self._emit(RequestEvent.SEND, endpoint, start, status)
+                retry = self.retry.should_retry_exception(e, idempotent)
+                if not retry or attempt >= self.retry.attempts:
+                    raise
+                r = None
+            finally:
+                self.limiter.release()
+
+            if r is not None:
+                status = r.status_code
+                self._add_attempt(attempts, method, url, status,
+                                  time.monotonic() - start)
+                self._emit_response(r, endpoint, start, kwargs)
+                retry = self.retry.should_retry_status(status, idempotent)
+                if not retry or attempt >= self.retry.attempts:
+                    r.attempts = attempts
+                    return r
+                r.close()
+
+            # When Qualys sent a wait the limiter already parks every
+            # request until the window resets, so no backoff is added
+            backoff = time.monotonic()
+            if self.limiter.delay() == 0:
+                delay = self.retry.backoff(attempt)
+                remaining = self.deadline.remaining()
+                if remaining is not None:
+                    delay = min(delay, remaining)
+                time.sleep(delay)
+            self._emit(RequestEvent.RETRY, endpoint, backoff, status)
+
+    def _emit_response(
+            self,
+            r: requests.Response,
+            endpoint: str,
+            start: float,
+            kwargs: Mapping) -> None:
+        # requests times the call up to the response headers, the rest of
+        # the call went on reading the body
+        end = time.monotonic()
+        headers = min(start + r.elapsed.total_seconds(), end)
+        # The prepared body is what went out, a dict payload is only
+        # urlencoded by requests
+        body = r.request.body or b''
+        if isinstance(body, str):
+            body = body.encode()
+        self._emit(RequestEvent.SEND, endpoint, start, r.status_code,
+                   len(body), headers)
+
+        # A streamed body is read while it is parsed
+        if not kwargs.get('stream'):
+            self._emit(RequestEvent.RECEIVE, endpoint, headers,
+                       r.status_code, len(r.content), end)
+
+    def _add_attempt(
+            self,
+            attempts: list,
+            method: str,
+            url: str,
+            status: int | str,
+            elapsed: float) -> None:
+        attempts.append((status, elapsed))
+        if elapsed > self.LATENCY_BUDGET:
+            with self._lock:
+                self.slow_requests.append((method, url, status, elapsed))
+
+    def _decode(self, r: requests.Response, root: str) -> ApiResponse:
+        endpoint = urlsplit(r.url).path
+        return self._decode_text(r.status_code, r.text, root, endpoint)
+
+    def _decode_text(
+            self,
+            status_code: int,
+            text: str,
+            root: str,
+            endpoint: str = '') -> ApiResponse:
+        if status_code != 200:
+            msg = self._error_message(text, f'HTTP {status_code}')
+            return ApiResponse(
+                status_code, 'FAILED', status_code, msg, text=text)
+
+        # The body is parsed exactly once, the status and the payload are
+        # both read from the same pass
+        start = time.monotonic()
+        try:
+            response = self.xml_parser.parse(status_code, text, root)
+        except self.DECODE_ERRORS:
+            # A maintenance page or a truncated body only fails its own
+            # user, the raw text is kept on the response
+            msg = self._error_message(text, 'Unexpected response')
+            response = ApiResponse(
+                status_code, 'FAILED', status_code, msg, text=text)
+        self._emit(RequestEvent.PARSE, endpoint, start, status_code,
+                   len(text))
+        return response
+
+    def _add_result(self, user: str | tuple, email: str = '') -> None:
+        with self._lock:
+            self.user.append(user)
+
+        # Only the login is logged, never the password
+        fields = {'login': user[0] if isinstance(user, tuple) else user}
+        if email:
+            fields['email'] = email
+        self._log_outcome(True, **fields)
+
+    def _add_failure(self, error: tuple) -> None:
+        # Payload views and CSV records are stored as plain dicts so the
+        # failure report does not depend on the row they were built from
+        values = error[0]
+        if isinstance(values, Mapping) and not isinstance(values, dict):
+            error = (dict(values), *error[1:])
+
+        with self._lock:
+            self.failed_user.append(error)
 
-    def _is_valid_asset_group(self, value: str) -> bool:
-        pattern = r"^\w+([\,\w]+)?$"
-        if not re.match(pattern, value):
+        values = error[0]
+        fields = {}
+        if isinstance(values, Mapping):
+            if 'email' in values:
+                fields['email'] = values['email']
+        elif isinstance(values, str) and values:
+            fields['login'] = values
+            email = self._login_email(values)
+            if email:
+                fields['email'] = email
+        self._log_outcome(False, code=error[1],
+                          reason=self.failure_reason(error), **fields)
+
+    def _login_email(self, login: str) -> str:
+        user_details = self.directory.get_by_login(login)
+        if user_details is None:
+            return ''
+        return user_details[2] or ''
+
+    def _log_outcome(self, ok: bool, **fields) -> None:
+        if self.run_log is None:
+            return
+
+        started = self._started.get()
+        if started is not None:
+            fields['seconds'] = round(time.monotonic() - started, 6)
+        self.run_log.event('user', ok=ok, **fields)
+
+    @classmethod
+    def _error_message(cls, text: str, default: str) -> str:
+        # Failures are grouped by their message in the summary and the
+        # metrics, so only the Qualys error text is kept, never a whole body
+        try:
+            root = ElementTree.fromstring(text)
+        except ElementTree.ParseError:
+            return default
+
+        for path in ('RETURN/MESSAGE', 'RESPONSE/TEXT'):
+            msg = root.findtext(path)
+            if msg and msg.strip():
+                return msg.strip()
+        return default
+
+    @classmethod
+    def failure_reason(cls, error: tuple) -> str:
+        lines = str(error[2] or '').strip().splitlines()
+        if not lines:
+            return 'Unknown'
+        return lines[0][:cls.FAILURE_REASON_LENGTH]
+
+    @classmethod
+    def _chunks(cls, items: Iterable, size: int) -> Iterator[list]:
+        items = iter(items)
+        while True:
+            chunk = list(islice(items, size))
+            if not chunk:
+                return
+            yield chunk
+
+    @classmethod
+    def _matches(cls, key: str, value: str) -> bool:
+        if not cls.PATTERNS[key].match(value):
             return False
         return True
 
-    def _is_valid_name(self, value: str) -> bool:
-        pattern = r"^[A-z0-9\,\.\-\s]{,50}$"
-        if not re.match(pattern, value):
+    @classmethod
+    def _is_valid_user_role(cls, role: str) -> bool:
+        if role not in cls.USER_ROLES:
             return False
         return True
 
-    def _is_valid_title(self, value: str) -> bool:
-        pattern = r"^[A-z0-9\,\.\-\s]{,100}$"
-        if not re.match(pattern, value):
-            return False
-        return True
+    @classmethod
+    def _is_valid_asset_group(cls, value: str) -> bool:
+        return cls._matches('asset_group', value)
 
-    def _is_valid_phone_number(self, number: str) -> bool:
-        pattern = r"^[0-9\+\-\(\)\s]{,40}$"
-        if not re.match(pattern, number):
-            return False
-        return True
+    @classmethod
+    def _is_valid_name(cls, value: str) -> bool:
+        return cls._matches('name', value)
 
-    def _is_valid_fax(self, value: str) -> bool:
-        pattern = r"^\d{,40}$"
-        if not re.match(pattern, value):
-            return False
-        return True
+    @classmethod
+    def _is_valid_title(cls, value: str) -> bool:
+        return cls._matches('title', value)
 
-    def _is_valid_email(self, email: str) -> bool:
-        pattern = r"^[A-z0-9\.\-\_]+\@[A-z0-9\.\-]+\.\w{2,}"
-        if not re.match(pattern, email):
-            return False
-        return True
+    @classmethod
+    def _is_valid_phone_number(cls, number: str) -> bool:
+        return cls._matches('phone', number)
 
-    def _is_valid_address(self, value: str) -> bool:
-        pattern = r"^[A-z0-9\,\.\-\s]{,80}$"
-        if not re.match(pattern, value):
-            return False
-        return True
+    @classmethod
+    def _is_valid_fax(cls, value: str) -> bool:
+        return cls._matches('fax', value)
 
-    def _is_valid_city(self, value: str) -> bool:
-        pattern = r"^[A-z0-9\,\.\-\s]{,50}$"
-        if not re.match(pattern, value):
-            return False
-        return True
+    @classmethod
+    def _is_valid_email(cls, email: str) -> bool:
+        return cls._matches('email', email)
 
-    def _is_valid_zip_code(self, value: str) -> bool:
-        pattern = r"^\d{,20}$"
-        if not re.match(pattern, value):
-            return False
-        return True
+    @classmethod
+    def _is_valid_address(cls, value: str) -> bool:
+        return cls._matches('address', value)
 
-    def _is_valid_external_id(self, value: str) -> bool:
-        pattern = r"^[A-z]{,256}$"
-        if not re.match(pattern, value):
-            return False
-        return True
-
-    def _is_valid_country(self, country: str) -> bool:
-        if country in self.COUNTRIES:
-            return True
-        return False
+    @classmethod
+    def _is_valid_city(cls, value: str) -> bool:
+        return cls._matches('city', value)
 
-    def _is_valid_us_state(self, state: str) -> bool:
-        if state in self.US_STATES:
-            return True
-        return False
+    @classmethod
+    def _is_valid_zip_code(cls, value: str) -> bool:
+        return cls._matches('zip_code', value)
 
-    def _is_valid_aus_state(self, state: str) -> bool:
-        if state in self.AUS_STATES:
-            return True
-        return False
+    @classmethod
+    def _is_valid_external_id(cls, value: str) -> bool:
+        return cls._matches('external_id', value)
 
-    def _is_valid_can_state(self, state: str) -> bool:
-        if state in self.CAN_STATES:
+    @classmethod
+    def _is_valid_country(cls, country: str) -> bool:
+        if country in cls.COUNTRIES:
             return True
         return False
 
-    def _is_valid_in_state(self, state: str) -> bool:
-        if state in self.IN_STATES:
+    @classmethod
+    def _is_valid_state(cls, country: str, state: str) -> bool:
+        states = cls.STATES.get(country)
+        if states is None or state in states:
             return True
         return False
 
-    def _validate_payload_values(self, values: dict) -> bool:
-        result = self._is_valid_user_role(values['user_role'])
-        if not result:
-            error = (values, 400, 'Invalid User Role')
-            self.failed_user.append(error)
-            return False
-
-        if values['user_role'] == 'unit_manager':
-            if values['business_unit'] == 'Unassigned':
-                error = (values, 400, 'Invalid Business Unit for Unit Manager')
-                self.failed_user.append(error)
-                return False
-
-        result = self._is_valid_name(values['first_name'])
-        if not result:
-            error = (values, 400, 'Invalid First Name')
-            self.failed_user.append(error)
-            return False
+    @classmethod
+    def _is_valid_us_state(cls, state: str) -> bool:
+        return cls._is_valid_state('United States of America', state)
 
-        result = self._is_valid_name(values['last_name'])
-        if not result:
-            error = (values, 400, 'Invalid Last Name')
-            self.failed_user.append(error)
-            return False
+    @classmethod
+    def _is_valid_aus_state(cls, state: str) -> bool:
+        return cls._is_valid_state('Australia', state)
 
-        result = self._is_valid_title(values['title'])
-        if not result:
-            error = (values, 400, 'Invalid Title')
-            self.failed_user.append(error)
-            return False
+    @classmethod
+    def _is_valid_can_state(cls, state: str) -> bool:
+        return cls._is_valid_state('Canada', state)
 
-        result = self._is_valid_phone_number(values['phone'])
-        if not result:
-            error = (values, 400, 'Invalid Phone Number')
-            self.failed_user.append(error)
-            return False
+    @classmethod
+    def _is_valid_in_state(cls, state: str) -> bool:
+        return cls._is_valid_state('India', state)
 
-        result = self._is_valid_email(values['email'])
+    @classmethod
+    def _required_payload_error(cls, values: Mapping) -> str | None:
+        result = cls._is_valid_user_role(values['user_role'])
         if not result:
-            error = (values, 400, 'Invalid Email Address')
-            self.failed_user.append(error)
-            return False
+            return 'Invalid User Role'
 
-        result = self._is_valid_address(values['address1'])
-        if not result:
-            error = (values, 400, 'Invalid Street Address')
-            self.failed_user.append(error)
-            return False
+        if values['user_role'] == 'unit_manager':
+            if values['business_unit'] == 'Unassigned':
+                return 'Invalid Business Unit for Unit Manager'
 
-        result = self._is_valid_city(values['city'])
-        if not result:
-            error = (values, 400, 'Invalid City')
-            self.failed_user.append(error)
-            return False
+        for field, key, msg in cls.REQUIRED_FIELD_RULES:
+            result = cls._matches(key, values[field])
+            if not result:
+                return msg
 
-        result = self._is_valid_country_and_state(
+        result = cls._is_valid_country_and_state(
             values['country'], values['state'])
         if not result:
-            error = (values, 400, 'Invalid Country or State')
-            self.failed_user.append(error)
-            return False
+            return 'Invalid Country or State'
 
-        result = self._is_valid_send_email(values['send_email'])
+        result = cls._is_valid_send_email(values['send_email'])
         if not result:
-            error = (values, 400, 'Invalid send_email option')
-            self.failed_user.append(error)
-            return False
+            return 'Invalid send_email option'
 
-        return True
+        return None
 
-    def _validate_optional_payload_values(self, values: dict) -> bool:
-        if 'asset_groups' in values.keys():
-            roles = ['manager', 'unit_manager']
-            if values['user_role'] in roles:
-                error = (values, 400, 'Invalid User Role with Asset Groups')
-                self.failed_user.append(error)
-                return False
-
-            result = self._is_valid_asset_group(values['asset_groups'])
-            if not result:
-                error = (values, 400, 'Invalid Asset Group(s)')
-                self.failed_user.append(error)
-                return False
+    @classmethod
+    def _optional_payload_error(cls, values: Mapping) -> str | None:
+        if 'asset_groups' in values:
+            if values['user_role'] in cls.ASSET_GROUP_ROLES:
+                return 'Invalid User Role with Asset Groups'
 
-        if 'fax' in values.keys():
-            result = self._is_valid_fax(values['fax'])
+            result = cls._is_valid_asset_group(values['asset_groups'])
             if not result:
-                error = (values, 400, 'Invalid Fax')
-                self.failed_user.append(error)
-                return False
+                return 'Invalid Asset Group(s)'
 
-        if 'address2' in values.keys():
-            result = self._is_valid_address(values['address2'])
-            if not result:
-                error = (values, 400, 'Invalid Street Address')
-                self.failed_user.append(error)
-                return False
+        for field, key, msg in cls.OPTIONAL_FIELD_RULES:
+            if field not in values:
+                continue
 
-        if 'zip_code' in values.keys():
-            result = self._is_valid_zip_code(values['zip_code'])
+            result = cls._matches(key, values[field])
             if not result:
-                error = (values, 400, 'Invalid Zip Code')
-                self.failed_user.append(error)
-                return False
+                return msg
 
-        if 'external_id' in values.keys():
-            result = self._is_valid_external_id(values['external_id'])
-            if not result:
-                error = (values, 400, 'Invalid External ID')
-                self.failed_user.append(error)
-                return False
+        return None
 
+    def _validate_payload_values(self, values: dict) -> bool:
+        msg = self._required_payload_error(values)
+        if msg:
+            error = (values, 400, msg)
+            self._add_failure(error)
+            return False
         return True
 
-    def _parse_required_user_fields(self, values: dict) -> dict:
-        payload = self.REQUIRED_USER_FIELDS.copy()
-        for key in self.REQUIRED_USER_FIELDS.keys():
+    def _validate_optional_payload_values(self, values: dict) -> bool:
+        msg = self._optional_payload_error(values)
+        if msg:
+            error = (values, 400, msg)
+            self._add_failure(error)
+            return False
+        return True
+
+    @classmethod
+    def _missing_fields(
+            cls,
+            values: Mapping,
+            required: Iterable[str] = ()) -> list:
+        missing = [key for key in required if values.get(key) is None]
+        for key, value in values.items():
+            if value is None and key not in missing:
+                missing.append(key)
+        return missing
+
+    @classmethod
+    def validate_user(cls, values: Mapping) -> str | None:
+        # Nothing is printed per row, the caller reports every message
+        bad_keys = cls._bad_keys(values)
+        if bad_keys:
+            return f'Invalid user keys: {", ".join(bad_keys)}'
+
+        if all(value is None for value in values.values()):
+            return 'Empty row'
+
+        # A roster row has to carry every column itself, the defaults
+        # UserPayload falls back to are never what a trainee should get
+        missing = cls._missing_fields(values, cls.REQUIRED_USER_COLUMNS)
+        if missing:
+            return f'Missing field(s): {", ".join(missing)}'
+
+        payload = UserPayload(values)
+        return (cls._required_payload_error(payload)
+                or cls._optional_payload_error(payload))
+
+    @classmethod
+    def _validate_chunk(cls, rows: list) -> list:
+        return [cls.validate_user(row) for row in rows]
+
+    @classmethod
+    def validate_users(
+            cls,
+            rows: Iterable[Mapping],
+            processes: int = 1) -> list[tuple]:
+        if processes < 1:
+            raise ValueError('Processes must be at least 1')
+
+        # The validators only read class level tables, so chunks of rows
+        # can be checked in other processes without copying the API session
+        chunks = cls._chunks(rows, cls.PREFLIGHT_CHUNK_SIZE)
+        pool = OrderedPool(processes, ProcessPoolExecutor)
+        results = pool.map(cls._validate_chunk, chunks)
+
+        errors = []
+        i = 0
+        for chunk, messages in results:
+            for row, msg in zip(chunk, messages):
+                if msg:
+                    errors.append((i, row, msg))
+                i += 1
+        return errors
+
+    @classmethod
+    def _validate_csv_chunk(cls, item: tuple) -> tuple:
+        csvparser, chunk, overrides = item
+        rows = csvparser.read_chunk(chunk)
+        errors = []
+        for i, row in enumerate(rows):
+            if overrides:
+                row = row.replace(**overrides)
+
+            msg = cls.validate_user(row)
+            if msg:
+                errors.append((i, row, msg))
+        return len(rows), errors
+
+    @classmethod
+    def validate_csv(
+            cls,
+            csvparser: CsvParser,
+            processes: int = 1,
+            overrides: dict | None = None) -> list[tuple]:
+        # Each worker maps its own byte range of the roster and only sends
+        # the invalid rows back, the file is never copied between processes
+        chunks = csvparser.iter_chunks()
+        items = ((csvparser, chunk, overrides) for chunk in chunks)
+        pool = OrderedPool(processes, ProcessPoolExecutor)
+
+        errors = []
+        offset = 0
+        for _, (count, chunk_errors) in pool.map(
+                cls._validate_csv_chunk, items):
+            for i, row, msg in chunk_errors:
+                errors.append((offset + i, row, msg))
+            offset += count
+        return errors
+
+    @classmethod
+    def _parse_required_user_fields(cls, values: dict) -> dict:
+        payload = cls.REQUIRED_USER_FIELDS.copy()
+        for key in cls.REQUIRED_USER_FIELDS.keys():
             if key in values:
                 payload[key] = values[key]
         return payload
 
-    def _parse_optional_user_fields(self, values: dict) -> dict:
+    @classmethod
+    def _parse_optional_user_fields(cls, values: dict) -> dict:
         payload = {}
-        for key in self.OPTIONAL_USER_FIELDS:
+        for key in cls.OPTIONAL_USER_FIELDS:
             if key in values.keys():
                 payload[key] = values[key]
         return payload
 
-    def _detect_bad_keys(self, values: dict) -> bool:
-        for key in values.keys():
-            if key not in self.REQUIRED_USER_FIELDS.keys(
-            ) and key not in self.OPTIONAL_USER_FIELDS:
-                print(f'Invalid User Field: {key}')
-                return True
-        return False
+    @classmethod
+    def _bad_keys(cls, values: Mapping) -> list:
+        return [key for key in values.keys() if key not in cls.USER_FIELDS]
+
+    @classmethod
+    def _detect_bad_keys(cls, values: Mapping) -> bool:
+        return len(cls._bad_keys(values)) > 0
 
-    def _is_valid_country_and_state(self, country: str, state: str) -> bool:
-        result = self._is_valid_country(country)
+    @classmethod
+    def _is_valid_country_and_state(cls, country: str, state: str) -> bool:
+        result = cls._is_valid_country(country)
         if not result:
-            print(f'Invalid Country: {country}')
             return False
 
-        if country == 'United States of America':
-            result = self._is_valid_us_state(state)
-            if not result:
-                print(f'Invalid State: {state} for Country: {country}')
-                return False
-
-        elif country == 'Australia':
-            result = self._is_valid_aus_state(state)
-            if not result:
-                print(f'Invalid State: {state} for Country: {country}')
-                return False
-
-        elif country == 'Canada':
-            result = self._is_valid_can_state(state)
-            if not result:
-                print(f'Invalid State: {state} for Country: {country}')
-                return False
-
-        elif country == 'India':
-            result = self._is_valid_in_state(state)
-            if not result:
-                print(f'Invalid State: {state} for Country: {country}')
-                return False
+        result = cls._is_valid_state(country, state)
+        if not result:
+            return False
 
         return True
 
-    def _is_valid_send_email(self, value: int) -> bool:
+    @classmethod
+    def _is_valid_send_email(cls, value: int) -> bool:
         if value == 1 or value == 0:
             return True
-        print(f'send_email must be 1 or 0, is: {value}')
         return False
 
-    def _is_valid_username_format(self, username: str) -> bool:
-        pattern = r"^" + self.USERNAME_FORMAT + r"[a-z0-9]{3,}"
-        if not re.match(pattern, username):
-            print(f'Invalid username format: {username}')
+    @classmethod
+    def _is_valid_username_format(cls, username: str) -> bool:
+        if not cls._matches('username', username):
             return False
         return True
 
     def test(self) -> bool:
         endpoint = '/api/2.0/fo/report/?action=list'
         url = self.SCHEME + self.headers['Host'] + endpoint
-        r = requests.get(
-            url=url,
-            headers=self.headers,
-            auth=self._basic_auth())
-        if r.status_code != 200:
-            print(r.status_code, r.text)
+        try:
+            r = self._request('GET', url)
+        except requests.RequestException as e:
+            print(e)
             return False
-        return True
 
-    def list_users(self) -> bool:
-        endpoint = '/msp/user_list.php'
-        url = self.SCHEME + self.headers['Host'] + endpoint
-        r = requests.get(
-            url=url,
-            headers=self.headers,
-            auth=self._basic_auth())
         if r.status_code != 200:
-            error = ('', r.status_code, r.text)
-            self.failed_user.append(error)
             print(r.status_code, r.text)
             return False
-        else:
-            response = xmltodict.parse(r.text)
-            try:
-                xml_return = response['USER_LIST_OUTPUT']['RETURN']
-                if xml_return['@status'] == 'FAILED':
-                    code = int(xml_return['@number'])
-                    msg = xml_return['MESSAGE']
-                    error = ('', code, msg)
-                    self.failed_user.append(error)
-                    return False
-            except KeyError:
+        return True
+
+    def _element_text(
+            self,
+            element: ElementTree.Element,
+            path: str) -> str | None:
+        text = element.findtext(path)
+        if text is None:
+            return None
+        return text.strip() or None
+
+    def _parse_user_list(self, stream) -> Iterator[tuple]:
+        # The listing is always streamed, xml_parser only picks the backend
+        # for the add user and password change responses
+        events = ElementTree.iterparse(stream, events=('start', 'end'))
+        yield from self._read_user_list(events, [])
+
+    def _read_user_list(
+            self,
+            events: Iterable[tuple],
+            path: list) -> Iterator[tuple]:
+        # The open elements are kept in path so a caller feeding the body
+        # in pieces can carry on where the previous piece stopped
+        for event, element in events:
+            if event == 'start':
+                # Anything but a user list, such as a maintenance page or a
+                # SIMPLE_RETURN error, must not pass for an empty one
+                if not path and element.tag != 'USER_LIST_OUTPUT':
+                    msg = f'Unexpected {element.tag} response'
+                    error = ('', 200, msg)
+                    self._add_failure(error)
+                    raise ValueError(msg)
+                path.append(element)
+                continue
+
+            tags = [e.tag for e in path] if len(path) <= 3 else None
+            if tags == ['USER_LIST_OUTPUT', 'USER_LIST', 'USER']:
+                username = self._element_text(element, 'USER_LOGIN')
+                userid = self._element_text(element, 'USER_ID')
+                email = self._element_text(element, 'CONTACT_INFO/EMAIL')
+                external_id = self._element_text(element, 'EXTERNAL_ID')
+                yield (username, userid, email, external_id)
+
+                # Drop each USER once it has been read so only one is ever
+                # held in memory no matter how large the subscription is
+                path[-2].clear()
+
+            elif tags == ['USER_LIST_OUTPUT', 'RETURN']:
                 # Qualys does not use the 'RETURN' tag consistently
                 # it is there for both success and failure in the Add User
                 # and the Reset Password calls, but not the basic User List
-                pass
-
-        response = xmltodict.parse(r.text)
-        user_list = response['USER_LIST_OUTPUT']['USER_LIST']
-        for user in user_list['USER']:
-            username = user['USER_LOGIN']
-            userid = user['USER_ID']
-            email = user['CONTACT_INFO']['EMAIL']
-            user_details = (username, userid, email)
-            self.users.append(user_details)
-        return True
+                if element.get('status') == 'FAILED':
+                    code = int(element.get('number'))
+                    msg = self._element_text(element, 'MESSAGE')
+                    error = ('', code, msg)
+                    self._add_failure(error)
+                    raise ValueError(msg)
+            path.pop()
 
-    def add_user(self, **kwargs) -> bool:
-        result = self._detect_bad_keys(kwargs)
-        if result:
-            error = (kwargs, 400, 'Invalid user keys')
-            self.failed_user.append(error)
-            return False
+    def iter_users(self) -> Iterator[tuple]:
+        endpoint = '/msp/user_list.php'
+        url = self.SCHEME + self.headers['Host'] + endpoint
+        try:
+            r = self._request('GET', url, stream=True)
+        except requests.RequestException as e:
+            error = ('', 0, type(e).__name__)
+            self._add_failure(error)
+            print(e)
+            raise ValueError('Unable to list users')
 
-        payload = self._parse_required_user_fields(kwargs)
-        optional_payload = self._parse_optional_user_fields(kwargs)
-        if len(optional_payload) > 0:
-            payload = {**payload, **optional_payload}
+        try:
+            if r.status_code != 200:
+                msg = self._error_message(r.text, f'HTTP {r.status_code}')
+                error = ('', r.status_code, msg)
+                self._add_failure(error)
+                print(r.status_code, r.text)
+                raise ValueError('Unable to list users')
+
+            # The body is read as it is parsed, so this covers both
+            r.raw.decode_content = True
+            start = time.monotonic()
+            try:
+                yield from self._parse_user_list(r.raw)
+            except self.STREAM_ERRORS as e:
+                # A body cut short or garbled part way through is a failed
+                # listing, never a shorter one
+                error = ('', 0, type(e).__name__)
+                self._add_failure(error)
+                print(e)
+                raise ValueError('Unable to list users')
+            self._emit(RequestEvent.PARSE, endpoint, start, r.status_code,
+                       r.raw.tell())
+        finally:
+            r.close()
 
-        result = self._validate_payload_values(payload)
-        if not result:
-            error = (payload, 400, 'Invalid required field(s)')
-            self.failed_user.append(error)
+    def list_users(self) -> bool:
+        try:
+            for user_details in self.iter_users():
+                self.users.append(user_details)
+                self.directory.add(user_details)
+        except ValueError:
+            self._clear_users()
             return False
+        return True
 
-        result = self._validate_optional_payload_values(payload)
-        if not result:
-            error = (payload, 400, 'Invalid optional field(s)')
-            self.failed_user.append(error)
-            return False
+    def _clear_users(self) -> None:
+        # Half a listing would let the existing users be created again
+        self.users.clear()
+        self.directory.clear()
+
+    def add_user(self, **kwargs) -> bool:
+        return self._add_user(kwargs) is not None
+
+    def add_users(
+            self,
+            rows: Iterable[Mapping],
+            workers: int = WORKERS) -> Iterator[tuple]:
+        pool = OrderedPool(workers)
+        return pool.map(self._add_user, self._scheduled(rows))
+
+    def _scheduled(self, rows: Iterable[Mapping]) -> Iterator[Mapping]:
+        # Once the run deadline passes no new row is pulled, the users
+        # already in flight finish and the pool drains
+        rows = iter(rows)
+        while not self.deadline.expired():
+            row = next(rows, None)
+            if row is None:
+                return
+            yield row
+
+    def _add_user(self, kwargs: Mapping) -> str | tuple | None:
+        self._started.set(time.monotonic())
+        payload = self._user_payload(kwargs)
+        if payload is None:
+            return None
 
         endpoint = '/msp/user.php'
         url = self.SCHEME + self.headers['Host'] + endpoint
-        r = requests.post(
-            url=url,
-            headers=self.headers,
-            data=payload,
-            auth=self._basic_auth())
-        if r.status_code != 200:
-            error = (payload, r.status_code, r.text)
-            self.failed_user.append(error)
-            print(r.status_code, r.text)
-            return False
-        else:
-            response = xmltodict.parse(r.text)['USER_OUTPUT']['RETURN']
-            if response['@status'] == 'FAILED':
-                code = int(response['@number'])
-                msg = response['MESSAGE']
-                error = (payload, code, msg)
-                self.failed_user.append(error)
-                return False
-
-        response = xmltodict.parse(r.text)['USER_OUTPUT']['USER']
+        # Qualys may have created the user before a read timeout or a 5xx,
+        # so only failures that prove nothing was created are retried
+        try:
+            r = self._request(
+                'POST', url, idempotent=False, data=payload.encode())
+        except requests.RequestException as e:
+            error = (payload, 0, type(e).__name__)
+            self._add_failure(error)
+            return None
+
+        response = self._decode(r, 'USER_OUTPUT')
+        return self._user_result(payload, response)
+
+    def _user_payload(self, kwargs: Mapping) -> UserPayload | None:
+        start = time.monotonic()
+        payload = self._valid_payload(kwargs)
+        status = None if payload is not None else 400
+        self._emit(RequestEvent.VALIDATE, '/msp/user.php', start, status)
+        return payload
+
+    def _valid_payload(self, kwargs: Mapping) -> UserPayload | None:
+        bad_keys = self._bad_keys(kwargs)
+        if bad_keys:
+            error = (kwargs, 400, f'Invalid user keys: {", ".join(bad_keys)}')
+            self._add_failure(error)
+            return None
+
+        missing = self._missing_fields(kwargs)
+        if missing:
+            error = (kwargs, 400, f'Missing field(s): {", ".join(missing)}')
+            self._add_failure(error)
+            return None
+
+        payload = UserPayload(kwargs)
+
+        # One failure per user, with the field that failed as its reason
+        msg = (self._required_payload_error(payload)
+               or self._optional_payload_error(payload))
+        if msg:
+            error = (payload, 400, msg)
+            self._add_failure(error)
+            return None
+        return payload
+
+    def _user_result(
+            self,
+            payload: UserPayload,
+            response: ApiResponse) -> str | tuple | None:
+        if not response.ok or not response.users:
+            error = (payload, response.number, response.message)
+            self._add_failure(error)
+            return None
+
+        user_details = response.users[0]
         if payload['send_email'] == 1:
-            user = response['USER_LOGIN']
+            user = user_details['USER_LOGIN']
         else:
-            user = (response['USER_LOGIN'], response['PASSWORD'])
-        self.user.append(user)
-        return True
+            user = (user_details['USER_LOGIN'], user_details['PASSWORD'])
+        self._add_result(user, payload['email'])
+        return user
 
     def reset_password(self, username: str, email: int) -> bool:
+        if not self._is_valid_reset(username, email):
+            return False
+
+        # The response has to list the login itself, any other user in it
+        # does not count as a reset
+        results = {username: None}
+        users = self._reset_passwords([username], email)
+        self._add_reset_results(results, [username], users)
+        return results[username] is not None
+
+    def _is_valid_reset(self, username: str, email: int) -> bool:
+        start = time.monotonic()
+        self._started.set(start)
+        result = self._check_reset(username, email)
+        status = None if result else 400
+        self._emit(RequestEvent.VALIDATE, '/msp/password_change.php', start,
+                   status)
+        return result
+
+    def _check_reset(self, username: str, email: int) -> bool:
         result = self._is_valid_username_format(username)
         if not result:
             error = (username, 400, 'Invalid username format')
-            self.failed_user.append(error)
+            self._add_failure(error)
             return False
 
         result = self._is_valid_send_email(email)
         if not result:
-            error = (email, 400, 'Invalid email option')
-            self.failed_user.append(error)
+            error = (username, 400, 'Invalid email option')
+            self._add_failure(error)
             return False
+        return True
 
-        payload = {
-            'user_logins': username,
-            'email': email
-        }
+    def reset_passwords(
+            self,
+            usernames: Iterable[str],
+            email: int,
+            batch_size: int = BATCH_SIZE) -> dict:
+        results, logins = self._reset_logins(usernames, email, batch_size)
+        i = 0
+        while i < len(logins):
+            if self.deadline.expired():
+                for login in logins[i:]:
+                    error = (login, 0, 'Run deadline exceeded')
+                    self._add_failure(error)
+                break
+
+            batch = logins[i:i + batch_size]
+            users = self._reset_passwords(batch, email)
+            self._add_reset_results(results, batch, users)
+            i += batch_size
+        return results
+
+    def _reset_logins(
+            self,
+            usernames: Iterable[str],
+            email: int,
+            batch_size: int) -> tuple:
+        if batch_size < 1:
+            raise ValueError('Batch size must be at least 1')
+
+        self._started.set(time.monotonic())
+        results = {}
+        logins = []
+        for username in usernames:
+            if username in results:
+                continue
+
+            results[username] = None
+            start = time.monotonic()
+            result = self._is_valid_username_format(username)
+            status = None if result else 400
+            self._emit(RequestEvent.VALIDATE, '/msp/password_change.php',
+                       start, status)
+            if not result:
+                error = (username, 400, 'Invalid username format')
+                self._add_failure(error)
+                continue
+            logins.append(username)
+
+        result = self._is_valid_send_email(email)
+        if not result:
+            self._add_batch_failure(logins, 400, 'Invalid email option')
+            return results, []
+        return results, logins
+
+    def _add_reset_results(
+            self,
+            results: dict,
+            batch: list,
+            users: list | None) -> None:
+        if users is None:
+            return
+
+        for user in users:
+            login = user if isinstance(user, str) else user[0]
+            if login in results:
+                results[login] = user
+
+        for login in batch:
+            if results[login] is None:
+                error = (login, 404, 'Password not reset')
+                self._add_failure(error)
+
+    def _add_batch_failure(
+            self,
+            logins: list,
+            code: int,
+            message: str) -> None:
+        # A failed call fails every login it carried, each one is counted
+        # and logged on its own
+        for login in logins:
+            error = (login, code, message)
+            self._add_failure(error)
+
+    def _reset_passwords(self, logins: list, email: int) -> list | None:
+        self._started.set(time.monotonic())
+        payload = self._reset_payload(logins, email)
         endpoint = '/msp/password_change.php'
         url = self.SCHEME + self.headers['Host'] + endpoint
-        r = requests.post(
-            url=url,
-            headers=self.headers,
-            data=payload,
-            auth=self._basic_auth())
-        if r.status_code != 200:
-            error = (payload, r.status_code, r.text)
-            self.failed_user.append(error)
-            print(r.status_code, r.text)
-            return False
-        else:
-            response = xmltodict.parse(r.text)
-            xml_return = response['PASSWORD_CHANGE_OUTPUT']['RETURN']
-            if xml_return['@status'] == 'FAILED':
-                code = int(xml_return['@number'])
-                msg = xml_return['MESSAGE']
-                error = (payload, code, msg)
-                self.failed_user.append(error)
-                return False
-
-        response = xmltodict.parse(r.text)
-        xml_return = response['PASSWORD_CHANGE_OUTPUT']['RETURN']['CHANGES']
-        user_list = xml_return['USER_LIST']['USER']
-        if email == 1:
-            user = user_list['USER_LOGIN']
-        else:
-            user = (user_list['USER_LOGIN'], user_list['PASSWORD'])
-        self.user.append(user)
-        return True
+        try:
+            r = self._request('POST', url, data=payload)
+        except requests.RequestException as e:
+            self._add_batch_failure(logins, 0, type(e).__name__)
+            return None
+
+        response = self._decode(r, 'PASSWORD_CHANGE_OUTPUT')
+        return self._reset_result(logins, response, email)
+
+    def _reset_payload(self, logins: list, email: int) -> dict:
+        return {
+            'user_logins': ','.join(logins),
+            'email': email
+        }
+
+    def _reset_result(
+            self,
+            logins: list,
+            response: ApiResponse,
+            email: int) -> list | None:
+        if not response.ok:
+            self._add_batch_failure(
+                logins, response.number, response.message)
+            return None
+
+        users = []
+        requested = set(logins)
+        for user_details in response.users:
+            login = user_details['USER_LOGIN']
+            if login not in requested:
+                continue
+
+            if email == 1:
+                user = login
+            else:
+                user = (login, user_details['PASSWORD'])
+            self._add_result(user, self._login_email(login))
+            users.append(user)
+        return users
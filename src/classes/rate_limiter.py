@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import threading
+import time
+from typing import Mapping
+
+from src.constants import constants
+
+
+class RateLimiter:
+    REMAINING = constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER
+    TO_WAIT = constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER
+    CONCURRENCY = constants.QUALYS_API_CONCURRENCY_LIMIT_HEADER
+
+    def __init__(self, concurrency: int = 0) -> None:
+        if concurrency < 0:
+            raise ValueError('Concurrency must be at least 0')
+
+        self.concurrency = concurrency
+        self.remaining = -1
+        self.running = 0
+        self.wait_until = 0.0
+        self._condition = threading.Condition()
+
+    def _header_value(self, headers: Mapping, key: str) -> int | None:
+        try:
+            return int(headers[key])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def delay(self) -> float:
+        with self._condition:
+            return max(self.wait_until - time.monotonic(), 0.0)
+
+    def _wait(self) -> float | None:
+        # 0 once a request may be sent, the seconds left while every request
+        # is parked, None until a running request finishes or reports back
+        wait = self.wait_until - time.monotonic()
+        if wait > 0:
+            return wait
+
+        if self.concurrency and self.running >= self.concurrency:
+            return None
+
+        # With the quota spent only one request goes out to learn when the
+        # window resets, the rest wait for its headers instead of a 409
+        if self.remaining == 0 and self.running > 0:
+            return None
+        return 0.0
+
+    def _start(self) -> None:
+        # Each request sent takes one call out of the quota until a
+        # response reports the real figure
+        self.running += 1
+        if self.remaining > 0:
+            self.remaining -= 1
+
+    def acquire(self) -> None:
+        with self._condition:
+            while True:
+                wait = self._wait()
+                if wait == 0:
+                    break
+                self._condition.wait(timeout=wait)
+            self._start()
+
+    def try_acquire(self) -> float | None:
+        # The same check as acquire without blocking, for callers that wait
+        # on their own event loop instead
+        with self._condition:
+            wait = self._wait()
+            if wait == 0:
+                self._start()
+            return wait
+
+    def release(self) -> None:
+        with self._condition:
+            self.running = max(self.running - 1, 0)
+            self._condition.notify_all()
+
+    def update(self, headers: Mapping) -> None:
+        remaining = self._header_value(headers, self.REMAINING)
+        to_wait = self._header_value(headers, self.TO_WAIT)
+        concurrency = self._header_value(headers, self.CONCURRENCY)
+
+        with self._condition:
+            if remaining is not None:
+                self.remaining = remaining
+
+            if concurrency is not None and concurrency > 0:
+                self.concurrency = concurrency
+
+            # Qualys only sends a non-zero wait once the quota is spent, so
+            # every request is parked until the window resets instead of
+            # being sent just to come back as a 409
+            if to_wait is not None and to_wait > 0:
+                wait_until = time.monotonic() + to_wait
+                self.wait_until = max(self.wait_until, wait_until)
+
+            self._condition.notify_all()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+from src.constants import constants
+
+
+class RequestEvent:
+    VALIDATE = constants.REQUEST_EVENT_VALIDATE
+    WAIT = constants.REQUEST_EVENT_WAIT
+    SEND = constants.REQUEST_EVENT_SEND
+    RECEIVE = constants.REQUEST_EVENT_RECEIVE
+    PARSE = constants.REQUEST_EVENT_PARSE
+    RETRY = constants.REQUEST_EVENT_RETRY
+    PHASES = (VALIDATE, WAIT, SEND, RECEIVE, PARSE, RETRY)
+    __slots__ = ('phase', 'endpoint', 'start', 'end', 'status', 'size')
+
+    def __init__(
+            self,
+            phase: str,
+            endpoint: str,
+            start: float,
+            end: float,
+            status: int | str | None = None,
+            size: int = 0) -> None:
+        # start and end are time.monotonic() readings
+        self.phase = phase
+        self.endpoint = endpoint
+        self.start = start
+        self.end = end
+        self.status = status
+        self.size = size
+
+    def __repr__(self) -> str:
+        return (
+            f'RequestEvent(phase={self.phase!r}, '
+            f'endpoint={self.endpoint!r}, status={self.status!r}, '
+            f'size={self.size}, elapsed={self.elapsed:.6f})')
+
+    @property
+    def elapsed(self) -> float:
+        return self.end - self.start
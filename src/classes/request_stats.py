@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import threading
+from bisect import bisect_left
+
+from src.classes.request_event import RequestEvent
+from src.constants import constants
+
+
+class Histogram:
+    def __init__(self, buckets: list) -> None:
+        self.buckets = buckets
+        # The last count is for values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.size = 0
+
+    def observe(self, value: float, size: int = 0) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.size += size
+
+    def copy(self) -> 'Histogram':
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.size = self.size
+        return histogram
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+
+        # Interpolated within the bucket the rank falls in, the same
+        # estimate Prometheus makes from a histogram
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class RequestStats:
+    BUCKETS = constants.REQUEST_STATS_BUCKETS
+
+    def __init__(self, buckets: list = BUCKETS) -> None:
+        self.buckets = sorted(buckets)
+        self.histograms = {}
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: RequestEvent) -> None:
+        key = (event.endpoint, event.phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(self.buckets)
+                self.histograms[key] = histogram
+            histogram.observe(event.elapsed, event.size)
+
+            if event.phase == RequestEvent.SEND:
+                statuses = self.statuses.setdefault(event.endpoint, {})
+                statuses[event.status] = statuses.get(event.status, 0) + 1
+
+    def histogram(self, endpoint: str, phase: str) -> Histogram | None:
+        return self.histograms.get((endpoint, phase))
+
+    def snapshot(self) -> tuple:
+        # Copies that another thread can read while requests carry on
+        with self._lock:
+            histograms = {
+                key: histogram.copy()
+                for key, histogram in self.histograms.items()}
+            statuses = {
+                endpoint: dict(counts)
+                for endpoint, counts in self.statuses.items()}
+        return histograms, statuses
+
+    def summary(self) -> list:
+        lines = []
+        with self._lock:
+            endpoints = sorted({endpoint for endpoint, _ in self.histograms})
+            for endpoint in endpoints:
+                statuses = self.statuses.get(endpoint, {})
+                codes = ', '.join(
+                    f'{status}: {count}'
+                    for status, count in sorted(
+                        statuses.items(), key=lambda item: str(item[0])))
+                lines.append(f'{endpoint} {codes}'.rstrip())
+                for phase in RequestEvent.PHASES:
+                    histogram = self.histograms.get((endpoint, phase))
+                    if histogram is None:
+                        continue
+                    p50 = histogram.quantile(0.5) * 1000
+                    p99 = histogram.quantile(0.99) * 1000
+                    lines.append(
+                        f'  {phase:<8} {histogram.count:>8} calls'
+                        f' {p50:>10.2f} ms p50 {p99:>10.2f} ms p99'
+                        f' {histogram.sum:>9.2f}s total'
+                        f' {histogram.size:>12} bytes')
+        return lines
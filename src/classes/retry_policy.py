@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import random
+
+import requests
+
+from src.constants import constants
+
+
+class RetryPolicy:
+    ATTEMPTS = constants.QUALYS_API_RETRY_ATTEMPTS
+    BASE_DELAY = constants.QUALYS_API_RETRY_BASE_DELAY
+    MAX_DELAY = constants.QUALYS_API_RETRY_MAX_DELAY
+    STATUS_CODES = frozenset(constants.QUALYS_API_RETRY_STATUS_CODES)
+    UNSAFE_STATUS_CODES = frozenset(
+        constants.QUALYS_API_RETRY_UNSAFE_STATUS_CODES)
+
+    def __init__(
+            self,
+            attempts: int = ATTEMPTS,
+            base_delay: float = BASE_DELAY,
+            max_delay: float = MAX_DELAY) -> None:
+        if attempts < 1:
+            raise ValueError('Attempts must be at least 1')
+
+        if base_delay < 0 or max_delay < 0:
+            raise ValueError('Delays must be at least 0')
+
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry_status(self, status_code: int, idempotent: bool) -> bool:
+        if status_code in self.STATUS_CODES:
+            return True
+
+        # A 5xx can come back after Qualys already acted on the request,
+        # sending it again is only safe when repeating it changes nothing
+        return idempotent and status_code in self.UNSAFE_STATUS_CODES
+
+    def should_retry_exception(
+            self,
+            error: requests.RequestException,
+            idempotent: bool) -> bool:
+        # A connect timeout means the request never left this machine
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return idempotent
+        return False
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter keeps every worker that failed together from
+        # retrying together
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+from collections import deque
+from typing import Iterable, Iterator, Mapping
+
+from src.classes.journal import Journal
+from src.classes.run_log import RunLog
+from src.classes.user_directory import UserDirectory
+
+
+class RunJournal:
+    DONE = 'done'
+    EXISTS = 'exists'
+
+    def __init__(self, journal: Journal, run_log: RunLog) -> None:
+        self.journal = journal
+        self.run_log = run_log
+        self.keys = deque()
+        self.skipped = 0
+        self.existing = 0
+
+    def rows(
+            self,
+            rows: Iterable[Mapping],
+            directory: UserDirectory) -> Iterator[Mapping]:
+        # Users created by an earlier run are in the directory too and must
+        # not be mistaken for another row that shares the same mailbox
+        for login in self.journal.logins():
+            directory.claim_login(login)
+
+        for i, row in enumerate(rows):
+            # Row numbers match the file, the header is on line 1
+            email = row.get('email', '')
+            key = f'{i + 2}:{email}'
+            if self.journal.status(key) == Journal.DONE:
+                # A row matched to an existing user stays counted as one
+                reason = self.journal.reason(key) or self.DONE
+                self.run_log.event(
+                    'skipped', line=i + 2, email=email, reason=reason)
+                if reason == self.EXISTS:
+                    self.existing += 1
+                else:
+                    self.skipped += 1
+                continue
+
+            # Each row is journaled before it is sent, so a row left pending
+            # by a run that died is only sent again if it does not exist yet
+            user = directory.claim(email, row.get('external_id'))
+            if user:
+                self.run_log.event('skipped', line=i + 2, email=email,
+                                   login=user[0], reason=self.EXISTS)
+                self.journal.record(key, True, user[0], self.EXISTS)
+                self.existing += 1
+                continue
+
+            self.journal.begin(key)
+            self.keys.append(key)
+            yield row
+
+    def record_row(self, result: str | tuple | None) -> None:
+        # Results come back in roster order, so the oldest key is always
+        # the one for this result however far ahead rows were pulled
+        login = result[0] if isinstance(result, tuple) else result
+        self.journal.record(self.keys.popleft(), bool(result), login or '')
+
+    def logins(self, usernames: Iterable[str]) -> list:
+        logins = []
+        for username in usernames:
+            if self.journal.status(username) == Journal.DONE:
+                self.run_log.event(
+                    'skipped', login=username, reason=self.DONE)
+                self.skipped += 1
+                continue
+            logins.append(username)
+
+        # A reset is safe to repeat so pending users are simply retried
+        for username in logins:
+            self.journal.begin(username)
+        return logins
+
+    def record_login(self, username: str, result: str | tuple | None) -> None:
+        self.journal.record(username, bool(result))
+
+    def close(self) -> None:
+        self.journal.close()
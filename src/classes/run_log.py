@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+from src.constants import constants
+
+
+class RunLog:
+    MAX_BYTES = constants.RUN_LOG_MAX_BYTES
+    BACKUPS = constants.RUN_LOG_BACKUPS
+
+    def __init__(
+            self,
+            log_file: str,
+            max_bytes: int = MAX_BYTES,
+            backups: int = BACKUPS,
+            **fields) -> None:
+        if max_bytes < 1:
+            raise ValueError('Max bytes must be at least 1')
+
+        if backups < 0:
+            raise ValueError('Backups must be at least 0')
+
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backups = backups
+        # Every event of this run carries the same run id and fields, so
+        # runs can be told apart once they share a file
+        self.fields = {'run': uuid.uuid4().hex, **fields}
+        self.closed = False
+        self.file = open(log_file, 'a')
+        self.size = self.file.tell()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'RunLog':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def event(self, name: str, **fields) -> None:
+        # The request path only ever queues the event, the writer thread
+        # does the encoding and the I/O
+        if self.closed:
+            return
+        self._queue.put({'ts': time.time(), **self.fields, 'event': name,
+                         **fields})
+
+    def _run(self) -> None:
+        while True:
+            # Whatever queued up while the last batch was written goes out
+            # in one write and one flush
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            lines = [json.dumps(entry, default=str) + '\n'
+                     for entry in batch if entry is not None]
+            try:
+                self._write(lines)
+            except OSError as e:
+                print(f'Unable to write {self.log_file}: {e}')
+            if stop:
+                return
+
+    def _write(self, lines: list) -> None:
+        for line in lines:
+            # json.dumps escapes everything outside ASCII, so the length
+            # of a line is its size in bytes
+            if self.size > 0 and self.size + len(line) > self.max_bytes:
+                self._rotate()
+            self.file.write(line)
+            self.size += len(line)
+        self.file.flush()
+
+    def _rotate(self) -> None:
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            backup = f'{self.log_file}.{i}'
+            if os.path.exists(backup):
+                os.replace(backup, f'{self.log_file}.{i + 1}')
+
+        if self.backups > 0:
+            os.replace(self.log_file, f'{self.log_file}.1')
+        self.file = open(self.log_file, 'w')
+        self.size = 0
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self.file.close()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+
+class UserDirectory:
+    def __init__(self) -> None:
+        self.by_login = {}
+        self.by_id = {}
+        self.by_email = {}
+        self.by_external_id = {}
+        self.claimed = set()
+
+    def __len__(self) -> int:
+        return len(self.by_login)
+
+    def __contains__(self, login: str) -> bool:
+        return login in self.by_login
+
+    def __iter__(self):
+        return iter(self.by_login.values())
+
+    def add(self, user: tuple) -> None:
+        username, userid, email = user[:3]
+        self.by_login[username] = user
+        self.by_id[userid] = user
+
+        # Trainers commonly reuse one mailbox for many accounts so an
+        # email address can point at more than one user
+        key = email.lower() if email else ''
+        self.by_email.setdefault(key, []).append(user)
+
+        external_id = user[3] if len(user) > 3 else None
+        if external_id:
+            self.by_external_id.setdefault(external_id, []).append(user)
+
+    def clear(self) -> None:
+        self.by_login.clear()
+        self.by_id.clear()
+        self.by_email.clear()
+        self.by_external_id.clear()
+        self.claimed.clear()
+
+    def get_by_login(self, login: str) -> tuple | None:
+        return self.by_login.get(login)
+
+    def get_by_id(self, userid: str) -> tuple | None:
+        return self.by_id.get(userid)
+
+    def get_by_email(self, email: str) -> list:
+        key = email.lower() if email else ''
+        return self.by_email.get(key, [])
+
+    def get_by_external_id(self, external_id: str) -> list:
+        return self.by_external_id.get(external_id, [])
+
+    def claim_login(self, login: str) -> None:
+        self.claimed.add(login)
+
+    def claim(
+            self,
+            email: str,
+            external_id: str | None = None) -> tuple | None:
+        # Each existing user can only stand in for one roster row, so a
+        # roster listing one mailbox five times matches at most five users
+        if external_id:
+            users = self.get_by_external_id(external_id)
+        else:
+            users = self.get_by_email(email)
+
+        for user in users:
+            if user[0] not in self.claimed:
+                self.claimed.add(user[0])
+                return user
+        return None
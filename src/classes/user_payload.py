@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+from collections.abc import Mapping
+from typing import Iterator
+from urllib.parse import urlencode
+
+from src.constants import constants
+
+
+class UserPayload(Mapping):
+    REQUIRED_USER_FIELDS = constants.QUALYS_API_REQUIRED_USER_FIELDS
+    OPTIONAL_USER_FIELDS = constants.QUALYS_API_OPTIONAL_USER_FIELDS
+    __slots__ = ('_values',)
+
+    def __init__(self, values: Mapping) -> None:
+        self._values = values
+
+    def __getitem__(self, key: str):
+        if key in self.REQUIRED_USER_FIELDS:
+            if key in self._values:
+                return self._values[key]
+            return self.REQUIRED_USER_FIELDS[key]
+
+        if key in self.OPTIONAL_USER_FIELDS:
+            return self._values[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.REQUIRED_USER_FIELDS
+        for key in self.OPTIONAL_USER_FIELDS:
+            if key in self._values:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    def encode(self) -> str:
+        return urlencode(list(self.items()))
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+from xml.parsers import expat
+
+import xmltodict
+
+from src.classes.api_response import ApiResponse
+from src.constants import constants
+
+
+class XmltodictParser:
+    NAME = 'xmltodict'
+    USER_PATHS = constants.XML_PARSER_USER_PATHS
+    USER_FIELDS = constants.XML_PARSER_USER_FIELDS
+
+    def _find(self, data: dict, path: tuple):
+        for key in path:
+            if not isinstance(data, dict) or key not in data:
+                return None
+            data = data[key]
+        return data
+
+    def _users(self, data: dict, root: str) -> list:
+        users = []
+        for path in self.USER_PATHS.get(root, []):
+            user_list = self._find(data, path)
+            if user_list is None:
+                continue
+
+            if isinstance(user_list, dict):
+                user_list = [user_list]
+
+            for user in user_list:
+                user_details = {}
+                for field, field_path in self.USER_FIELDS.items():
+                    value = self._find(user, field_path)
+                    if value is not None:
+                        user_details[field] = value
+                users.append(user_details)
+        return users
+
+    def parse(self, status_code: int, text: str, root: str) -> ApiResponse:
+        data = xmltodict.parse(text)[root] or {}
+        xml_return = data.get('RETURN') or {}
+        return ApiResponse(
+            status_code,
+            xml_return.get('@status', ''),
+            int(xml_return.get('@number', 0)),
+            xml_return.get('MESSAGE', ''),
+            data,
+            self._users(data, root))
+
+
+class ExpatParser:
+    NAME = 'expat'
+    USER_PATHS = constants.XML_PARSER_USER_PATHS
+    USER_FIELDS = constants.XML_PARSER_USER_FIELDS
+
+    def __init__(self) -> None:
+        self._cache = {}
+
+    def _paths(self, root: str) -> tuple:
+        if root in self._cache:
+            return self._cache[root]
+
+        user_paths = set()
+        field_paths = {}
+        for path in self.USER_PATHS.get(root, []):
+            user_path = (root, *path)
+            user_paths.add(user_path)
+            for field, field_path in self.USER_FIELDS.items():
+                field_paths[user_path + field_path] = field
+
+        # Every ancestor of a wanted element has to be walked into, any
+        # other element is skipped along with everything below it
+        wanted = {(root,), (root, 'RETURN'), (root, 'RETURN', 'MESSAGE')}
+        for path in [*user_paths, *field_paths]:
+            for i in range(1, len(path) + 1):
+                wanted.add(path[:i])
+        self._cache[root] = (user_paths, field_paths, wanted)
+        return self._cache[root]
+
+    def parse(self, status_code: int, text: str, root: str) -> ApiResponse:
+        user_paths, field_paths, wanted = self._paths(root)
+        return_path = (root, 'RETURN')
+        message_path = (root, 'RETURN', 'MESSAGE')
+        parser = expat.ParserCreate()
+
+        path = [()]
+        skip = 0
+        user = None
+        users = []
+        text_parts = []
+        result = {'status': '', 'number': 0, 'message': '', 'root': ''}
+
+        def start_element(name, attrs):
+            nonlocal skip, user
+            if skip:
+                skip += 1
+                return
+
+            current = path[-1] + (name,)
+            if current not in wanted:
+                if len(current) == 1:
+                    result['root'] = name
+                skip = 1
+                return
+
+            path.append(current)
+            if len(current) == 1:
+                result['root'] = name
+            elif current == return_path:
+                result['status'] = attrs.get('status', '')
+                result['number'] = int(attrs.get('number', 0))
+            elif current in user_paths:
+                user = {}
+            elif current in field_paths or current == message_path:
+                text_parts.clear()
+                parser.CharacterDataHandler = text_parts.append
+
+        def end_element(name):
+            nonlocal skip, user
+            if skip:
+                skip -= 1
+                return
+
+            current = path.pop()
+            if current in user_paths:
+                users.append(user)
+                user = None
+            elif current in field_paths:
+                parser.CharacterDataHandler = None
+                value = ''.join(text_parts).strip() or None
+                user[field_paths[current]] = value
+            elif current == message_path:
+                parser.CharacterDataHandler = None
+                result['message'] = ''.join(text_parts).strip()
+
+        parser.buffer_text = True
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        parser.Parse(text, True)
+        if result['root'] != root:
+            raise KeyError(root)
+
+        return ApiResponse(
+            status_code,
+            result['status'],
+            result['number'],
+            result['message'],
+            users=users)
+
+
+XML_PARSERS = {
+    XmltodictParser.NAME: XmltodictParser,
+    ExpatParser.NAME: ExpatParser
+}
+
+
+def get_xml_parser(name: str) -> XmltodictParser | ExpatParser:
+    try:
+        return XML_PARSERS[name]()
+    except KeyError:
+        raise ValueError(f'Unknown XML parser: {name}')
@@ -15,6 +15,26 @@ QUALYS_API_CREDENTIALS_KEYS = ['username', 'password', 'host']
 QUALYS_API_USER_AGENT = 'Python3Requests'
 QUALYS_API_CONTENT_TYPE = 'application/x-www-form-urlencoded'
 QUALYS_API_SCHEME = 'https://'
+QUALYS_API_POOL_SIZE = 10
+QUALYS_API_DEFAULT_WORKERS = 1
+QUALYS_API_RATE_LIMIT_REMAINING_HEADER = 'X-RateLimit-Remaining'
+QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER = 'X-RateLimit-ToWait-Sec'
+QUALYS_API_CONCURRENCY_LIMIT_HEADER = 'X-Concurrency-Limit-Limit'
+QUALYS_API_CONNECT_TIMEOUT = 10.0
+QUALYS_API_READ_TIMEOUT = 60.0
+QUALYS_API_LATENCY_BUDGET = 10.0
+QUALYS_API_RETRY_ATTEMPTS = 4
+QUALYS_API_RETRY_BASE_DELAY = 1.0
+QUALYS_API_RETRY_MAX_DELAY = 30.0
+QUALYS_API_RETRY_STATUS_CODES = [409, 429, 503]
+QUALYS_API_RETRY_UNSAFE_STATUS_CODES = [500, 502, 504]
+QUALYS_API_PASSWORD_CHANGE_BATCH_SIZE = 100
+QUALYS_API_ASYNC_CONCURRENCY = 100
+QUALYS_API_ASYNC_CHUNK_SIZE = 64 * 1024
+QUALYS_API_FAILURE_REASON_LENGTH = 100
+QUALYS_API_XML_PARSER = 'expat'
+QUALYS_API_PREFLIGHT_PROCESS_BYTES = 8 * 1024 * 1024
+QUALYS_API_PREFLIGHT_CHUNK_SIZE = 1000
 QUALYS_API_REQUIRED_USER_FIELDS = {
     'action': 'add',
     'user_role': 'reader',
@@ -30,6 +50,10 @@ QUALYS_API_REQUIRED_USER_FIELDS = {
     'state': 'California',
     'send_email': 0
 }
+QUALYS_API_REQUIRED_USER_COLUMNS = [
+    'user_role', 'business_unit', 'first_name', 'last_name', 'title',
+    'phone', 'email', 'address1', 'city', 'country', 'state'
+]
 QUALYS_API_OPTIONAL_USER_FIELDS = [
     'asset_groups', 'fax', 'address2', 'zip_code', 'external_id'
 ]
@@ -120,7 +144,87 @@ QUALYS_API_VALID_IN_STATES = [
     'Sikkim', 'Tamil Nadu', 'Tripura', 'Uttar Pradesh', 'Uttaranchal',
     'West Benga'
 ]
+QUALYS_API_VALID_STATES = {
+    'United States of America': QUALYS_API_VALID_US_STATES,
+    'Australia': QUALYS_API_VALID_AUS_STATES,
+    'Canada': QUALYS_API_VALID_CAN_STATES,
+    'India': QUALYS_API_VALID_IN_STATES
+}
 QUALYS_API_USERNAME_FORMAT = 'quays'
+QUALYS_API_FIELD_PATTERNS = {
+    'asset_group': r"^\w+([\,\w]+)?$",
+    'name': r"^[A-z0-9\,\.\-\s]{,50}$",
+    'title': r"^[A-z0-9\,\.\-\s]{,100}$",
+    'phone': r"^[0-9\+\-\(\)\s]{,40}$",
+    'fax': r"^\d{,40}$",
+    'email': r"^[A-z0-9\.\-\_]+\@[A-z0-9\.\-]+\.\w{2,}",
+    'address': r"^[A-z0-9\,\.\-\s]{,80}$",
+    'city': r"^[A-z0-9\,\.\-\s]{,50}$",
+    'zip_code': r"^\d{,20}$",
+    'external_id': r"^[A-z]{,256}$",
+    'username': r"^" + QUALYS_API_USERNAME_FORMAT + r"[a-z0-9]{3,}"
+}
+QUALYS_API_REQUIRED_FIELD_RULES = [
+    ('first_name', 'name', 'Invalid First Name'),
+    ('last_name', 'name', 'Invalid Last Name'),
+    ('title', 'title', 'Invalid Title'),
+    ('phone', 'phone', 'Invalid Phone Number'),
+    ('email', 'email', 'Invalid Email Address'),
+    ('address1', 'address', 'Invalid Street Address'),
+    ('city', 'city', 'Invalid City')
+]
+QUALYS_API_OPTIONAL_FIELD_RULES = [
+    ('fax', 'fax', 'Invalid Fax'),
+    ('address2', 'address', 'Invalid Street Address'),
+    ('zip_code', 'zip_code', 'Invalid Zip Code'),
+    ('external_id', 'external_id', 'Invalid External ID')
+]
+QUALYS_API_ASSET_GROUP_ROLES = ['manager', 'unit_manager']
+
+# csv_parser
+CSV_PARSER_SAMPLE_SIZE = 64 * 1024
+CSV_PARSER_DELIMITERS = ',;|'
+CSV_PARSER_CHUNK_SIZE = 4 * 1024 * 1024
+
+# csv_writer
+CSV_WRITER_BATCH_SIZE = 1
+
+# journal
+JOURNAL_DIRECTORY = './logs'
+JOURNAL_STATUS_PENDING = 'pending'
+JOURNAL_STATUS_DONE = 'done'
+JOURNAL_STATUS_FAILED = 'failed'
+
+# request_event
+REQUEST_EVENT_VALIDATE = 'validate'
+REQUEST_EVENT_WAIT = 'wait'
+REQUEST_EVENT_SEND = 'send'
+REQUEST_EVENT_RECEIVE = 'receive'
+REQUEST_EVENT_PARSE = 'parse'
+REQUEST_EVENT_RETRY = 'retry'
+
+# request_stats
+# Upper bounds in seconds, validation and parsing take microseconds while
+# a Qualys call can take a minute
+REQUEST_STATS_BUCKETS = [
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+]
+
+# run_log
+RUN_LOG_FILE = './logs/qualys_qsc.log'
+RUN_LOG_MAX_BYTES = 10 * 1024 * 1024
+RUN_LOG_BACKUPS = 5
+RUN_LOG_PROGRESS_INTERVAL = 100
+
+# metrics_exporter
+METRICS_EXPORTER_DIRECTORY = './logs'
+METRICS_EXPORTER_INTERVAL = 15.0
+METRICS_EXPORTER_PREFIX = 'qualys_qsc'
+METRICS_EXPORTER_SUCCESS_METRICS = {
+    'create': 'users_created',
+    'reset': 'passwords_reset'
+}
 
 # mailmerge
 MAILMERGE_TEMPLATE_KEYS = [
@@ -129,3 +233,17 @@ MAILMERGE_TEMPLATE_KEYS = [
 MAILMERGE_SERVER_KEYS = [
     'host', 'port', 'username', 'security', 'ratelimit'
 ]
+
+# xml_parser
+XML_PARSER_USER_PATHS = {
+    'USER_OUTPUT': [('USER',)],
+    'PASSWORD_CHANGE_OUTPUT': [('RETURN', 'CHANGES', 'USER_LIST', 'USER')],
+    'USER_LIST_OUTPUT': [('USER_LIST', 'USER')]
+}
+XML_PARSER_USER_FIELDS = {
+    'USER_LOGIN': ('USER_LOGIN',),
+    'PASSWORD': ('PASSWORD',),
+    'USER_ID': ('USER_ID',),
+    'EMAIL': ('CONTACT_INFO', 'EMAIL'),
+    'EXTERNAL_ID': ('EXTERNAL_ID',)
+}
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+from src.classes.api_response import ApiResponse
+
+
+class TestApiResponse:
+    def test_defaults(self):
+        response = ApiResponse(200)
+        assert response.status == ''
+        assert response.number == 0
+        assert response.message == ''
+        assert response.data == {}
+
+    def test_ok(self):
+        response = ApiResponse(200, 'SUCCESS', 0, 'Done', {'USER': {}})
+        assert response.ok is True
+
+    def test_ok_no_status(self):
+        response = ApiResponse(200, data={'USER_LIST': {}})
+        assert response.ok is True
+
+    def test_ok_failed_status_code(self):
+        response = ApiResponse(401, 'FAILED', 401, 'ACCESS DENIED')
+        assert response.ok is False
+
+    def test_ok_failed_status(self):
+        response = ApiResponse(200, 'FAILED', 1903, 'Fake error')
+        assert response.ok is False
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from src.classes.async_qualys_api import AsyncQualysApi
+from src.classes.retry_policy import RetryPolicy
+
+
+def read(file: str) -> str:
+    with open(f'tests/data/{file}', 'r') as f:
+        return f.read()
+
+
+class TestAsyncQualysApi:
+    def setUp(self):
+        self.credentials_file = 'tests/data/credentials.yaml'
+        self.qa = AsyncQualysApi(
+            self.credentials_file,
+            concurrency=4,
+            retry=RetryPolicy(base_delay=0))
+        self.requests = []
+        self.headers = {}
+        self.latency = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    def tearDown(self):
+        del self.requests
+        del self.qa
+        del self.credentials_file
+
+    async def serve(self, routes: dict) -> web.AppRunner:
+        async def handler(request):
+            body = await request.text()
+            self.requests.append((
+                request.method, request.path, body,
+                request.headers.get('Authorization')))
+            responses = routes[request.path]
+            status, text = responses.pop(0) if len(responses) > 1 \
+                else responses[0]
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(self.latency)
+            self.in_flight -= 1
+            return web.Response(status=status, text=text, headers=self.headers)
+
+        app = web.Application()
+        for path in routes:
+            app.router.add_route('*', path, handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        self.qa.SCHEME = 'http://'
+        self.qa.headers['Host'] = f'127.0.0.1:{port}'
+        return runner
+
+    def run(self, routes: dict, func):
+        async def main():
+            runner = await self.serve(routes)
+            try:
+                async with self.qa:
+                    return await func()
+            finally:
+                await runner.cleanup()
+        return asyncio.run(main())
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            AsyncQualysApi('tests/data/credentials.yaml', concurrency=0)
+
+    def test_sync_context_manager(self):
+        qa = AsyncQualysApi('tests/data/credentials.yaml')
+        with pytest.raises(TypeError):
+            with qa:
+                pass
+
+    def test_test(self):
+        self.setUp()
+        routes = {'/api/2.0/fo/report/': [(200, '')]}
+        assert self.run(routes, self.qa.test) is True
+        self.tearDown()
+
+    def test_test_failed(self):
+        self.setUp()
+        routes = {'/api/2.0/fo/report/': [(401, 'ACCESS DENIED')]}
+        assert self.run(routes, self.qa.test) is False
+        self.tearDown()
+
+    def test_test_retries(self):
+        self.setUp()
+        routes = {'/api/2.0/fo/report/': [(503, ''), (200, '')]}
+        assert self.run(routes, self.qa.test) is True
+        assert len(self.requests) == 2
+        retry = self.qa.stats.histogram('/api/2.0/fo/report/', 'retry')
+        assert retry.count == 1
+        self.tearDown()
+
+    def test_list_users(self):
+        self.setUp()
+        self.qa.CHUNK_SIZE = 256
+        routes = {'/msp/user_list.php': [(200, read('list_users.xml'))]}
+        assert self.run(routes, self.qa.list_users) is True
+        assert self.qa.users[0] == (
+            'quays4la3', '1387042', 'test@test.com', None)
+        assert len(self.qa.directory) == 2
+        self.tearDown()
+
+    def test_list_users_failed(self):
+        self.setUp()
+        routes = {
+            '/msp/user_list.php': [(200, read('list_users_failed.xml'))]}
+        assert self.run(routes, self.qa.list_users) is False
+        assert len(self.qa.failed_user) == 1
+        self.tearDown()
+
+    def test_list_users_unexpected_root(self):
+        self.setUp()
+        routes = {'/msp/user_list.php': [(200, '<html>Maintenance</html>')]}
+        assert self.run(routes, self.qa.list_users) is False
+        assert self.qa.failed_user[0][2] == 'Unexpected html response'
+        self.tearDown()
+
+    def test_list_users_truncated(self):
+        self.setUp()
+        self.qa.CHUNK_SIZE = 256
+        data = read('list_users.xml')
+        data = data[:data.rindex('</USER>')]
+        routes = {'/msp/user_list.php': [(200, data)]}
+        assert self.run(routes, self.qa.list_users) is False
+        assert self.qa.users == []
+        assert len(self.qa.directory) == 0
+        self.tearDown()
+
+    def test_add_user(self):
+        self.setUp()
+        routes = {'/msp/user.php': [(200, read('xml_response.xml'))]}
+        assert self.run(routes, self.qa.add_user) is True
+        assert self.qa.user[0] == ('quays6qt84', 'lWby3dX#')
+        assert 'action=add' in self.requests[0][2]
+        assert self.requests[0][3] == 'Basic c29tZXVzZXI6c29tZXBhc3N3b3Jk'
+        self.tearDown()
+
+    def test_add_user_not_retried_after_server_error(self):
+        self.setUp()
+        routes = {'/msp/user.php': [(500, '')]}
+        assert self.run(routes, self.qa.add_user) is False
+        assert len(self.requests) == 1
+        assert self.qa.failed_user[0][1] == 500
+        self.tearDown()
+
+    def test_add_users(self):
+        self.setUp()
+        routes = {'/msp/user.php': [(200, read('xml_response.xml'))]}
+        rows = [{'email': f'user{i}@test.com'} for i in range(10)]
+
+        async def add_users():
+            return [item async for item in self.qa.add_users(rows)]
+
+        results = self.run(routes, add_users)
+        assert [row for row, _ in results] == rows
+        assert all(result is not None for _, result in results)
+        assert len(self.requests) == 10
+        self.tearDown()
+
+    def test_reset_passwords(self):
+        self.setUp()
+        data = read('password_change_multiple_users.xml')
+        routes = {'/msp/password_change.php': [(200, data)]}
+
+        async def reset_passwords():
+            return await self.qa.reset_passwords(
+                ['quays7cx25', 'quays8dy36'], 0)
+
+        results = self.run(routes, reset_passwords)
+        assert results['quays7cx25'] == ('quays7cx25', 'password1!')
+        assert results['quays8dy36'] == ('quays8dy36', 'password2!')
+        assert 'user_logins=quays7cx25%2Cquays8dy36' in self.requests[0][2]
+        self.tearDown()
+
+    def test_reset_password_other_user_returned(self):
+        self.setUp()
+        data = read('password_change_multiple_users.xml')
+        routes = {'/msp/password_change.php': [(200, data)]}
+
+        async def reset_password():
+            return await self.qa.reset_password('quaysabc1', 0)
+
+        assert self.run(routes, reset_password) is False
+        assert self.qa.user == []
+        assert self.qa.failed_user == [
+            ('quaysabc1', 404, 'Password not reset')]
+        self.tearDown()
+
+    def test_reset_password_invalid_username(self):
+        self.setUp()
+
+        async def reset_password():
+            return await self.qa.reset_password('bad user', 0)
+
+        assert asyncio.run(reset_password()) is False
+        assert self.qa.failed_user[0][2] == 'Invalid username format'
+        self.tearDown()
+
+    def test_hooks(self):
+        self.setUp()
+        events = []
+        self.qa.add_hook(events.append)
+        data = read('xml_response.xml')
+        routes = {'/msp/user.php': [(200, data)]}
+        assert self.run(routes, self.qa.add_user) is True
+        phases = [(event.phase, event.status) for event in events]
+        assert phases == [
+            ('validate', None),
+            ('wait', None),
+            ('send', 200),
+            ('receive', 200),
+            ('parse', 200)]
+        assert events[3].size == len(data.encode())
+        self.tearDown()
+
+    def test_hooks_list_users(self):
+        self.setUp()
+        self.qa.CHUNK_SIZE = 256
+        data = read('list_users.xml')
+        routes = {'/msp/user_list.php': [(200, data)]}
+        assert self.run(routes, self.qa.list_users) is True
+        parse = self.qa.stats.histogram('/msp/user_list.php', 'parse')
+        assert parse.count == 1
+        assert parse.size == len(data.encode())
+        self.tearDown()
+
+    def test_concurrency_limit_header(self):
+        self.setUp()
+        self.headers = {'X-Concurrency-Limit-Limit': '2'}
+        self.latency = 0.02
+        routes = {'/msp/user.php': [(200, read('xml_response.xml'))]}
+
+        async def add_users():
+            await self.qa.add_user()
+            self.peak = 0
+            rows = [{'first_name': 'Ryan'}] * 12
+            return [user async for _, user in self.qa.add_users(rows)]
+        users = self.run(routes, add_users)
+        assert all(users)
+        assert self.qa.limiter.concurrency == 2
+        assert self.peak == 2
+        assert self.qa.limiter.running == 0
+        self.tearDown()
+
+    def test_cancelled_requests_free_their_slots(self):
+        self.setUp()
+        self.qa.limiter.concurrency = 1
+        self.latency = 0.5
+        routes = {'/api/2.0/fo/report/': [(200, '')]}
+
+        async def cancel():
+            # One request is in flight, the other waits in the limiter
+            sending = asyncio.ensure_future(self.qa.test())
+            waiting = asyncio.ensure_future(self.qa.test())
+            while self.in_flight == 0:
+                await asyncio.sleep(0.01)
+            for task in (sending, waiting):
+                task.cancel()
+            await asyncio.gather(sending, waiting, return_exceptions=True)
+            assert self.qa.limiter.running == 0
+            assert self.qa.semaphore._value == 4
+            self.latency = 0
+            return await asyncio.wait_for(self.qa.test(), 5)
+
+        assert self.run(routes, cancel) is True
+        self.tearDown()
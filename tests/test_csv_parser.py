@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import csv
 import os
+from collections.abc import Mapping
 
 import pytest
 
@@ -22,7 +24,14 @@ class TestCsvParser:
         header = ['key1', 'key2', 'key3', 'key4', 'key5']
         values = ['val1', 'val2', 'val4', 'val5']
         result = self.csv._get_row_data(header, values)
-        assert result == {}
+        assert result == {
+            'key1': 'val1',
+            'key2': 'val2',
+            'key3': 'val4',
+            'key4': 'val5',
+            'key5': None
+        }
+        assert self.csv._get_row_data(header, []) == dict.fromkeys(header)
         self.tearDown()
 
     def test_get_row_data_all_values(self):
@@ -30,7 +39,7 @@ class TestCsvParser:
         header = ['key1', 'key2', 'key3', 'key4', 'key5']
         values = ['val1', 'val2', 'val3', 'val4', 'val5']
         result = self.csv._get_row_data(header, values)
-        assert isinstance(result, dict)
+        assert isinstance(result, Mapping)
         assert result == {
             'key1': 'val1',
             'key2': 'val2',
@@ -45,7 +54,7 @@ class TestCsvParser:
         header = ['key1', 'key2', 'key3', 'key4', 'key5']
         values = ['val1', 'val2', '', 'val4', 'val5']
         result = self.csv._get_row_data(header, values)
-        assert isinstance(result, dict)
+        assert isinstance(result, Mapping)
         assert result == {
             'key1': 'val1',
             'key2': 'val2',
@@ -89,12 +98,156 @@ class TestCsvParser:
         assert isinstance(result, list)
         assert len(result) == 4
         row = result[0]
-        assert isinstance(row, dict)
+        assert isinstance(row, Mapping)
         assert len(row) == 11
         assert 'email' in row.keys()
         assert 'bowen@qualys.com' == row['email']
         self.tearDown()
 
+    def test_iter_csv(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        result = parser.iter_csv()
+        assert not isinstance(result, list)
+        row = next(result)
+        assert len(row) == 11
+        assert row['email'] == 'bowen@qualys.com'
+        rows = list(result)
+        assert len(rows) == 2
+        assert rows[0]['first_name'] == 'Ryan'
+        assert rows[1]['email'] == 'jdoe@qualys.com'
+        assert rows[1]['phone'] is None
+
+    def test_iter_csv_missing_file(self):
+        parser = CsvParser('tests/data/missing.csv')
+        assert list(parser.iter_csv()) == []
+
+    def test_iter_csv_empty_file(self):
+        parser = CsvParser('tests/data/empty_database.csv')
+        assert list(parser.iter_csv()) == []
+
+    def test_iter_csv_bad_delimiter(self):
+        parser = CsvParser('tests/data/bad_delimiter_database.csv')
+        assert list(parser.iter_csv()) == []
+
+    def test_iter_csv_header_only(self):
+        parser = CsvParser('tests/data/mailmerge_database.csv')
+        assert list(parser.iter_csv()) == []
+
+    def test_iter_csv_quoted_fields(self, tmp_path):
+        file = tmp_path / 'users.csv'
+        file.write_text(
+            'email,first_name,address1,city\n'
+            'bowen@qualys.com,Benjamin,"4020 Westchase Blvd, Suite 1",'
+            'Raleigh\n')
+        rows = list(CsvParser(str(file)).iter_csv())
+        assert len(rows) == 1
+        assert rows[0]['address1'] == '4020 Westchase Blvd, Suite 1'
+        assert rows[0]['city'] == 'Raleigh'
+
+    def test_iter_csv_semicolon(self, tmp_path):
+        file = tmp_path / 'users.csv'
+        file.write_text(
+            'email;first_name;city\n'
+            'bowen@qualys.com;Benjamin;Raleigh, NC\n')
+        rows = list(CsvParser(str(file)).iter_csv())
+        assert rows[0]['city'] == 'Raleigh, NC'
+
+    def test_sniff_dialect_cached(self, tmp_path, monkeypatch):
+        file = tmp_path / 'users.csv'
+        file.write_text('email|first_name\nbowen@qualys.com|Benjamin\n')
+        calls = []
+        sniff = csv.Sniffer.sniff
+
+        def mock_sniff(self, sample, delimiters=None):
+            calls.append(sample)
+            return sniff(self, sample, delimiters)
+        monkeypatch.setattr(csv.Sniffer, 'sniff', mock_sniff)
+        parser = CsvParser(str(file))
+        assert len(list(parser.iter_csv())) == 1
+        assert len(list(CsvParser(str(file)).iter_csv())) == 1
+        assert len(calls) == 1
+
+        file.write_text('email,first_name\nrarmstrong@qualys.com,Ryan\n')
+        rows = list(parser.iter_csv())
+        assert rows[0]['first_name'] == 'Ryan'
+        assert len(calls) == 2
+
+    def test_iter_chunks(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        with open('tests/data/new_users.csv', 'rb') as file:
+            data = file.read()
+        chunks = list(parser.iter_chunks(chunk_size=10))
+        assert len(chunks) == 3
+        assert chunks[0][0] == data.index(b'\n') + 1
+        assert chunks[-1][1] == len(data)
+        for start, end in chunks:
+            assert data[end - 1:end] == b'\n'
+        for previous, chunk in zip(chunks, chunks[1:]):
+            assert previous[1] == chunk[0]
+
+    def test_iter_chunks_one_chunk(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        assert len(list(parser.iter_chunks())) == 1
+
+    def test_iter_chunks_empty(self):
+        parser = CsvParser('tests/data/empty_database.csv')
+        assert list(parser.iter_chunks()) == []
+        parser = CsvParser('tests/data/missing.csv')
+        assert list(parser.iter_chunks()) == []
+
+    def test_iter_chunks_invalid_chunk_size(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        with pytest.raises(ValueError):
+            list(parser.iter_chunks(chunk_size=0))
+
+    def test_read_chunk(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        chunk = list(parser.iter_chunks(chunk_size=10))[1]
+        rows = parser.read_chunk(chunk)
+        assert len(rows) == 1
+        assert rows[0]['email'] == 'rarmstrong@qualys.com'
+
+    def test_iter_csv_mmap(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        rows = list(parser.iter_csv_mmap(chunk_size=10))
+        assert rows == list(parser.iter_csv())
+
+    def test_iter_csv_mmap_processes(self, tmp_path):
+        file = tmp_path / 'users.csv'
+        lines = ['email,first_name']
+        lines += [f'user{i}@qualys.com,"User, {i}"' for i in range(500)]
+        file.write_text('\n'.join(lines) + '\n')
+        parser = CsvParser(str(file))
+        rows = list(parser.iter_csv_mmap(processes=2, chunk_size=256))
+        assert len(rows) == 500
+        assert rows == list(parser.iter_csv())
+        assert rows[499]['first_name'] == 'User, 499'
+
+    @pytest.mark.parametrize('text, expected', [
+        ('email,address1\nbowen@qualys.com,4020 Westchase Blvd\n', True),
+        ('email,address1\nbowen@qualys.com,"Westchase, ""Suite 1"""\n',
+         True),
+        ('email,address1\nbowen@qualys.com,"4020 Westchase Blvd\n'
+         'Suite 1"\n', False),
+        ('email,address1\r\nbowen@qualys.com,"4020 Westchase Blvd\r\n'
+         'Suite 1"\r\n', False),
+        ('', True)])
+    def test_is_splittable(self, tmp_path, text, expected):
+        file = tmp_path / 'users.csv'
+        with open(file, 'w', newline='') as f:
+            f.write(text)
+        assert CsvParser(str(file)).is_splittable() is expected
+
+    def test_is_splittable_missing_file(self):
+        assert CsvParser('tests/data/missing.csv').is_splittable() is True
+
+    def test_read_csv_streamed(self):
+        parser = CsvParser('tests/data/new_users.csv')
+        result = parser.read_csv()
+        assert isinstance(result, list)
+        assert len(result) == 3
+        assert result == list(parser.iter_csv())
+
     def test_write_csv(self):
         self.setUp()
         file = 'tests/data/users.csv'
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+import pickle
+
+import pytest
+
+from src.classes.csv_record import CsvHeader, CsvRecord
+
+
+class TestCsvRecord:
+    def setUp(self):
+        self.header = CsvHeader(['email', 'first_name', 'last_name'])
+        self.record = self.header.record(
+            ['bowen@qualys.com', 'Benjamin', 'Owen'])
+
+    def tearDown(self):
+        del self.record
+        del self.header
+
+    def test_header(self):
+        self.setUp()
+        assert len(self.header) == 3
+        assert self.header.index['last_name'] == 2
+        self.tearDown()
+
+    def test_getitem(self):
+        self.setUp()
+        assert self.record['first_name'] == 'Benjamin'
+        with pytest.raises(KeyError):
+            self.record['title']
+        self.tearDown()
+
+    def test_mapping(self):
+        self.setUp()
+        assert len(self.record) == 3
+        assert list(self.record) == ['email', 'first_name', 'last_name']
+        assert 'email' in self.record
+        assert 'title' not in self.record
+        assert self.record.get('title', 'none') == 'none'
+        assert self.record == {
+            'email': 'bowen@qualys.com',
+            'first_name': 'Benjamin',
+            'last_name': 'Owen'}
+        self.tearDown()
+
+    def test_no_instance_dict(self):
+        self.setUp()
+        assert not hasattr(self.record, '__dict__')
+        self.tearDown()
+
+    def test_shared_header(self):
+        self.setUp()
+        record = self.header.record(['rarmstrong@qualys.com', 'Ryan', 'A'])
+        assert record._header is self.record._header
+        self.tearDown()
+
+    def test_replace_existing(self):
+        self.setUp()
+        result = self.record.replace(first_name='Ben')
+        assert result['first_name'] == 'Ben'
+        assert self.record['first_name'] == 'Benjamin'
+        assert result._header is self.header
+        self.tearDown()
+
+    def test_replace_new_field(self):
+        self.setUp()
+        result = self.record.replace(send_email=1)
+        assert result['send_email'] == 1
+        assert len(result) == 4
+        other = self.header.record(['a@b.com', 'A', 'B']).replace(send_email=1)
+        assert other._header is result._header
+        self.tearDown()
+
+    def test_pickle(self):
+        self.setUp()
+        result = pickle.loads(pickle.dumps(self.record))
+        assert isinstance(result, CsvRecord)
+        assert result == self.record
+        self.tearDown()
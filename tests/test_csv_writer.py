@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import pytest
+
+from src.classes.csv_writer import CsvWriter
+
+
+KEYS = ['email', 'username', 'password', 'url']
+USER = {
+    'email': 'jdoe@example.com',
+    'username': 'quays_jd',
+    'password': 'Secret1!',
+    'url': 'qualysapi.qualys.com'
+}
+
+
+class TestCsvWriter:
+    def test_writes_header(self, tmp_path):
+        csv_file = tmp_path / 'database.csv'
+        with CsvWriter(str(csv_file), KEYS):
+            pass
+        assert csv_file.read_text().splitlines() == [','.join(KEYS)]
+
+    def test_write_flushes_each_batch(self, tmp_path):
+        csv_file = tmp_path / 'database.csv'
+        writer = CsvWriter(str(csv_file), KEYS, batch_size=2)
+        writer.write(USER)
+        assert writer.pending == 1
+        writer.write(USER)
+        assert writer.pending == 0
+        assert csv_file.read_text().count('jdoe@example.com') == 2
+        writer.close()
+
+    def test_write_missing_key(self, tmp_path):
+        csv_file = tmp_path / 'database.csv'
+        with CsvWriter(str(csv_file), KEYS) as writer:
+            writer.write({'email': 'jdoe@example.com'})
+        assert csv_file.read_text().splitlines()[1] == 'jdoe@example.com,,,'
+
+    def test_append_keeps_rows(self, tmp_path):
+        csv_file = tmp_path / 'database.csv'
+        with CsvWriter(str(csv_file), KEYS) as writer:
+            writer.write(USER)
+        with CsvWriter(str(csv_file), KEYS, append=True) as writer:
+            writer.write(USER)
+        lines = csv_file.read_text().splitlines()
+        assert len(lines) == 3
+        assert lines[0] == 'email,username,password,url'
+
+    def test_truncate(self, tmp_path):
+        csv_file = tmp_path / 'database.csv'
+        with CsvWriter(str(csv_file), KEYS) as writer:
+            writer.write(USER)
+        with CsvWriter(str(csv_file), KEYS):
+            pass
+        assert len(csv_file.read_text().splitlines()) == 1
+
+    def test_close_twice(self, tmp_path):
+        writer = CsvWriter(str(tmp_path / 'database.csv'), KEYS)
+        writer.close()
+        writer.close()
+        assert writer.file.closed is True
+
+    def test_batch_size_failed(self, tmp_path):
+        with pytest.raises(ValueError):
+            CsvWriter(str(tmp_path / 'database.csv'), KEYS, batch_size=0)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+import pytest
+import requests
+
+from src.classes.deadline import Deadline, DeadlineExceeded
+
+
+class TestDeadline:
+    def test_no_deadline(self):
+        deadline = Deadline()
+        assert deadline.remaining() is None
+        assert deadline.expired() is False
+
+    def test_remaining(self):
+        deadline = Deadline(60)
+        assert 0 < deadline.remaining() <= 60
+        assert deadline.expired() is False
+
+    def test_expired(self):
+        deadline = Deadline(60)
+        deadline.expires -= 60
+        assert deadline.remaining() == 0
+        assert deadline.expired() is True
+
+    def test_invalid_deadline(self):
+        with pytest.raises(ValueError):
+            Deadline(0)
+
+    def test_deadline_exceeded_is_request_error(self):
+        assert issubclass(DeadlineExceeded, requests.RequestException)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+from src.classes.journal import Journal
+
+
+class TestJournal:
+    def test_record(self, tmp_path):
+        journal_file = str(tmp_path / 'users.csv.create.journal')
+        with Journal(journal_file) as journal:
+            journal.begin('2:jdoe@example.com')
+            assert journal.status('2:jdoe@example.com') == Journal.PENDING
+            journal.record('2:jdoe@example.com', True)
+            journal.begin('3:asmith@example.com')
+            journal.record('3:asmith@example.com', False)
+        assert journal.status('2:jdoe@example.com') == Journal.DONE
+        assert journal.status('3:asmith@example.com') == Journal.FAILED
+        assert journal.status('4:bwayne@example.com') is None
+
+    def test_record_reason(self, tmp_path):
+        journal_file = str(tmp_path / 'users.csv.create.journal')
+        with Journal(journal_file) as journal:
+            journal.record('2:jdoe@example.com', True, 'quays1', 'exists')
+            journal.record('3:asmith@example.com', True, 'quays2')
+
+        with Journal(journal_file, resume=True) as journal:
+            assert journal.reason('2:jdoe@example.com') == 'exists'
+            assert journal.reason('3:asmith@example.com') is None
+            assert journal.reason('4:bwayne@example.com') is None
+
+    def test_resume(self, tmp_path):
+        journal_file = str(tmp_path / 'users.csv.create.journal')
+        with Journal(journal_file) as journal:
+            journal.begin('2:jdoe@example.com')
+            journal.record('2:jdoe@example.com', True)
+            journal.begin('3:asmith@example.com')
+
+        with Journal(journal_file, resume=True) as journal:
+            assert journal.status('2:jdoe@example.com') == Journal.DONE
+            assert journal.status('3:asmith@example.com') == Journal.PENDING
+            journal.record('3:asmith@example.com', True)
+
+        with Journal(journal_file, resume=True) as journal:
+            assert journal.status('3:asmith@example.com') == Journal.DONE
+
+    def test_resume_torn_entry(self, tmp_path):
+        journal_file = tmp_path / 'users.csv.create.journal'
+        journal_file.write_text(
+            '{"key": "2:jdoe@example.com", "status": "done"}\n'
+            '{"key": "3:asmith@exam')
+        journal = Journal(str(journal_file), resume=True)
+        assert journal.status('2:jdoe@example.com') == Journal.DONE
+        assert journal.status('3:asmith@example.com') is None
+        journal.begin('3:asmith@example.com')
+        journal.close()
+        assert journal_file.read_text().splitlines()[1] == (
+            '{"key": "3:asmith@example.com", "status": "pending"}')
+
+    def test_resume_missing_file(self, tmp_path):
+        journal_file = str(tmp_path / 'users.csv.create.journal')
+        with Journal(journal_file, resume=True) as journal:
+            assert len(journal.entries) == 0
+
+    def test_no_resume_truncates(self, tmp_path):
+        journal_file = str(tmp_path / 'users.csv.create.journal')
+        with Journal(journal_file) as journal:
+            journal.begin('2:jdoe@example.com')
+        with Journal(journal_file) as journal:
+            pass
+        with Journal(journal_file, resume=True) as journal:
+            assert journal.status('2:jdoe@example.com') is None
+
+    def test_logins(self, tmp_path):
+        journal_file = str(tmp_path / 'users.csv.create.journal')
+        with Journal(journal_file) as journal:
+            journal.record('2:jdoe@example.com', True, 'quays_jd')
+            journal.record('3:asmith@example.com', False)
+            journal.record('4:bwayne@example.com', True)
+
+        with Journal(journal_file, resume=True) as journal:
+            assert journal.logins() == ['quays_jd']
@@ -181,3 +181,19 @@ class TestMailMerge:
         filepath = path + file
         assert self.mailmerge.database_file == filepath
         self.tearDown()
+
+    def test_build_database(self, tmp_path):
+        self.setUp()
+        database_file = tmp_path / 'mailmerge_database.csv'
+        database_file.write_text('email,username,password,url\n')
+        self.mailmerge.database_file = str(database_file)
+        user = {
+            'email': 'jdoe@example.com',
+            'username': 'quays_jd',
+            'password': 'Secret1!',
+            'url': 'qualysapi.qualys.com'
+        }
+        result = self.mailmerge.build_database(iter([user, user]))
+        assert result is True
+        assert len(database_file.read_text().splitlines()) == 3
+        self.tearDown()
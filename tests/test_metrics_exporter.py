@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+import time
+
+import pytest
+import requests
+
+from src.classes.metrics_exporter import MetricsExporter
+from src.classes.qualys_api import QualysApi
+from src.classes.request_event import RequestEvent
+from src.classes.retry_policy import RetryPolicy
+
+
+class TestMetricsExporter:
+    def setUp(self):
+        self.qa = QualysApi('tests/data/credentials.yaml')
+
+    def tearDown(self):
+        del self.qa
+
+    def samples(self, text: str) -> dict:
+        result = {}
+        for line in text.splitlines():
+            if line.startswith('#'):
+                continue
+            name, value = line.rsplit(' ', 1)
+            result[name] = float(value)
+        return result
+
+    def test_invalid_action(self):
+        self.setUp()
+        with pytest.raises(ValueError):
+            MetricsExporter('metrics.prom', self.qa, 'tag')
+        self.tearDown()
+
+    def test_invalid_interval(self):
+        self.setUp()
+        with pytest.raises(ValueError):
+            MetricsExporter('metrics.prom', self.qa, 'create', interval=0)
+        self.tearDown()
+
+    def test_render_users(self):
+        self.setUp()
+        self.qa.user.extend(['quays1', ('quays2', 'password')])
+        self.qa.failed_user.extend([
+            ({'email': 'bad'}, 400, 'Invalid Email Address'),
+            ({'email': 'bad2'}, 400, 'Invalid Email Address'),
+            ({}, 0, 'Read timed out\nmore detail'),
+            ('quays3', 404, 'Say "no"')])
+        exporter = MetricsExporter('metrics.prom', self.qa, 'create')
+        samples = self.samples(exporter.render())
+        assert samples[
+            'qualys_qsc_users_created_total{action="create"}'] == 2
+        assert samples[
+            'qualys_qsc_user_failures_total{action="create",code="400",'
+            'reason="Invalid Email Address"}'] == 2
+        assert samples[
+            'qualys_qsc_user_failures_total{action="create",code="0",'
+            'reason="Read timed out"}'] == 1
+        assert samples[
+            'qualys_qsc_user_failures_total{action="create",code="404",'
+            'reason="Say \\"no\\""}'] == 1
+        assert samples['qualys_qsc_run_in_progress{action="create"}'] == 1
+        self.tearDown()
+
+    def test_render_failure_reasons(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(attempts=1)
+        url = 'https://' + self.qa.headers['Host'] + '/msp/user.php'
+        body = ('<?xml version="1.0" encoding="UTF-8" ?>\n<SIMPLE_RETURN>'
+                '<RESPONSE><CODE>1965</CODE><TEXT>Too many requests</TEXT>'
+                '</RESPONSE></SIMPLE_RETURN>')
+        requests_mock.register_uri('POST', url, [
+            {'text': body, 'status_code': 409},
+            {'text': '<html>Bad gateway</html>', 'status_code': 502},
+            {'exc': requests.exceptions.ConnectTimeout}])
+        user = {'first_name': 'Benjamin'}
+        for _ in range(3):
+            assert self.qa.add_user(**user) is False
+        assert self.qa.add_user(email='not-an-email') is False
+        exporter = MetricsExporter('metrics.prom', self.qa, 'create')
+        samples = self.samples(exporter.render())
+        failures = {
+            key: value for key, value in samples.items()
+            if key.startswith('qualys_qsc_user_failures_total')}
+        labels = 'qualys_qsc_user_failures_total{action="create",code='
+        assert failures == {
+            f'{labels}"409",reason="Too many requests"}}': 1,
+            f'{labels}"502",reason="HTTP 502"}}': 1,
+            f'{labels}"0",reason="ConnectTimeout"}}': 1,
+            f'{labels}"400",reason="Invalid Email Address"}}': 1}
+        self.tearDown()
+
+    def test_render_reset(self):
+        self.setUp()
+        self.qa.user.append('quays1')
+        exporter = MetricsExporter('metrics.prom', self.qa, 'reset')
+        samples = self.samples(exporter.render(running=False))
+        assert samples[
+            'qualys_qsc_passwords_reset_total{action="reset"}'] == 1
+        assert samples['qualys_qsc_run_in_progress{action="reset"}'] == 0
+        self.tearDown()
+
+    def test_render_requests(self):
+        self.setUp()
+        endpoint = '/msp/user.php'
+        events = [
+            RequestEvent(RequestEvent.WAIT, endpoint, 0, 2.0),
+            RequestEvent(RequestEvent.SEND, endpoint, 0, 0.3, 409),
+            RequestEvent(RequestEvent.RETRY, endpoint, 0, 1.0, 409),
+            RequestEvent(RequestEvent.WAIT, endpoint, 0, 0.5),
+            RequestEvent(RequestEvent.SEND, endpoint, 0, 0.02, 200)]
+        for event in events:
+            self.qa.stats(event)
+        exporter = MetricsExporter('metrics.prom', self.qa, 'create')
+        samples = self.samples(exporter.render())
+        labels = '{action="create",endpoint="/msp/user.php"'
+        assert samples[f'qualys_qsc_request_retries_total{labels}}}'] == 1
+        assert samples[
+            f'qualys_qsc_rate_limit_wait_seconds_total{labels}}}'] == 2.5
+        assert samples[
+            f'qualys_qsc_responses_total{labels},status="409"}}'] == 1
+        name = 'qualys_qsc_request_duration_seconds'
+        labels += ',phase="send"'
+        assert samples[f'{name}_bucket{labels},le="0.025"}}'] == 1
+        assert samples[f'{name}_bucket{labels},le="0.5"}}'] == 2
+        assert samples[f'{name}_bucket{labels},le="+Inf"}}'] == 2
+        assert samples[f'{name}_count{labels}}}'] == 2
+        assert samples[f'{name}_sum{labels}}}'] == pytest.approx(0.32)
+        assert not any('phase="wait"' in key for key in samples)
+        self.tearDown()
+
+    def test_write(self, tmp_path):
+        self.setUp()
+        metrics_file = tmp_path / 'qualys_qsc_create.prom'
+        exporter = MetricsExporter(str(metrics_file), self.qa, 'create')
+        exporter.write()
+        assert 'qualys_qsc_users_created_total' in metrics_file.read_text()
+        assert [path.name for path in tmp_path.iterdir()] == [
+            'qualys_qsc_create.prom']
+        self.tearDown()
+
+    def test_updates_periodically(self, tmp_path):
+        self.setUp()
+        metrics_file = tmp_path / 'qualys_qsc_create.prom'
+        exporter = MetricsExporter(
+            str(metrics_file), self.qa, 'create', interval=0.01)
+        with exporter:
+            assert metrics_file.exists()
+            self.qa.user.append('quays1')
+            for _ in range(100):
+                samples = self.samples(metrics_file.read_text())
+                if samples['qualys_qsc_users_created_total{action="create"}']:
+                    break
+                time.sleep(0.01)
+            assert samples[
+                'qualys_qsc_users_created_total{action="create"}'] == 1
+        samples = self.samples(metrics_file.read_text())
+        assert samples['qualys_qsc_run_in_progress{action="create"}'] == 0
+        self.tearDown()
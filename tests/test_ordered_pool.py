@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from src.classes.ordered_pool import OrderedPool
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+class TestOrderedPool:
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError):
+            OrderedPool(0)
+
+    def test_map_single_worker(self):
+        pool = OrderedPool(1)
+        result = list(pool.map(square, [1, 2, 3]))
+        assert result == [(1, 1), (2, 4), (3, 9)]
+
+    def test_map_keeps_order(self):
+        def slow_first(value: int) -> int:
+            if value == 0:
+                time.sleep(0.05)
+            return value
+
+        pool = OrderedPool(4)
+        result = list(pool.map(slow_first, range(10)))
+        assert result == [(i, i) for i in range(10)]
+
+    def test_map_is_lazy(self):
+        seen = []
+
+        def items():
+            for i in range(100):
+                seen.append(i)
+                yield i
+
+        pool = OrderedPool(2)
+        result = pool.map(square, items())
+        assert next(result) == (0, 0)
+        assert len(seen) <= 5
+        result.close()
+
+    def test_map_processes(self):
+        pool = OrderedPool(2, ProcessPoolExecutor)
+        result = list(pool.map(square, range(6)))
+        assert result == [(i, i * i) for i in range(6)]
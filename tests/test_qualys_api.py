@@ -1,12 +1,36 @@
 #!/usr/bin/env python3
+import io
+import json
 import os
+from urllib.parse import parse_qs
 
 import pytest
+import requests
 from requests.auth import HTTPBasicAuth
 
+from src.classes.csv_parser import CsvParser
+from src.classes.deadline import Deadline, DeadlineExceeded
 from src.classes.qualys_api import QualysApi
+from src.classes.retry_policy import RetryPolicy
+from src.classes.run_log import RunLog
 from src.constants import constants
 
+USER = {
+    'email': 'bowen@qualys.com',
+    'first_name': 'Benjamin',
+    'last_name': 'Owen',
+    'title': 'Program Manager',
+    'user_role': 'reader',
+    'business_unit': 'Unassigned',
+    'address1': '4020 Westchase Blvd',
+    'city': 'Raleigh',
+    'state': 'North Carolina',
+    'country': 'United States of America',
+    'phone': '+15558675309'
+}
+HEADER = ','.join(USER)
+ROW = ','.join(USER.values())
+
 
 class TestQualysApi:
     def setUp(self):
@@ -97,6 +121,323 @@ class TestQualysApi:
         assert self.qa._basic_auth() == result
         self.tearDown()
 
+    def test_session_on_startup(self):
+        self.setUp()
+        assert isinstance(self.qa.session, requests.Session)
+        assert self.qa.session.auth == self.qa._basic_auth()
+        assert self.qa.session.headers['Host'] == self.qa.headers['Host']
+        adapter = self.qa.session.get_adapter(constants.QUALYS_API_SCHEME)
+        assert adapter._pool_maxsize == constants.QUALYS_API_POOL_SIZE
+        self.tearDown()
+
+    def test_session_pool_size(self):
+        qa = QualysApi('tests/data/credentials.yaml', pool_size=25)
+        adapter = qa.session.get_adapter(constants.QUALYS_API_SCHEME)
+        assert adapter._pool_maxsize == 25
+        qa.close()
+
+    def test_session_invalid_pool_size(self):
+        with pytest.raises(ValueError):
+            QualysApi('tests/data/credentials.yaml', pool_size=0)
+
+    def test_session_reused_across_calls(self, requests_mock):
+        self.setUp()
+        endpoint = '/api/2.0/fo/report/'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri('GET', url, text='', status_code=200)
+        session = self.qa.session
+        assert self.qa.test() is True
+        assert self.qa.test() is True
+        assert self.qa.session is session
+        assert requests_mock.call_count == 2
+        history = requests_mock.request_history
+        assert history[0].headers['Authorization'].startswith('Basic ')
+        self.tearDown()
+
+    def test_context_manager_closes_session(self, monkeypatch):
+        closed = []
+        with QualysApi('tests/data/credentials.yaml') as qa:
+            monkeypatch.setattr(
+                qa.session, 'close', lambda: closed.append(True))
+        assert closed == [True]
+
+    def test_xml_parser(self):
+        qa = QualysApi('tests/data/credentials.yaml', xml_parser='xmltodict')
+        assert qa.xml_parser.NAME == 'xmltodict'
+        qa.close()
+
+    def test_invalid_xml_parser(self):
+        with pytest.raises(ValueError):
+            QualysApi('tests/data/credentials.yaml', xml_parser='lxml')
+
+    def test_request_updates_rate_limiter(self, requests_mock):
+        self.setUp()
+        endpoint = '/api/2.0/fo/report/'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        headers = {
+            constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '12',
+            constants.QUALYS_API_CONCURRENCY_LIMIT_HEADER: '2'}
+        requests_mock.register_uri(
+            'GET', url, text='', status_code=200, headers=headers)
+        assert self.qa.test() is True
+        assert self.qa.limiter.remaining == 12
+        assert self.qa.limiter.concurrency == 2
+        assert self.qa.limiter.running == 0
+        self.tearDown()
+
+    def test_request_retries_after_rate_limit(self, requests_mock):
+        self.setUp()
+        endpoint = '/api/2.0/fo/report/'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        headers = {
+            constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '0',
+            constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER: '1'}
+        requests_mock.register_uri('GET', url, [
+            {'text': '', 'status_code': 409, 'headers': headers},
+            {'text': '', 'status_code': 200}])
+        assert self.qa.test() is True
+        assert requests_mock.call_count == 2
+        self.tearDown()
+
+    def test_request_rate_limit_without_wait(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(attempts=3, base_delay=0)
+        endpoint = '/api/2.0/fo/report/'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri('GET', url, text='', status_code=409)
+        assert self.qa.test() is False
+        assert requests_mock.call_count == 3
+        self.tearDown()
+
+    def test_request_retries_server_error(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(base_delay=0)
+        endpoint = '/api/2.0/fo/report/'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri('GET', url, [
+            {'text': '', 'status_code': 502},
+            {'text': '', 'status_code': 503},
+            {'text': '', 'status_code': 200}])
+        r = self.qa._request('GET', url)
+        assert r.status_code == 200
+        assert requests_mock.call_count == 3
+        assert [attempt[0] for attempt in r.attempts] == [502, 503, 200]
+        self.tearDown()
+
+    def test_request_retries_connection_error(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(attempts=2, base_delay=0)
+        endpoint = '/api/2.0/fo/report/'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri(
+            'GET', url, exc=requests.exceptions.ConnectionError)
+        assert self.qa.test() is False
+        assert requests_mock.call_count == 2
+        self.tearDown()
+
+    def test_add_user_not_retried_after_server_error(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(base_delay=0)
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri('POST', url, text='', status_code=500)
+        result = self.qa.add_user()
+        assert result is False
+        assert requests_mock.call_count == 1
+        self.tearDown()
+
+    def test_add_user_read_timeout(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(base_delay=0)
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri(
+            'POST', url, exc=requests.exceptions.ReadTimeout)
+        result = self.qa.add_user()
+        assert result is False
+        assert requests_mock.call_count == 1
+        assert self.qa.failed_user[0][1] == 0
+        assert self.qa.failed_user[0][2] == 'ReadTimeout'
+        self.tearDown()
+
+    def test_add_user_retries_connect_timeout(self, requests_mock):
+        self.setUp()
+        self.qa.retry = RetryPolicy(base_delay=0)
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, [
+            {'exc': requests.exceptions.ConnectTimeout},
+            {'text': data, 'status_code': 200}])
+        result = self.qa.add_user()
+        assert result is True
+        assert requests_mock.call_count == 2
+        self.tearDown()
+
+    def test_request_timeout(self, requests_mock):
+        self.setUp()
+        self.qa.timeout = (3.0, 20.0)
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        requests_mock.register_uri('GET', url, text='', status_code=200)
+        self.qa._request('GET', url)
+        assert requests_mock.last_request.timeout == (3.0, 20.0)
+        self.tearDown()
+
+    def test_request_in_flight_at_deadline(self, requests_mock):
+        self.setUp()
+        self.qa.timeout = (3.0, 20.0)
+        self.qa.deadline = Deadline(1)
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url += '/msp/user.php'
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+
+        def expire(request, context):
+            self.qa.deadline.expires -= 1
+            return data
+
+        requests_mock.register_uri('POST', url, text=expire, status_code=200)
+        result = self.qa.add_user()
+        assert result is True
+        assert self.qa.deadline.expired()
+        assert requests_mock.last_request.timeout == (3.0, 20.0)
+        assert len(self.qa.failed_user) == 0
+        self.tearDown()
+
+    def test_request_deadline_exceeded(self, requests_mock):
+        self.setUp()
+        self.qa.deadline = Deadline(5)
+        self.qa.deadline.expires -= 5
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        requests_mock.register_uri('GET', url, text='', status_code=200)
+        with pytest.raises(DeadlineExceeded):
+            self.qa._request('GET', url)
+        assert requests_mock.call_count == 0
+        assert self.qa.test() is False
+        self.tearDown()
+
+    def test_request_slow(self, requests_mock):
+        self.setUp()
+        self.qa.LATENCY_BUDGET = 0
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        requests_mock.register_uri('GET', url, text='', status_code=200)
+        self.qa._request('GET', url)
+        assert len(self.qa.slow_requests) == 1
+        assert self.qa.slow_requests[0][:3] == ('GET', url, 200)
+        self.tearDown()
+
+    def test_add_users_stops_at_deadline(self, requests_mock):
+        self.setUp()
+        self.qa.deadline = Deadline(60)
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, text=data, status_code=200)
+        results = self.qa.add_users([{}, {}, {}])
+        assert next(results)[1] is not None
+        self.qa.deadline.expires -= 60
+        assert list(results) == []
+        assert requests_mock.call_count == 1
+        self.tearDown()
+
+    def test_decode_failed_status_code(self, requests_mock):
+        self.setUp()
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        requests_mock.register_uri(
+            'GET', url, text='ACCESS DENIED', status_code=401)
+        r = self.qa.session.get(url)
+        response = self.qa._decode(r, 'USER_OUTPUT')
+        assert response.ok is False
+        assert response.number == 401
+        assert response.message == 'HTTP 401'
+        assert response.text == 'ACCESS DENIED'
+        self.tearDown()
+
+    @pytest.mark.parametrize('text', [
+        '<?xml version="1.0" encoding="UTF-8" ?>\n<SIMPLE_RETURN><RESPONSE>'
+        '<CODE>1965</CODE><TEXT>Too many requests</TEXT></RESPONSE>'
+        '</SIMPLE_RETURN>',
+        '<?xml version="1.0" encoding="UTF-8" ?>\n<USER_OUTPUT><RETURN '
+        'status="FAILED" number="999"><MESSAGE>Too many requests</MESSAGE>'
+        '</RETURN></USER_OUTPUT>'])
+    def test_decode_text_failed_status_code_xml(self, text):
+        self.setUp()
+        response = self.qa._decode_text(409, text, 'USER_OUTPUT')
+        assert response.ok is False
+        assert response.number == 409
+        assert response.message == 'Too many requests'
+        assert response.text == text
+        self.tearDown()
+
+    def test_decode_failed(self, requests_mock):
+        self.setUp()
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        with open('tests/data/invalid_xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('GET', url, text=data, status_code=200)
+        r = self.qa.session.get(url)
+        response = self.qa._decode(r, 'USER_OUTPUT')
+        assert response.ok is False
+        assert response.status == 'FAILED'
+        assert response.number == 1903
+        self.tearDown()
+
+    @pytest.mark.parametrize('xml_parser', ['expat', 'xmltodict'])
+    @pytest.mark.parametrize('text', [
+        '<html><body>Down for maintenance</body></html>',
+        '<?xml version="1.0" ?>\n<SIMPLE_RETURN><RESPONSE>',
+        'not xml at all'])
+    def test_decode_text_unexpected_body(self, xml_parser, text):
+        qa = QualysApi('tests/data/credentials.yaml', xml_parser=xml_parser)
+        response = qa._decode_text(200, text, 'USER_OUTPUT')
+        assert response.ok is False
+        assert response.number == 200
+        assert response.message == 'Unexpected response'
+        assert response.text == text
+
+    def test_add_users_unexpected_body(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, [
+            {'text': data}, {'text': '<USER_OUTPUT/>'},
+            {'text': '<html>Maintenance</html>'}, {'text': data}])
+        rows = [{'first_name': name} for name in ['aaaa', 'bbbb', 'cccc',
+                                                  'dddd']]
+        results = list(self.qa.add_users(rows, workers=1))
+        assert [user is not None for _, user in results] == [
+            True, False, False, True]
+        assert len(self.qa.failed_user) == 2
+        self.tearDown()
+
+    def test_decode(self, requests_mock):
+        self.setUp()
+        url = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('GET', url, text=data, status_code=200)
+        r = self.qa.session.get(url)
+        response = self.qa._decode(r, 'USER_OUTPUT')
+        assert response.ok is True
+        assert response.status == 'SUCCESS'
+        assert response.users[0]['USER_LOGIN'] == 'quays6qt84'
+        self.tearDown()
+
     def test_test_failed(self, requests_mock):
         self.setUp()
         endpoint = '/api/2.0/fo/report/'
@@ -467,6 +808,26 @@ class TestQualysApi:
         assert result is True
         self.tearDown()
 
+    def test_is_valid_state_failed(self):
+        self.setUp()
+        result = self.qa._is_valid_state('Canada', 'California')
+        assert result is False
+        self.tearDown()
+
+    def test_is_valid_state_no_states(self):
+        self.setUp()
+        result = self.qa._is_valid_state('France', 'Anything')
+        assert result is True
+        self.tearDown()
+
+    def test_validate_payload_values_failed_message(self):
+        self.setUp()
+        values = self.qa._parse_required_user_fields({'title': 'T!tle'})
+        result = self.qa._validate_payload_values(values)
+        assert result is False
+        assert self.qa.failed_user[0][2] == 'Invalid Title'
+        self.tearDown()
+
     def test_detect_bad_keys_one_bad_key(self):
         self.setUp()
         values = {
@@ -962,17 +1323,133 @@ class TestQualysApi:
         status_code = 200
         with open('tests/data/password_change_no_email.xml', 'r') as file:
             data = file.read()
+
+        def reset(request, context):
+            login = parse_qs(request.text)['user_logins'][0]
+            return data.replace(usernames[0], login)
+
         requests_mock.register_uri(
-            'POST', url, text=data, status_code=status_code)
+            'POST', url, text=reset, status_code=status_code)
         for username in usernames:
             result = self.qa.reset_password(username, email)
             assert result is True
         assert len(self.qa.user) == 3
+        assert [user[0] for user in self.qa.user] == usernames
         assert isinstance(self.qa.user[0], tuple)
         assert self.qa.user[0][0] == usernames[0]
         assert self.qa.user[0][1] == 'password1!'
         self.tearDown()
 
+    def test_reset_passwords_batch(self, requests_mock):
+        self.setUp()
+        usernames = ['quays7cx25', 'quays8dy36', 'bad-user', 'quays7cx25']
+        email = 0
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        status_code = 200
+        with open(
+                'tests/data/password_change_multiple_users.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri(
+            'POST', url, text=data, status_code=status_code)
+        result = self.qa.reset_passwords(usernames, email)
+        assert requests_mock.call_count == 1
+        assert 'user_logins=quays7cx25%2Cquays8dy36' in (
+            requests_mock.last_request.text)
+        assert list(result.keys()) == ['quays7cx25', 'quays8dy36', 'bad-user']
+        assert result['quays7cx25'] == ('quays7cx25', 'password1!')
+        assert result['quays8dy36'] == ('quays8dy36', 'password2!')
+        assert result['bad-user'] is None
+        assert len(self.qa.user) == 2
+        assert len(self.qa.failed_user) == 1
+        self.tearDown()
+
+    def test_reset_passwords_batch_size(self, requests_mock):
+        self.setUp()
+        usernames = ['quays7cx25', 'quays8dy36', 'quays9ez47']
+        email = 1
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        status_code = 200
+        with open('tests/data/password_change_email.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri(
+            'POST', url, text=data, status_code=status_code)
+        result = self.qa.reset_passwords(usernames, email, batch_size=2)
+        assert requests_mock.call_count == 2
+        assert result['quays7cx25'] == 'quays7cx25'
+        assert result['quays8dy36'] is None
+        assert result['quays9ez47'] is None
+        assert self.qa.user == ['quays7cx25']
+        assert len(self.qa.failed_user) == 2
+        self.tearDown()
+
+    def test_reset_password_other_user_returned(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open(
+                'tests/data/password_change_multiple_users.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, text=data, status_code=200)
+        result = self.qa.reset_password('quaysabc1', 0)
+        assert result is False
+        assert self.qa.user == []
+        assert self.qa.failed_user == [
+            ('quaysabc1', 404, 'Password not reset')]
+        self.tearDown()
+
+    def test_reset_passwords_failed(self, requests_mock):
+        self.setUp()
+        usernames = ['quays7cx25', 'quays8dy36']
+        email = 0
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        status_code = 200
+        with open('tests/data/password_change_failed.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri(
+            'POST', url, text=data, status_code=status_code)
+        result = self.qa.reset_passwords(usernames, email)
+        assert result == {'quays7cx25': None, 'quays8dy36': None}
+        assert self.qa.failed_user == [
+            ('quays7cx25', 1903, 'Lorem ipsum fake error message'),
+            ('quays8dy36', 1903, 'Lorem ipsum fake error message')]
+        self.tearDown()
+
+    def test_reset_passwords_failed_unauthenticated(self, requests_mock):
+        self.setUp()
+        usernames = ['quays7cx25', 'quays8dy36', 'quays9ez47']
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri(
+            'POST', url, text='ACCESS DENIED', status_code=401)
+        result = self.qa.reset_passwords(usernames, 0)
+        assert list(result.values()) == [None, None, None]
+        assert [error[0] for error in self.qa.failed_user] == usernames
+        assert {error[1] for error in self.qa.failed_user} == {401}
+        self.tearDown()
+
+    def test_reset_passwords_invalid_email_option(self):
+        self.setUp()
+        result = self.qa.reset_passwords(['quays7cx25', 'quays8dy36'], 2)
+        assert result == {'quays7cx25': None, 'quays8dy36': None}
+        assert self.qa.failed_user == [
+            ('quays7cx25', 400, 'Invalid email option'),
+            ('quays8dy36', 400, 'Invalid email option')]
+        self.tearDown()
+
+    def test_reset_passwords_invalid_batch_size(self):
+        self.setUp()
+        with pytest.raises(ValueError):
+            self.qa.reset_passwords(['quays7cx25'], 0, batch_size=0)
+        self.tearDown()
+
     def test_list_users_failed_unauthenticated(self, requests_mock):
         self.setUp()
         endpoint = '/msp/user_list.php'
@@ -1017,4 +1494,419 @@ class TestQualysApi:
         result = self.qa.list_users()
         assert result is True
         assert len(self.qa.users) == 2
+        assert len(self.qa.directory) == 2
+        user = self.qa.directory.get_by_login('quays5ty3')
+        assert user == self.qa.users[1]
+        assert len(self.qa.directory.get_by_email('test@test.com')) == 2
+        self.tearDown()
+
+    def test_list_users_values(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        status_code = 200
+        with open('tests/data/list_users.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri(
+            'GET', url, text=data, status_code=status_code)
+        self.qa.list_users()
+        assert self.qa.users[0] == (
+            'quays4la3', '1387042', 'test@test.com', None)
+        assert self.qa.users[1][3] == 'trainee'
+        self.tearDown()
+
+    def test_iter_users_streams(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        status_code = 200
+        user = '<USER><USER_LOGIN>quays{0}</USER_LOGIN><USER_ID>{0}</USER_ID>'
+        user += '<CONTACT_INFO><EMAIL><![CDATA[{0}@test.com]]></EMAIL>'
+        user += '</CONTACT_INFO></USER>'
+        users = ''.join(user.format(i) for i in range(1000))
+        data = '<?xml version="1.0" encoding="UTF-8" ?><USER_LIST_OUTPUT>'
+        data += f'<USER_LIST>{users}</USER_LIST></USER_LIST_OUTPUT>'
+        requests_mock.register_uri(
+            'GET', url, text=data, status_code=status_code)
+        result = self.qa.iter_users()
+        assert next(result) == ('quays0', '0', '0@test.com', None)
+        assert len(list(result)) == 999
+        assert len(self.qa.users) == 0
+        self.tearDown()
+
+    def test_iter_users_failed(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        status_code = 200
+        with open('tests/data/list_users_failed.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri(
+            'GET', url, text=data, status_code=status_code)
+        with pytest.raises(ValueError):
+            list(self.qa.iter_users())
+        assert self.qa.failed_user[0][1] == 1903
+        self.tearDown()
+
+    @pytest.mark.parametrize('data', [
+        '<html><body>Down for maintenance</body></html>',
+        '<?xml version="1.0" ?><SIMPLE_RETURN><RESPONSE><CODE>1960</CODE>'
+        '<TEXT>Too many requests</TEXT></RESPONSE></SIMPLE_RETURN>',
+        '<?xml version="1.0" ?><USER_LIST_OUTPUT><USER_LIST><USER>'])
+    def test_list_users_unexpected_body(self, requests_mock, data):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri('GET', url, text=data, status_code=200)
+        assert self.qa.list_users() is False
+        assert len(self.qa.failed_user) == 1
+        self.tearDown()
+
+    def test_list_users_truncated(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/list_users.xml', 'r') as file:
+            data = file.read()
+        data = data[:data.rindex('</USER>')]
+        requests_mock.register_uri('GET', url, text=data, status_code=200)
+        assert self.qa.list_users() is False
+        assert self.qa.users == []
+        assert len(self.qa.directory) == 0
+        assert self.qa.failed_user[0][2] == 'ParseError'
+        self.tearDown()
+
+    def test_list_users_read_error(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/list_users.xml', 'rb') as file:
+            data = file.read()
+
+        class Body(io.BytesIO):
+            def read(self, *args):
+                if self.tell() > len(data) // 2:
+                    raise ConnectionResetError('Connection reset by peer')
+                return super().read(64)
+        requests_mock.register_uri(
+            'GET', url, body=Body(data), status_code=200)
+        assert self.qa.list_users() is False
+        assert self.qa.users == []
+        assert len(self.qa.directory) == 0
+        assert self.qa.failed_user[0][2] == 'ProtocolError'
+        self.tearDown()
+
+    def test_add_users_concurrent_keeps_order(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+
+        def callback(request, context):
+            context.status_code = 200
+            login = 'quays' + request.text.split('first_name=')[1][:4]
+            return data.replace('quays6qt84', login)
+        requests_mock.register_uri('POST', url, text=callback)
+        names = ['aaaa', 'bbbb', 'cccc', 'dddd', 'eeee', 'ffff', 'gggg']
+        rows = [{'first_name': name} for name in names]
+        rows.insert(3, {'first_name': 'v@l!d'})
+        results = list(self.qa.add_users(rows, workers=4))
+        assert len(results) == 8
+        assert [row for row, _ in results] == rows
+        assert results[3][1] is None
+        for name, (row, user) in zip(names, results[:3] + results[4:]):
+            assert user == ('quays' + name, 'lWby3dX#')
+        assert len(self.qa.user) == 7
+        assert self.qa.failed_user[0][2] == 'Invalid First Name'
+        assert len(self.qa.failed_user) == 1
+        self.tearDown()
+
+    def test_validate_user_bad_key(self):
+        result = QualysApi.validate_user({'bad_key': 'value'})
+        assert result == 'Invalid user keys: bad_key'
+
+    def test_validate_user_invalid(self):
+        result = QualysApi.validate_user({**USER, 'country': 'Atlantis'})
+        assert result == 'Invalid Country or State'
+
+    def test_validate_user_invalid_optional(self):
+        result = QualysApi.validate_user({**USER, 'zip_code': 'ABCDE'})
+        assert result == 'Invalid Zip Code'
+
+    def test_validate_user(self):
+        result = QualysApi.validate_user(USER)
+        assert result is None
+
+    def test_validate_user_missing_fields(self):
+        result = QualysApi.validate_user({'email': 'bowen@qualys.com'})
+        assert result.startswith('Missing field(s): user_role, ')
+        assert 'email' not in result
+        result = QualysApi.validate_user({**USER, 'phone': None})
+        assert result == 'Missing field(s): phone'
+        result = QualysApi.validate_user({**USER, 'zip_code': None})
+        assert result == 'Missing field(s): zip_code'
+
+    def test_validate_user_empty(self):
+        assert QualysApi.validate_user({}) == 'Empty row'
+        assert QualysApi.validate_user(
+            dict.fromkeys(USER)) == 'Empty row'
+
+    def test_validate_users(self):
+        self.setUp()
+        rows = [
+            USER,
+            {**USER, 'email': 'not-an-email'},
+            {**USER, 'first_name': 'Benjamin'},
+            {**USER, 'fax': 'fax'}]
+        result = self.qa.validate_users(rows)
+        assert result == [
+            (1, rows[1], 'Invalid Email Address'),
+            (3, rows[3], 'Invalid Fax')]
+        assert len(self.qa.failed_user) == 0
+        self.tearDown()
+
+    def test_validate_users_prints_nothing(self, capsys):
+        rows = [
+            {**USER, 'bad_key': 'value'},
+            {**USER, 'country': 'Atlantis'},
+            {**USER, 'send_email': 2},
+            {**USER, 'username': 'bad user'}]
+        result = QualysApi.validate_users(rows)
+        assert len(result) == 4
+        assert result[0][2] == 'Invalid user keys: bad_key'
+        assert capsys.readouterr().out == ''
+
+    def test_validate_users_short_and_blank_rows(self, tmp_path):
+        file = tmp_path / 'users.csv'
+        short = ROW.rsplit(',', 1)[0]
+        file.write_text('\n'.join([HEADER, ROW, short, '', ROW]) + '\n')
+        csvparser = CsvParser(str(file))
+        for result in [QualysApi.validate_users(csvparser.iter_csv()),
+                       QualysApi.validate_csv(csvparser, 1)]:
+            assert [(i, msg) for i, _, msg in result] == [
+                (1, 'Missing field(s): phone'),
+                (2, 'Empty row')]
+
+    def test_add_user_short_row(self):
+        self.setUp()
+        csvparser = CsvParser('tests/data/new_users.csv')
+        row = list(csvparser.iter_csv())[2]
+        assert self.qa.add_user(**row) is False
+        assert self.qa.failed_user[0][2] == 'Missing field(s): phone'
+        self.tearDown()
+
+    def test_validate_users_processes(self):
+        rows = [{**USER, 'email': f'user{i}@qualys.com'} for i in range(20)]
+        rows[7]['email'] = 'not-an-email'
+        result = QualysApi.validate_users(rows, processes=2)
+        assert result == [(7, rows[7], 'Invalid Email Address')]
+
+    def test_validate_users_invalid_processes(self):
+        with pytest.raises(ValueError):
+            QualysApi.validate_users([{}], processes=0)
+
+    def test_validate_csv(self, tmp_path):
+        file = tmp_path / 'users.csv'
+        lines = [HEADER]
+        lines += [ROW.replace('bowen', f'user{i}') for i in range(300)]
+        lines[151] = ROW.replace('bowen@qualys.com', 'not-an-email')
+        lines[252] = ROW.replace('Benjamin', 'Us3r!')
+        file.write_text('\n'.join(lines) + '\n')
+        csvparser = CsvParser(str(file))
+        for processes in [1, 2]:
+            result = QualysApi.validate_csv(csvparser, processes)
+            assert [(i, msg) for i, _, msg in result] == [
+                (150, 'Invalid Email Address'),
+                (251, 'Invalid First Name')]
+            assert result == QualysApi.validate_users(csvparser.iter_csv())
+
+    def test_validate_csv_overrides(self):
+        csvparser = CsvParser('tests/data/new_users.csv')
+        result = QualysApi.validate_csv(csvparser, 1, {'send_email': 2})
+        assert len(result) == 3
+        assert result[0][1]['send_email'] == 2
+
+    def test_add_users_invalid_workers(self):
+        self.setUp()
+        with pytest.raises(ValueError):
+            list(self.qa.add_users([{}], workers=0))
+        self.tearDown()
+
+    def test_hooks_add_user(self, requests_mock):
+        self.setUp()
+        events = []
+        self.qa.add_hook(events.append)
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, [
+            {'text': '', 'status_code': 409},
+            {'text': data, 'status_code': 200}])
+        self.qa.retry = RetryPolicy(base_delay=0)
+        assert self.qa.add_user() is True
+        phases = [(event.phase, event.status) for event in events]
+        assert phases == [
+            ('validate', None),
+            ('wait', None),
+            ('send', 409),
+            ('receive', 409),
+            ('retry', 409),
+            ('wait', None),
+            ('send', 200),
+            ('receive', 200),
+            ('parse', 200)]
+        assert all(event.endpoint == endpoint for event in events)
+        assert all(event.end >= event.start for event in events)
+        assert events[-1].size == len(data)
+        histogram = self.qa.stats.histogram(endpoint, 'send')
+        assert histogram.count == 2
+        body = requests_mock.last_request.body
+        assert histogram.size == 2 * len(body)
+        self.tearDown()
+
+    def test_hooks_validation_failed(self):
+        self.setUp()
+        events = []
+        self.qa.add_hook(events.append)
+        assert self.qa.add_user(email='not-an-email') is False
+        assert len(events) == 1
+        assert events[0].phase == 'validate'
+        assert events[0].status == 400
+        self.tearDown()
+
+    def test_hooks_request_error(self, requests_mock):
+        self.setUp()
+        events = []
+        self.qa.add_hook(events.append)
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        requests_mock.register_uri(
+            'POST', url, exc=requests.exceptions.ReadTimeout)
+        assert self.qa.add_user() is False
+        assert events[-1].phase == 'send'
+        assert events[-1].status == 'ReadTimeout'
+        self.tearDown()
+
+    def test_hooks_list_users(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/user_list.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/list_users.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('GET', url, text=data, status_code=200)
+        assert self.qa.list_users() is True
+        send = self.qa.stats.histogram(endpoint, 'send')
+        parse = self.qa.stats.histogram(endpoint, 'parse')
+        assert send.count == 1
+        assert parse.count == 1
+        assert parse.size == len(data.encode())
+        assert self.qa.stats.histogram(endpoint, 'receive') is None
+        self.tearDown()
+
+    def test_hooks_reset_passwords(self, requests_mock):
+        self.setUp()
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open(
+                'tests/data/password_change_multiple_users.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, text=data, status_code=200)
+        self.qa.reset_passwords(['quays7cx25', 'quays8dy36', 'bad user'], 0)
+        validate = self.qa.stats.histogram(endpoint, 'validate')
+        assert validate.count == 3
+        assert self.qa.stats.histogram(endpoint, 'parse').count == 1
+        assert self.qa.stats.statuses[endpoint] == {200: 1}
+        body = 'user_logins=quays7cx25%2Cquays8dy36&email=0'
+        assert requests_mock.last_request.text == body
+        assert self.qa.stats.histogram(endpoint, 'send').size == len(body)
+        self.tearDown()
+
+    def test_run_log_add_user(self, requests_mock, tmp_path):
+        self.setUp()
+        log_file = tmp_path / 'qualys_qsc.log'
+        self.qa.run_log = RunLog(str(log_file))
+        endpoint = '/msp/user.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/xml_response.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, text=data, status_code=200)
+        assert self.qa.add_user() is True
+        assert self.qa.add_user(email='not-an-email') is False
+        self.qa.run_log.close()
+        with open(log_file, 'r') as file:
+            events = [json.loads(line) for line in file]
+        assert events[0]['ok'] is True
+        assert events[0]['login'] == 'quays6qt84'
+        assert events[0]['email'] == 'qsc-training@qualys.com'
+        assert events[0]['seconds'] >= 0
+        assert 'lWby3dX#' not in log_file.read_text()
+        assert events[1]['ok'] is False
+        assert events[1]['email'] == 'not-an-email'
+        assert events[1]['code'] == 400
+        assert events[1]['reason'] == 'Invalid Email Address'
+        self.tearDown()
+
+    def test_run_log_reset_passwords(self, requests_mock, tmp_path):
+        self.setUp()
+        log_file = tmp_path / 'qualys_qsc.log'
+        self.qa.run_log = RunLog(str(log_file))
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open(
+                'tests/data/password_change_multiple_users.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, text=data, status_code=200)
+        self.qa.reset_passwords(['quays7cx25', 'quays8dy36', 'bad user'], 0)
+        self.qa.run_log.close()
+        with open(log_file, 'r') as file:
+            events = [json.loads(line) for line in file]
+        outcomes = sorted((e['login'], e['ok']) for e in events)
+        assert outcomes == [
+            ('bad user', False), ('quays7cx25', True), ('quays8dy36', True)]
+        assert 'password1!' not in log_file.read_text()
+        self.tearDown()
+
+    def test_failure_reason(self):
+        assert QualysApi.failure_reason(
+            ({}, 400, 'Invalid Email Address')) == 'Invalid Email Address'
+        assert QualysApi.failure_reason(
+            ({}, 0, 'Run deadline exceeded\nmore')) == 'Run deadline exceeded'
+        assert QualysApi.failure_reason(({}, 0, '')) == 'Unknown'
+        assert len(QualysApi.failure_reason(({}, 0, 'x' * 500))) == 100
+
+    def test_run_log_reset_passwords_failed(self, requests_mock, tmp_path):
+        self.setUp()
+        log_file = tmp_path / 'qualys_qsc.log'
+        self.qa.run_log = RunLog(str(log_file))
+        self.qa.directory.add(
+            ('quays7cx25', '1', 'bowen@qualys.com', None))
+        endpoint = '/msp/password_change.php'
+        host = constants.QUALYS_API_SCHEME + self.qa.headers['Host']
+        url = host + endpoint
+        with open('tests/data/password_change_failed.xml', 'r') as file:
+            data = file.read()
+        requests_mock.register_uri('POST', url, text=data, status_code=200)
+        self.qa.reset_passwords(['quays7cx25', 'quays8dy36'], 0)
+        self.qa.run_log.close()
+        with open(log_file, 'r') as file:
+            events = [json.loads(line) for line in file]
+        assert [e['login'] for e in events] == ['quays7cx25', 'quays8dy36']
+        assert events[0]['email'] == 'bowen@qualys.com'
+        assert 'email' not in events[1]
+        assert {e['code'] for e in events} == {1903}
         self.tearDown()
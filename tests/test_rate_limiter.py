@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+import pytest
+
+from src.classes.rate_limiter import RateLimiter
+from src.constants import constants
+
+
+class TestRateLimiter:
+    def setUp(self):
+        self.limiter = RateLimiter()
+
+    def tearDown(self):
+        del self.limiter
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            RateLimiter(-1)
+
+    def test_update_no_headers(self):
+        self.setUp()
+        self.limiter.update({})
+        assert self.limiter.remaining == -1
+        assert self.limiter.concurrency == 0
+        assert self.limiter.delay() == 0
+        self.tearDown()
+
+    def test_update_invalid_headers(self):
+        self.setUp()
+        headers = {
+            constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: 'none',
+            constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER: ''}
+        self.limiter.update(headers)
+        assert self.limiter.remaining == -1
+        assert self.limiter.delay() == 0
+        self.tearDown()
+
+    def test_update_remaining_and_concurrency(self):
+        self.setUp()
+        headers = {
+            constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '297',
+            constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER: '0',
+            constants.QUALYS_API_CONCURRENCY_LIMIT_HEADER: '2'}
+        self.limiter.update(headers)
+        assert self.limiter.remaining == 297
+        assert self.limiter.concurrency == 2
+        assert self.limiter.delay() == 0
+        self.tearDown()
+
+    def test_update_to_wait(self):
+        self.setUp()
+        headers = {
+            constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '0',
+            constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER: '30'}
+        self.limiter.update(headers)
+        assert self.limiter.remaining == 0
+        assert 29 < self.limiter.delay() <= 30
+        self.tearDown()
+
+    def test_acquire_waits_for_to_wait(self):
+        self.setUp()
+        headers = {constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER: '1'}
+        self.limiter.update(headers)
+        start = time.monotonic()
+        self.limiter.acquire()
+        assert time.monotonic() - start >= 0.9
+        assert self.limiter.running == 1
+        self.limiter.release()
+        assert self.limiter.running == 0
+        self.tearDown()
+
+    def test_acquire_respects_concurrency(self):
+        limiter = RateLimiter(1)
+        limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.acquire()
+            acquired.set()
+            limiter.release()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert acquired.wait(timeout=0.2) is False
+        limiter.release()
+        assert acquired.wait(timeout=1) is True
+        thread.join()
+        assert limiter.running == 0
+
+    def test_acquire_reserves_remaining(self):
+        self.setUp()
+        headers = {constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '2'}
+        self.limiter.update(headers)
+        self.limiter.acquire()
+        assert self.limiter.remaining == 1
+        self.limiter.acquire()
+        assert self.limiter.remaining == 0
+        self.limiter.release()
+        self.limiter.release()
+        self.tearDown()
+
+    def test_acquire_waits_for_remaining(self):
+        self.setUp()
+        headers = {constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '1'}
+        self.limiter.update(headers)
+        self.limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            self.limiter.acquire()
+            acquired.set()
+            self.limiter.release()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        assert acquired.wait(timeout=0.2) is False
+        headers = {constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '10'}
+        self.limiter.update(headers)
+        assert acquired.wait(timeout=1) is True
+        thread.join()
+        self.limiter.release()
+        assert self.limiter.remaining == 9
+        self.tearDown()
+
+    def test_acquire_probes_spent_quota(self):
+        self.setUp()
+        headers = {constants.QUALYS_API_RATE_LIMIT_REMAINING_HEADER: '0'}
+        self.limiter.update(headers)
+        self.limiter.acquire()
+        assert self.limiter.running == 1
+        assert self.limiter._wait() is None
+        self.limiter.release()
+        self.tearDown()
+
+    def test_try_acquire(self):
+        limiter = RateLimiter(1)
+        assert limiter.try_acquire() == 0
+        assert limiter.try_acquire() is None
+        limiter.release()
+        limiter.update({constants.QUALYS_API_RATE_LIMIT_TO_WAIT_HEADER: '5'})
+        assert 4 < limiter.try_acquire() <= 5
+        assert limiter.running == 0
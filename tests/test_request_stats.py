@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+import pytest
+
+from src.classes.request_event import RequestEvent
+from src.classes.request_stats import Histogram, RequestStats
+
+
+class TestRequestStats:
+    def test_histogram_observe(self):
+        histogram = Histogram([0.1, 1.0])
+        histogram.observe(0.05, 10)
+        histogram.observe(0.5, 20)
+        histogram.observe(5.0)
+        assert histogram.counts == [1, 1, 1]
+        assert histogram.count == 3
+        assert histogram.sum == pytest.approx(5.55)
+        assert histogram.size == 30
+
+    def test_histogram_quantile(self):
+        histogram = Histogram([0.1, 1.0])
+        assert histogram.quantile(0.5) is None
+        for _ in range(4):
+            histogram.observe(0.5)
+        assert histogram.quantile(0.5) == pytest.approx(0.55)
+        histogram.observe(5.0)
+        assert histogram.quantile(0.99) == 1.0
+
+    def test_event_elapsed(self):
+        event = RequestEvent(RequestEvent.SEND, '/msp/user.php', 1.0, 1.25)
+        assert event.elapsed == 0.25
+        assert event.status is None
+        assert event.size == 0
+
+    def test_collect(self):
+        stats = RequestStats([0.1, 1.0])
+        stats(RequestEvent(RequestEvent.SEND, '/msp/user.php', 0, 0.2, 200))
+        stats(RequestEvent(RequestEvent.SEND, '/msp/user.php', 0, 0.3, 409))
+        stats(RequestEvent(
+            RequestEvent.PARSE, '/msp/user.php', 0, 0.01, 200, 512))
+        send = stats.histogram('/msp/user.php', RequestEvent.SEND)
+        assert send.count == 2
+        parse = stats.histogram('/msp/user.php', RequestEvent.PARSE)
+        assert parse.size == 512
+        assert stats.histogram('/msp/user.php', RequestEvent.RECEIVE) is None
+        assert stats.statuses['/msp/user.php'] == {200: 1, 409: 1}
+
+    def test_summary(self):
+        stats = RequestStats()
+        assert stats.summary() == []
+        stats(RequestEvent(
+            RequestEvent.SEND, '/msp/user.php', 0, 0.2, 'ReadTimeout'))
+        stats(RequestEvent(
+            RequestEvent.VALIDATE, '/msp/user.php', 0, 0.0001))
+        lines = stats.summary()
+        assert lines[0] == '/msp/user.php ReadTimeout: 1'
+        assert lines[1].split()[0] == 'validate'
+        assert lines[2].split()[0] == 'send'
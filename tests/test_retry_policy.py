@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import pytest
+import requests
+
+from src.classes.retry_policy import RetryPolicy
+
+
+class TestRetryPolicy:
+    def setUp(self):
+        self.retry = RetryPolicy(attempts=4, base_delay=1.0, max_delay=5.0)
+
+    def tearDown(self):
+        del self.retry
+
+    def test_invalid_attempts(self):
+        with pytest.raises(ValueError):
+            RetryPolicy(attempts=0)
+
+    def test_invalid_delay(self):
+        with pytest.raises(ValueError):
+            RetryPolicy(base_delay=-1)
+
+    def test_should_retry_status(self):
+        self.setUp()
+        assert self.retry.should_retry_status(409, False) is True
+        assert self.retry.should_retry_status(429, False) is True
+        assert self.retry.should_retry_status(503, False) is True
+        assert self.retry.should_retry_status(502, True) is True
+        assert self.retry.should_retry_status(502, False) is False
+        assert self.retry.should_retry_status(400, True) is False
+        assert self.retry.should_retry_status(200, True) is False
+        self.tearDown()
+
+    def test_should_retry_exception(self):
+        self.setUp()
+        connect = requests.exceptions.ConnectTimeout()
+        read = requests.exceptions.ReadTimeout()
+        error = requests.exceptions.ConnectionError()
+        invalid = requests.exceptions.InvalidURL()
+        assert self.retry.should_retry_exception(connect, False) is True
+        assert self.retry.should_retry_exception(read, True) is True
+        assert self.retry.should_retry_exception(read, False) is False
+        assert self.retry.should_retry_exception(error, True) is True
+        assert self.retry.should_retry_exception(error, False) is False
+        assert self.retry.should_retry_exception(invalid, True) is False
+        self.tearDown()
+
+    def test_backoff(self):
+        self.setUp()
+        for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0)]:
+            for _ in range(50):
+                assert 0 <= self.retry.backoff(attempt) <= ceiling
+        self.tearDown()
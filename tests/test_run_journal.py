@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+import json
+import random
+import time
+
+from src.classes.journal import Journal
+from src.classes.ordered_pool import OrderedPool
+from src.classes.run_journal import RunJournal
+from src.classes.run_log import RunLog
+from src.classes.user_directory import UserDirectory
+
+
+ROWS = [
+    {'email': 'jdoe@example.com'},
+    {'email': 'jdoe@example.com'},
+    {'email': 'asmith@example.com'}]
+
+
+def read(path) -> list:
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file]
+
+
+class TestRunJournal:
+    def setUp(self, tmp_path, resume=False):
+        self.journal_file = str(tmp_path / 'users.csv.create.journal')
+        self.log_file = str(tmp_path / 'qualys_qsc.log')
+        self.run_log = RunLog(self.log_file)
+        self.journal = RunJournal(
+            Journal(self.journal_file, resume), self.run_log)
+
+    def tearDown(self):
+        self.journal.close()
+        self.run_log.close()
+        del self.journal
+        del self.run_log
+
+    def test_rows(self, tmp_path):
+        self.setUp(tmp_path)
+        rows = list(self.journal.rows(ROWS, UserDirectory()))
+        assert rows == ROWS
+        assert list(self.journal.keys) == [
+            '2:jdoe@example.com', '3:jdoe@example.com',
+            '4:asmith@example.com']
+        assert self.journal.journal.status('2:jdoe@example.com') == \
+            Journal.PENDING
+        self.tearDown()
+
+    def test_resume_interrupted_run(self, tmp_path):
+        self.setUp(tmp_path)
+        rows = self.journal.rows(ROWS, UserDirectory())
+        next(rows)
+        next(rows)
+        self.journal.record_row(('quays1', 'password1!'))
+        self.tearDown()
+
+        # The first run created the first user and died while the second
+        # row was in flight, the user shares the second row's mailbox
+        directory = UserDirectory()
+        directory.add(('quays1', '1', 'jdoe@example.com'))
+        self.setUp(tmp_path, resume=True)
+        rows = list(self.journal.rows(ROWS, directory))
+        assert rows == ROWS[1:]
+        assert self.journal.skipped == 1
+        assert self.journal.existing == 0
+        for login in ('quays2', 'quays3'):
+            self.journal.record_row((login, 'password1!'))
+        status = self.journal.journal.status
+        assert status('3:jdoe@example.com') == Journal.DONE
+        assert status('4:asmith@example.com') == Journal.DONE
+        self.tearDown()
+
+        events = read(self.log_file)
+        assert events[0]['event'] == 'skipped'
+        assert events[0]['reason'] == 'done'
+        assert events[0]['line'] == 2
+
+    def test_pending_row_already_exists(self, tmp_path):
+        self.setUp(tmp_path)
+        rows = self.journal.rows(ROWS[2:], UserDirectory())
+        next(rows)
+        self.tearDown()
+
+        # Qualys created the user before the run died
+        directory = UserDirectory()
+        directory.add(('quays3', '3', 'asmith@example.com'))
+        self.setUp(tmp_path, resume=True)
+        rows = list(self.journal.rows(ROWS[2:], directory))
+        assert rows == []
+        assert self.journal.existing == 1
+        assert self.journal.journal.entries['2:asmith@example.com'] == {
+            'key': '2:asmith@example.com', 'status': Journal.DONE,
+            'login': 'quays3', 'reason': RunJournal.EXISTS}
+        self.tearDown()
+
+        # A later resume still reports the row as an existing user
+        self.setUp(tmp_path, resume=True)
+        assert list(self.journal.rows(ROWS[2:], directory)) == []
+        assert self.journal.existing == 1
+        assert self.journal.skipped == 0
+        self.tearDown()
+        assert read(self.log_file)[-1]['reason'] == RunJournal.EXISTS
+
+    def test_record_row_workers(self, tmp_path):
+        self.setUp(tmp_path)
+        rows = [{'email': f'user{i}@example.com'} for i in range(40)]
+
+        def add_user(row):
+            time.sleep(random.random() / 100)
+            i = row['email'][4:-12]
+            if int(i) % 5 == 0:
+                return None
+            return (f'quays{i}', 'password1!')
+
+        # Rows are pulled ahead of the results, each key still has to be
+        # paired with its own row
+        pool = OrderedPool(4)
+        for row, result in pool.map(add_user, self.journal.rows(
+                rows, UserDirectory())):
+            self.journal.record_row(result)
+        assert len(self.journal.keys) == 0
+        self.tearDown()
+
+        entries = read(self.journal_file)
+        done = [entry for entry in entries if entry['status'] != 'pending']
+        assert len(done) == 40
+        for i, entry in enumerate(done):
+            assert entry['key'] == f'{i + 2}:user{i}@example.com'
+            if i % 5 == 0:
+                assert entry['status'] == Journal.FAILED
+            else:
+                assert entry['login'] == f'quays{i}'
+
+    def test_logins(self, tmp_path):
+        self.setUp(tmp_path)
+        logins = self.journal.logins(['quays1', 'quays2'])
+        assert logins == ['quays1', 'quays2']
+        self.journal.record_login('quays1', ('quays1', 'password1!'))
+        self.journal.record_login('quays2', None)
+        self.tearDown()
+
+        self.setUp(tmp_path, resume=True)
+        logins = self.journal.logins(['quays1', 'quays2', 'quays3'])
+        assert logins == ['quays2', 'quays3']
+        assert self.journal.skipped == 1
+        assert self.journal.journal.status('quays3') == Journal.PENDING
+        self.tearDown()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import json
+
+import pytest
+
+from src.classes.run_log import RunLog
+
+
+def read(path) -> list:
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file]
+
+
+class TestRunLog:
+    def test_event(self, tmp_path):
+        log_file = tmp_path / 'qualys_qsc.log'
+        with RunLog(str(log_file), action='create') as run_log:
+            run_log.event('user', ok=True, login='quays1')
+            run_log.event('user', ok=False, email='a@b.com', code=400)
+        events = read(log_file)
+        assert len(events) == 2
+        assert events[0]['event'] == 'user'
+        assert events[0]['action'] == 'create'
+        assert events[0]['login'] == 'quays1'
+        assert events[1]['code'] == 400
+        assert events[0]['run'] == events[1]['run'] == run_log.fields['run']
+        assert events[0]['ts'] <= events[1]['ts']
+
+    def test_append(self, tmp_path):
+        log_file = tmp_path / 'qualys_qsc.log'
+        with RunLog(str(log_file)) as run_log:
+            run_log.event('run_start')
+        with RunLog(str(log_file)) as second:
+            second.event('run_start')
+        events = read(log_file)
+        assert len(events) == 2
+        assert events[0]['run'] != events[1]['run']
+
+    def test_closed(self, tmp_path):
+        log_file = tmp_path / 'qualys_qsc.log'
+        run_log = RunLog(str(log_file))
+        run_log.close()
+        run_log.event('user', ok=True)
+        run_log.close()
+        assert read(log_file) == []
+
+    def test_rotate(self, tmp_path):
+        log_file = tmp_path / 'qualys_qsc.log'
+        with RunLog(str(log_file), max_bytes=200, backups=2) as run_log:
+            for i in range(20):
+                run_log.event('user', ok=True, login=f'quays{i}')
+        names = sorted(path.name for path in tmp_path.iterdir())
+        assert names == ['qualys_qsc.log', 'qualys_qsc.log.1',
+                         'qualys_qsc.log.2']
+        for path in tmp_path.iterdir():
+            assert path.stat().st_size <= 200
+        assert read(log_file)[-1]['login'] == 'quays19'
+
+    def test_rotate_without_backups(self, tmp_path):
+        log_file = tmp_path / 'qualys_qsc.log'
+        with RunLog(str(log_file), max_bytes=200, backups=0) as run_log:
+            for i in range(20):
+                run_log.event('user', ok=True, login=f'quays{i}')
+        assert [path.name for path in tmp_path.iterdir()] == [
+            'qualys_qsc.log']
+        assert read(log_file)[-1]['login'] == 'quays19'
+
+    def test_invalid_max_bytes(self, tmp_path):
+        with pytest.raises(ValueError):
+            RunLog(str(tmp_path / 'qualys_qsc.log'), max_bytes=0)
+
+    def test_invalid_backups(self, tmp_path):
+        with pytest.raises(ValueError):
+            RunLog(str(tmp_path / 'qualys_qsc.log'), backups=-1)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+from src.classes.user_directory import UserDirectory
+
+
+class TestUserDirectory:
+    def setUp(self):
+        self.directory = UserDirectory()
+        self.directory.add(('quays4la3', '1387042', 'test@test.com'))
+        self.directory.add(('quays5ty3', '1387043', 'Test@Test.com'))
+        self.directory.add(('quays6uz4', '1387044', None))
+
+    def tearDown(self):
+        del self.directory
+
+    def test_len(self):
+        self.setUp()
+        assert len(self.directory) == 3
+        self.tearDown()
+
+    def test_contains(self):
+        self.setUp()
+        assert 'quays4la3' in self.directory
+        assert 'quays0000' not in self.directory
+        self.tearDown()
+
+    def test_iter(self):
+        self.setUp()
+        logins = [user[0] for user in self.directory]
+        assert logins == ['quays4la3', 'quays5ty3', 'quays6uz4']
+        self.tearDown()
+
+    def test_get_by_login(self):
+        self.setUp()
+        result = self.directory.get_by_login('quays5ty3')
+        assert result == ('quays5ty3', '1387043', 'Test@Test.com')
+        assert self.directory.get_by_login('quays0000') is None
+        self.tearDown()
+
+    def test_get_by_id(self):
+        self.setUp()
+        result = self.directory.get_by_id('1387042')
+        assert result == ('quays4la3', '1387042', 'test@test.com')
+        assert self.directory.get_by_id('0') is None
+        self.tearDown()
+
+    def test_get_by_email(self):
+        self.setUp()
+        result = self.directory.get_by_email('TEST@test.com')
+        assert [user[0] for user in result] == ['quays4la3', 'quays5ty3']
+        assert self.directory.get_by_email('none@test.com') == []
+        self.tearDown()
+
+    def test_get_by_email_missing(self):
+        self.setUp()
+        result = self.directory.get_by_email('')
+        assert [user[0] for user in result] == ['quays6uz4']
+        self.tearDown()
+
+    def test_clear(self):
+        self.setUp()
+        self.directory.clear()
+        assert len(self.directory) == 0
+        assert self.directory.get_by_id('1387042') is None
+        assert self.directory.get_by_email('test@test.com') == []
+        self.tearDown()
+
+    def test_get_by_external_id(self):
+        self.setUp()
+        self.directory.add(('quays7ab5', '1387045', 'test@test.com', 'abc'))
+        result = self.directory.get_by_external_id('abc')
+        assert [user[0] for user in result] == ['quays7ab5']
+        assert self.directory.get_by_external_id('xyz') == []
+        self.tearDown()
+
+    def test_claim(self):
+        self.setUp()
+        first = self.directory.claim('test@test.com')
+        second = self.directory.claim('TEST@test.com')
+        assert first[0] == 'quays4la3'
+        assert second[0] == 'quays5ty3'
+        assert self.directory.claim('test@test.com') is None
+        self.tearDown()
+
+    def test_claim_external_id(self):
+        self.setUp()
+        self.directory.add(('quays7ab5', '1387045', 'test@test.com', 'abc'))
+        result = self.directory.claim('test@test.com', 'abc')
+        assert result[0] == 'quays7ab5'
+        assert self.directory.claim('other@test.com', 'abc') is None
+        assert self.directory.claim('test@test.com', 'xyz') is None
+        self.tearDown()
+
+    def test_claim_login(self):
+        self.setUp()
+        self.directory.claim_login('quays4la3')
+        result = self.directory.claim('test@test.com')
+        assert result[0] == 'quays5ty3'
+        self.tearDown()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+from urllib.parse import parse_qsl
+
+import pytest
+
+from src.classes.user_payload import UserPayload
+from src.constants import constants
+
+
+class TestUserPayload:
+    def test_defaults(self):
+        payload = UserPayload({})
+        assert len(payload) == 13
+        assert payload == constants.QUALYS_API_REQUIRED_USER_FIELDS
+
+    def test_overrides(self):
+        payload = UserPayload({'first_name': 'Benjamin', 'send_email': 1})
+        assert payload['first_name'] == 'Benjamin'
+        assert payload['send_email'] == 1
+        assert payload['action'] == 'add'
+
+    def test_optional(self):
+        payload = UserPayload({'zip_code': '12345'})
+        assert len(payload) == 14
+        assert payload['zip_code'] == '12345'
+        assert 'fax' not in payload
+        with pytest.raises(KeyError):
+            payload['fax']
+
+    def test_unknown_key(self):
+        payload = UserPayload({'login': True})
+        assert 'login' not in payload
+        with pytest.raises(KeyError):
+            payload['login']
+
+    def test_encode(self):
+        payload = UserPayload({'first_name': 'Ben Owen', 'zip_code': '1'})
+        result = dict(parse_qsl(payload.encode()))
+        assert result['first_name'] == 'Ben Owen'
+        assert result['zip_code'] == '1'
+        assert result['send_email'] == '0'
+        assert len(result) == 14
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import pytest
+
+from src.classes.xml_parser import ExpatParser
+from src.classes.xml_parser import XmltodictParser
+from src.classes.xml_parser import get_xml_parser
+
+PARSERS = [ExpatParser, XmltodictParser]
+
+
+class TestXmlParser:
+    def read(self, filename: str) -> str:
+        with open(f'tests/data/{filename}', 'r') as file:
+            return file.read()
+
+    def test_get_xml_parser(self):
+        assert isinstance(get_xml_parser('expat'), ExpatParser)
+        assert isinstance(get_xml_parser('xmltodict'), XmltodictParser)
+
+    def test_get_xml_parser_unknown(self):
+        with pytest.raises(ValueError):
+            get_xml_parser('lxml')
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_parse_wrong_root(self, parser):
+        data = self.read('xml_response.xml')
+        with pytest.raises(KeyError):
+            parser().parse(200, data, 'PASSWORD_CHANGE_OUTPUT')
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_parse_failed(self, parser):
+        data = self.read('invalid_xml_response.xml')
+        response = parser().parse(200, data, 'USER_OUTPUT')
+        assert response.ok is False
+        assert response.number == 1903
+        assert response.message == 'Lorem ipsum fake error message'
+        assert response.users == []
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_parse_add_user(self, parser):
+        data = self.read('xml_response.xml')
+        response = parser().parse(200, data, 'USER_OUTPUT')
+        assert response.ok is True
+        assert response.status == 'SUCCESS'
+        assert response.users == [
+            {'USER_LOGIN': 'quays6qt84', 'PASSWORD': 'lWby3dX#'}]
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_parse_reset_password(self, parser):
+        data = self.read('password_change_no_email.xml')
+        response = parser().parse(200, data, 'PASSWORD_CHANGE_OUTPUT')
+        assert response.ok is True
+        assert response.users == [
+            {'USER_LOGIN': 'quays7cx25', 'PASSWORD': 'password1!'}]
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_parse_reset_password_multiple_users(self, parser):
+        data = self.read('password_change_multiple_users.xml')
+        response = parser().parse(200, data, 'PASSWORD_CHANGE_OUTPUT')
+        logins = [user['USER_LOGIN'] for user in response.users]
+        assert logins == ['quays8dy36', 'quays7cx25']
+
+    @pytest.mark.parametrize('parser', PARSERS)
+    def test_parse_list_users(self, parser):
+        data = self.read('list_users.xml')
+        response = parser().parse(200, data, 'USER_LIST_OUTPUT')
+        assert response.ok is True
+        assert len(response.users) == 2
+        assert response.users[0] == {
+            'USER_LOGIN': 'quays4la3',
+            'USER_ID': '1387042',
+            'EMAIL': 'test@test.com'}
+        assert response.users[1]['EXTERNAL_ID'] == 'trainee'